@@ -0,0 +1,356 @@
+"""
+Benchmark Suite
+Times indicators, pattern detectors, rule evaluation and full scans on
+deterministic synthetic data and saves the results per commit
+
+Usage:
+    python -m benchmarks.run                      # everything, 100/1000/5000 symbols
+    python -m benchmarks.run --suites scan --sizes 100 --workers 8
+    python -m benchmarks.run --quick --compare latest
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+from modules.backtest import Backtester
+from modules.bar_feeds import ReplayFeed
+from modules.correlation import CorrelationClusters, returns_matrix
+from modules.indicators import IndicatorLibrary
+from modules.panel_indicators import PricePanel
+from modules.param_sweep import ParameterSweep, grid
+from modules.rule_engine import RuleEngine, SetupLibrary
+from modules.scan_results import PATTERN_FLAGS
+from modules.scanner_engine import ScannerEngine
+from modules.similarity import ShapeIndex
+from modules.stream_scanner import StreamingScanner
+from modules.synthetic_data import SyntheticMarket
+
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+ALL_INDICATORS = ['Yoda', 'RSI', 'MACD', 'BB', 'ATR', 'ADX', 'Stochastic', 'OBV', 'VWAP',
+                  'AVG_Volume', 'Median_Volume', 'RVOL', 'Dollar_Volume',
+                  'EMA_5', 'EMA_20', 'EMA_50', 'SMA_200']
+
+SCAN_WORKFLOW = {
+    'indicators': ['Yoda', 'RSI', 'MACD'],
+    'patterns': ['Double_Bottom', 'Double_Top', 'TL_Break_Up'],
+    'setups': ['Momentum_Long'],
+    'timeframes': {'Wave': '4h', 'Tide': '1d', 'SuperTide': '1wk'}
+}
+
+
+def measure(fn, repeat=5, number=1):
+    """Median / min milliseconds per call over `repeat` rounds of `number` calls"""
+    fn()  # warm-up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) * 1000.0 / number)
+    return {'median_ms': statistics.median(times), 'min_ms': min(times), 'runs': repeat * number}
+
+
+def bench_indicators(market, args):
+    df = market.generate('BENCH', '1d', bars=args.bars)
+    lib = IndicatorLibrary
+    cases = {
+        'normalize_ohlc': lambda: lib.normalize_ohlc(df),
+        'calculate_sma': lambda: lib.calculate_sma(df, 20),
+        'calculate_ema': lambda: lib.calculate_ema(df, 20),
+        'calculate_rsi': lambda: lib.calculate_rsi(df),
+        'calculate_macd': lambda: lib.calculate_macd(df),
+        'calculate_bollinger_bands': lambda: lib.calculate_bollinger_bands(df),
+        'calculate_atr': lambda: lib.calculate_atr(df),
+        'calculate_stochastic': lambda: lib.calculate_stochastic(df),
+        'calculate_obv': lambda: lib.calculate_obv(df),
+        'calculate_adx': lambda: lib.calculate_adx(df),
+        'yoda_indicator': lambda: lib.yoda_indicator(df),
+        'calculate_vwap': lambda: lib.calculate_vwap(df),
+        'calculate_avg_volume': lambda: lib.calculate_avg_volume(df),
+        'calculate_median_volume': lambda: lib.calculate_median_volume(df),
+        'calculate_rvol': lambda: lib.calculate_rvol(df),
+        'calculate_dollar_volume': lambda: lib.calculate_dollar_volume(df),
+        'calculate_volume_profile': lambda: lib.calculate_volume_profile(df),
+        'calculate_pivot_points': lambda: lib.calculate_pivot_points(df),
+        'calculate_ichimoku': lambda: lib.calculate_ichimoku(df),
+    }
+    for name, fn in cases.items():
+        yield name, measure(fn, args.repeat, args.number)
+
+
+def bench_patterns(market, args):
+    engine = ScannerEngine()
+    df = market.generate('BENCH', '1d', bars=args.bars, pattern='double_bottom')
+    for pattern in PATTERN_FLAGS.names:
+        yield pattern, measure(lambda: engine.calculate_patterns(df.copy(), [pattern]),
+                               args.repeat, args.number)
+
+
+def bench_rules(market, args):
+    engine = ScannerEngine()
+    rules = RuleEngine()
+    df = engine.calculate_indicators(market.generate('BENCH', '1d', bars=args.bars), ALL_INDICATORS)
+    for setup_name, setup in SetupLibrary.get_all_setups().items():
+        tf_rules = [rule for tf in setup['timeframes'].values() for rule in tf.get('rules', [])]
+        yield f"evaluate_rule:{setup_name}", measure(
+            lambda: [rules.evaluate_rule(df, rule) for rule in tf_rules], args.repeat, args.number * 10)
+    text = "RSI > 60 OR MACD > 0 AND ADX > 18 AND Close > EMA_5"
+    yield 'parse_text_rule', measure(lambda: rules.parse_text_rule(text), args.repeat, args.number * 100)
+
+
+def cached_provider(market, symbols):
+    """Provider with every frame generated up front, so scans time the engine only"""
+    provider = market.provider(cache=True)
+    for symbol in symbols:
+        for interval in SCAN_WORKFLOW['timeframes'].values():
+            provider(symbol, interval)
+    return provider
+
+
+def bench_scan(market, args):
+    for size in args.sizes:
+        symbols = market.universe(size)
+        provider = cached_provider(market, symbols)
+        for panel in (False, True):
+            engine = ScannerEngine(data_provider=provider)
+            start = time.perf_counter()
+            results = engine.scan_multiple_symbols(symbols, SCAN_WORKFLOW, max_workers=args.workers,
+                                                   panel=panel)
+            elapsed = time.perf_counter() - start
+            name = 'scan_multiple_symbols' + ('[panel]' if panel else '')
+            yield f"{name}:{size}", {
+                'median_ms': elapsed * 1000.0,
+                'min_ms': elapsed * 1000.0,
+                'runs': 1,
+                'symbols_per_s': size / elapsed if elapsed > 0 else None,
+                'results': int(len(results)),
+                'workers': args.workers,
+            }
+
+
+def bench_panel(market, args):
+    """Workflow indicators for a daily universe: per-symbol loop vs one PricePanel"""
+    engine = ScannerEngine()
+    indicators = SCAN_WORKFLOW['indicators']
+    for size in args.sizes:
+        frames = {s: market.generate(s, '1d') for s in market.universe(size)}
+        
+        def per_symbol():
+            return [engine.calculate_indicators(df, indicators).iloc[-1] for df in frames.values()]
+        
+        def panel_rows():
+            built = PricePanel.from_frames(frames).compute(indicators)
+            return [built.last_row(s) for s in frames]
+        
+        def panel_frames():
+            built = PricePanel.from_frames(frames).compute(indicators)
+            return [built.frame(s) for s in frames]
+        
+        yield f"calculate_indicators:{size}", measure(per_symbol, 1, 1)
+        yield f"PricePanel.last_row:{size}", measure(panel_rows, 1, 1)
+        yield f"PricePanel.frame:{size}", measure(panel_frames, 1, 1)
+
+
+def bench_correlation(market, args):
+    """Correlation clusters of a daily universe: blocked float32 vs a full pandas matrix"""
+    for size in args.sizes:
+        frames = {s: market.generate(s, '1d') for s in market.universe(size)}
+        _, _, returns = returns_matrix(frames)
+        clusters = CorrelationClusters()
+        
+        def pandas_corr():
+            return pd.DataFrame(returns[-clusters.window:]).corr()
+        
+        yield f"returns_matrix:{size}", measure(lambda: returns_matrix(frames), 1, 1)
+        yield f"CorrelationClusters.labels:{size}", measure(lambda: clusters.labels(returns), 1, 1)
+        if size <= 2000:
+            yield f"DataFrame.corr:{size}", measure(pandas_corr, 1, 1)
+
+
+def bench_backtest(market, args):
+    """Backtester.evaluate on precomputed signal frames (the vectorized part only)"""
+    engine = ScannerEngine()
+    backtester = Backtester(engine)
+    workflow = {'indicators': ['Yoda'], 'patterns': [], 'setups': [], 'timeframes': {'Tide': '1d'}}
+    for size in args.sizes:
+        histories = {}
+        for symbol in market.universe(size):
+            frames = {'Tide': engine.calculate_indicators(market.generate(symbol, '1d', bars=args.bars),
+                                                          workflow['indicators'])}
+            histories[symbol] = backtester.signals(frames, workflow)
+        yield f"Backtester.evaluate:{size}", measure(lambda: backtester.evaluate(histories), 1, 1)
+
+
+def bench_sweep(market, args):
+    """48-set grid over a daily universe with shared intermediates"""
+    space = {'fa': [8, 12], 'sa': [21, 26], 'sig': [5, 9], 'sma_length': [20, 50, 100], 'kc_mult': [1.5, 2.0]}
+    for size in args.sizes:
+        frames = {s: market.generate(s, '1d', bars=args.bars) for s in market.universe(size)}
+        for signal in ('Buy_Signal', 'TTM_Fired'):
+            sweep = ParameterSweep(signal=signal, max_workers=args.workers)
+            yield f"ParameterSweep[{signal}]:{size}", measure(lambda: sweep.run(grid(space), frames), 1, 1)
+
+
+def bench_similarity(market, args):
+    """Shape index of a daily universe: build, then a top-10 query"""
+    for size in args.sizes:
+        frames = {s: market.generate(s, '1d') for s in market.universe(size)}
+        index = ShapeIndex.from_frames(frames)
+        reference = next(iter(frames.values()))['Close'].to_numpy()
+        yield f"ShapeIndex.from_frames:{size}", measure(lambda: ShapeIndex.from_frames(frames), 1, 1)
+        yield f"ShapeIndex.query:{size}", measure(lambda: index.query(reference, k=10), 5, 20)
+
+
+def bench_stream(market, args):
+    """StreamingScanner.on_bar latency per bar after seeding half of a daily frame"""
+    for label, patterns in (('scan', SCAN_WORKFLOW['patterns']), ('all', list(PATTERN_FLAGS.names))):
+        workflow = {'indicators': SCAN_WORKFLOW['indicators'], 'patterns': patterns,
+                    'setups': SCAN_WORKFLOW['setups'], 'timeframes': {'Tide': '1d'}}
+        scanner = StreamingScanner(workflow)
+        df = market.generate('BENCH', '1d', bars=args.bars)
+        split = len(df) // 2
+        scanner.seed('BENCH', {'Tide': df.iloc[:split]})
+        times = []
+        for bar in ReplayFeed({('BENCH', '1d'): df.iloc[split:]}):
+            start = time.perf_counter()
+            scanner.on_bar(bar)
+            times.append((time.perf_counter() - start) * 1000.0)
+        yield f"StreamingScanner.on_bar[{label}]", {
+            'median_ms': statistics.median(times),
+            'min_ms': min(times),
+            'p95_ms': float(np.percentile(times, 95)),
+            'runs': len(times),
+        }
+
+
+SUITES = {
+    'indicators': bench_indicators,
+    'patterns': bench_patterns,
+    'rules': bench_rules,
+    'scan': bench_scan,
+    'panel': bench_panel,
+    'correlation': bench_correlation,
+    'backtest': bench_backtest,
+    'sweep': bench_sweep,
+    'similarity': bench_similarity,
+    'stream': bench_stream,
+}
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return out.stdout.strip() + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def load_previous(spec, exclude=None):
+    """Results file to compare against: a path, or 'latest' saved run"""
+    if spec != 'latest':
+        with open(spec, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    files = sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')), key=os.path.getmtime)
+    files = [f for f in files if os.path.abspath(f) != exclude]
+    if not files:
+        return None
+    with open(files[-1], 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def print_table(report, previous=None):
+    before = {}
+    if previous:
+        before = {(r['suite'], r['name']): r['median_ms'] for r in previous.get('results', [])}
+    print(f"{'suite':<11} {'benchmark':<34} {'median ms':>11} {'min ms':>10}" +
+          (f" {'vs ' + previous.get('commit', '?'):>16}" if previous else ''))
+    for row in report['results']:
+        line = f"{row['suite']:<11} {row['name']:<34} {row['median_ms']:>11.3f} {row['min_ms']:>10.3f}"
+        old = before.get((row['suite'], row['name']))
+        if old:
+            line += f" {row['median_ms'] / old:>15.2f}x"
+        print(line)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='benchmarks.run', description='Scanner benchmark suite')
+    parser.add_argument('--suites', default=','.join(SUITES),
+                        help=f"Comma-separated suites ({', '.join(SUITES)})")
+    parser.add_argument('--sizes', default='100,1000,5000',
+                        help='Universe sizes for the scan suite (default: 100,1000,5000)')
+    parser.add_argument('--bars', type=int, default=500, help='Bars per synthetic frame')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing rounds per micro-benchmark')
+    parser.add_argument('--number', type=int, default=3, help='Calls per timing round')
+    parser.add_argument('--workers', type=int, default=1, help='Scan workers for the scan suite')
+    parser.add_argument('--seed', type=int, default=42, help='Synthetic data seed')
+    parser.add_argument('--quick', action='store_true', help='Small run: 100 symbols, 3 rounds')
+    parser.add_argument('--compare', metavar='PATH|latest',
+                        help='Show ratios against an earlier results file')
+    parser.add_argument('--no-save', action='store_true', help='Do not write a results file')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.quick:
+        args.sizes, args.repeat, args.number = '100', 3, 1
+    args.sizes = [int(s) for s in str(args.sizes).split(',') if s]
+    suites = [s.strip() for s in args.suites.split(',') if s.strip()]
+    unknown = [s for s in suites if s not in SUITES]
+    if unknown:
+        print(f"Unknown suite(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    
+    market = SyntheticMarket(seed=args.seed, bars=args.bars, pattern_rate=0.2)
+    report = {
+        'commit': git_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'args': {k: v for k, v in vars(args).items() if k not in ('compare', 'no_save')},
+        'results': [],
+    }
+    
+    for suite in suites:
+        for name, stats in SUITES[suite](market, args):
+            row = {'suite': suite, 'name': name, **stats}
+            report['results'].append(row)
+            print(f"  {suite}/{name}: {stats['median_ms']:.3f} ms", file=sys.stderr)
+    
+    path = None
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d_%H%M%S')}_{report['commit']}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    
+    previous = load_previous(args.compare, exclude=path) if args.compare else None
+    print_table(report, previous)
+    if path:
+        print(f"\nSaved {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Alerts Module
+Fires alerts on signal / setup / pattern transitions instead of on state
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from collections import deque
+from typing import NamedTuple
+
+from modules.result_cache import workflow_fingerprint
+from modules.scan_results import PATTERN_FLAGS, SETUP_FLAGS, ScanResult, Signal
+
+
+DEFAULT_ALERT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'alerts'
+)
+
+
+class Alert(NamedTuple):
+    """One transition of a symbol's signal, setup or pattern on a timeframe"""
+    Symbol: str
+    Timeframe: str
+    Kind: str
+    Name: str
+    Previous: str
+    Current: str
+    Close: float
+    Time: float
+    
+    @property
+    def message(self):
+        return f"{self.Symbol} [{self.Timeframe}] {self.Kind} {self.Name}: {self.Previous} → {self.Current}"
+    
+    def to_dict(self):
+        entry = self._asdict()
+        entry['Message'] = self.message
+        return entry
+
+
+def primary_timeframe(workflow):
+    """Interval whose bars drive the workflow's signal (Tide, else Wave)"""
+    timeframes = workflow.get('timeframes', {})
+    return timeframes.get('Tide') or timeframes.get('Wave') or 'scan'
+
+
+class JsonlSink:
+    """Appends each alert as a JSON line"""
+    
+    def __init__(self, path=None):
+        self.path = path or os.path.join(DEFAULT_ALERT_DIR, 'alerts.jsonl')
+    
+    def emit(self, alerts):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for alert in alerts:
+                f.write(json.dumps(alert.to_dict(), default=str) + '\n')
+
+
+class WebhookSink:
+    """
+    POSTs each batch as one JSON document. With url=None it only keeps the
+    payloads in `sent`, which is handy as a local stub
+    """
+    
+    def __init__(self, url=None, timeout=5.0, keep=50):
+        self.url = url
+        self.timeout = timeout
+        self.sent = deque(maxlen=keep)
+    
+    def emit(self, alerts):
+        payload = {'alerts': [alert.to_dict() for alert in alerts]}
+        self.sent.append(payload)
+        if not self.url:
+            return
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload, default=str).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class LogSink:
+    """Writes one log line per alert (stderr / desktop log handler)"""
+    
+    def __init__(self, logger_name='scanner.alerts', level=logging.INFO):
+        self.logger = logging.getLogger(logger_name)
+        self.level = level
+    
+    def emit(self, alerts):
+        for alert in alerts:
+            self.logger.log(self.level, alert.message)
+
+
+class AlertEngine:
+    """
+    Keeps the last seen (signal, setup mask, pattern mask) per
+    (symbol, timeframe, workflow) and turns each new observation into Alerts
+    for the bits that switched on (and, optionally, off). The timeframe is
+    always the workflow's primary interval, so batch scans and the stream
+    share one state. A per (symbol, name, timeframe, workflow) cooldown
+    suppresses flapping; suppressed
+    transitions still update the state. Alerts are queued and handed to
+    the sinks in batches; the state table is saved on every flush so a
+    restart does not re-announce signals that were already alerted.
+    """
+    
+    def __init__(self, sinks=None, cooldown=3600.0, batch_size=50, alert_on_clear=False,
+                 state_path=None):
+        self.sinks = list(sinks) if sinks is not None else [JsonlSink(), LogSink()]
+        self.cooldown = cooldown
+        self.batch_size = batch_size
+        self.alert_on_clear = alert_on_clear
+        self.state_path = state_path or os.path.join(DEFAULT_ALERT_DIR, 'alert_state.json')
+        
+        self._state = {}
+        self._fired = {}
+        self._pending = []
+        self.recent = deque(maxlen=200)
+        self.suppressed = 0
+        self._lock = threading.Lock()
+        self.load()
+    
+    def observe(self, result, workflow=None, now=None):
+        """Diff one ScanResult of a workflow against the stored state; returns the new Alerts"""
+        if result is None or result.Error:
+            return []
+        now = time.time() if now is None else now
+        workflow = workflow or {}
+        timeframe = primary_timeframe(workflow)
+        fingerprint = workflow_fingerprint(workflow)
+        key = (result.Symbol, timeframe, fingerprint)
+        current = (int(result.Signal), int(result.Setup_Mask), int(result.Pattern_Mask))
+        
+        with self._lock:
+            previous = self._state.get(key, (int(Signal.NEUTRAL), 0, 0))
+            self._state[key] = current
+            if previous == current:
+                return []
+            
+            alerts = []
+            for transition in self._transitions(previous, current):
+                kind, name = transition[0], transition[1]
+                fired_key = (result.Symbol, name, timeframe, fingerprint)
+                last = self._fired.get(fired_key)
+                if last is not None and now - last < self.cooldown:
+                    self.suppressed += 1
+                    continue
+                self._fired[fired_key] = now
+                alerts.append(Alert(result.Symbol, timeframe, kind, name,
+                                    transition[2], transition[3], float(result.Close), now))
+            
+            self._pending.extend(alerts)
+            self.recent.extend(alerts)
+            should_flush = len(self._pending) >= self.batch_size
+        
+        if should_flush:
+            self.flush()
+        return alerts
+    
+    def observe_frame(self, df, workflow=None, now=None):
+        """Observe every row of a typed results frame"""
+        alerts = []
+        for record in df.itertuples(index=False):
+            values = record._asdict()
+            result = ScanResult(**{f: values[f] for f in ScanResult._fields if f in values})
+            alerts.extend(self.observe(result, workflow, now))
+        return alerts
+    
+    def observe_event(self, event, workflow=None):
+        """Observe a streaming SignalEvent (its Result carries the full workflow state)"""
+        return self.observe(event.Result, workflow)
+    
+    def _transitions(self, previous, current):
+        """(kind, name, previous label, current label) for each change"""
+        old_signal, old_setups, old_patterns = previous
+        new_signal, new_setups, new_patterns = current
+        changes = []
+        
+        if old_signal != new_signal and (new_signal != Signal.NEUTRAL or self.alert_on_clear):
+            changes.append(('signal', 'Signal', Signal(old_signal).name, Signal(new_signal).name))
+        
+        for kind, registry, old, new in (('setup', SETUP_FLAGS, old_setups, new_setups),
+                                         ('pattern', PATTERN_FLAGS, old_patterns, new_patterns)):
+            flipped = old ^ new
+            if not flipped:
+                continue
+            for name in registry.decode(flipped & new):
+                changes.append((kind, name, 'off', 'on'))
+            if self.alert_on_clear:
+                for name in registry.decode(flipped & old):
+                    changes.append((kind, name, 'on', 'off'))
+        return changes
+    
+    def flush(self):
+        """Hand pending alerts to every sink and persist the state table"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            for sink in self.sinks:
+                try:
+                    sink.emit(batch)
+                except Exception as e:
+                    print(f"Alert sink {type(sink).__name__} failed: {e}")
+        self.save()
+        return batch
+    
+    @property
+    def pending(self):
+        return len(self._pending)
+    
+    def reset(self, symbol=None):
+        """Forget stored state (for one symbol or all) so current signals re-alert"""
+        with self._lock:
+            if symbol is None:
+                self._state.clear()
+                self._fired.clear()
+            else:
+                self._state = {k: v for k, v in self._state.items() if k[0] != symbol}
+                self._fired = {k: v for k, v in self._fired.items() if k[0] != symbol}
+    
+    def save(self):
+        with self._lock:
+            payload = {
+                'state': [[*key, *codes] for key, codes in self._state.items()],
+                'fired': [[*key, t] for key, t in self._fired.items()],
+            }
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            tmp_path = self.state_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"Error saving alert state: {e}")
+    
+    def load(self):
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            with self._lock:
+                # Entries saved before state was keyed by workflow are dropped
+                self._state = {tuple(row[:3]): tuple(row[3:]) for row in payload.get('state', [])
+                               if len(row) == 6}
+                self._fired = {tuple(row[:4]): row[4] for row in payload.get('fired', [])
+                               if len(row) == 5}
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Error loading alert state: {e}")
@@ -0,0 +1,321 @@
+"""
+Backtest Module
+Forward returns, hit rates, drawdowns and trade lists of workflow signals over history
+"""
+
+import traceback
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from modules.market_calendar import INTRADAY_MINUTES
+from modules.rule_engine import RuleEngine, SetupLibrary
+from modules.scanner_engine import ScannerEngine
+
+
+# Forward return horizons in bars of the primary timeframe
+DEFAULT_HORIZONS = (1, 5, 10, 20)
+
+# Bar lengths of daily and slower intervals (intraday ones come from INTRADAY_MINUTES)
+BAR_LENGTHS = {
+    '1d': np.timedelta64(1, 'D'),
+    # Weekly bars are stamped on Monday and close with Friday's session
+    '5d': np.timedelta64(5, 'D'),
+    '1wk': np.timedelta64(5, 'D'),
+    '1mo': np.timedelta64(31, 'D'),
+    '3mo': np.timedelta64(92, 'D'),
+}
+
+# Signals that are traded short (forward returns are negated)
+SHORT_SIGNALS = {'Sell_Signal', 'Momentum_Short', 'Double_Top', 'Head_Shoulders',
+                 'TL_Break_Down', 'Rising_Wedge', 'Near_Resistance', 'Level_Break_Down',
+                 'RSI_Bear_Div', 'RSI_Hidden_Bear_Div', 'MACD_Bear_Div', 'MACD_Hidden_Bear_Div',
+                 'OBV_Bear_Div', 'OBV_Hidden_Bear_Div'}
+
+
+# Bars after a pattern bar that its detector reads: the baseline double bottom / top
+# compare a bar with the next one, head and shoulders need 5 bars after each peak
+CONFIRMATION_LAGS = {'Double_Bottom': 1, 'Double_Top': 1, 'Head_Shoulders': 5, 'Inv_Head_Shoulders': 5}
+
+
+class BacktestResult(NamedTuple):
+    """Per-signal statistics and one row per signal bar"""
+    summary: pd.DataFrame
+    trades: pd.DataFrame
+
+
+def lag_confirmations(df):
+    """
+    Shift the CONFIRMATION_LAGS pattern columns of a history frame to the
+    bar their detector could first have seen them on, so tests and queries
+    over history do not act on later bars; returns df
+    """
+    for name, lag in CONFIRMATION_LAGS.items():
+        if name in df.columns:
+            values = np.asarray(df[name].fillna(False), dtype=bool)
+            df[name] = np.concatenate([np.zeros(min(lag, len(values)), dtype=bool), values[:-lag]])
+    return df
+
+
+def rising_edges(signal, group):
+    """Bars where a stacked boolean signal turns on (a symbol's first bar counts as a turn)"""
+    signal = np.asarray(signal, dtype=bool)
+    previous = np.zeros_like(signal)
+    previous[1:] = signal[:-1] & (group[1:] == group[:-1])
+    return signal & ~previous
+
+
+def forward_returns(close, group, horizon):
+    """close[t + horizon] / close[t] - 1 on stacked series, NaN where t + horizon is another group"""
+    out = np.full(len(close), np.nan)
+    if horizon < len(close):
+        same = group[horizon:] == group[:-horizon]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[:-horizon] = np.where(same, close[horizon:] / close[:-horizon] - 1.0, np.nan)
+    return out
+
+
+def forward_extremes(close, high, low, group, horizon):
+    """
+    (lowest low / close - 1, highest high / close - 1) over the next `horizon`
+    bars of the same group, NaN where fewer bars follow
+    """
+    n = len(close)
+    lowest = np.full(n, np.nan)
+    highest = np.full(n, np.nan)
+    if horizon < n:
+        windows = slice(1, n - horizon + 1)
+        low_min = np.lib.stride_tricks.sliding_window_view(low, horizon)[windows].min(axis=1)
+        high_max = np.lib.stride_tricks.sliding_window_view(high, horizon)[windows].max(axis=1)
+        same = group[horizon:] == group[:-horizon]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lowest[:-horizon] = np.where(same, low_min / close[:-horizon] - 1.0, np.nan)
+            highest[:-horizon] = np.where(same, high_max / close[:-horizon] - 1.0, np.nan)
+    return lowest, highest
+
+
+def max_drawdown(entry_times, trade_returns):
+    """Largest peak-to-trough fall of the cumulative return of one unit staked per trade, in entry order"""
+    done = np.isfinite(trade_returns)
+    if not done.any():
+        return np.nan
+    order = np.argsort(entry_times[done], kind='stable')
+    equity = np.concatenate([[0.0], np.cumsum(trade_returns[done][order])])
+    return float((np.maximum.accumulate(equity) - equity).max())
+
+
+def signal_statistics(bars, direction, returns, exit_return, lowest, highest, times):
+    """
+    Trades, mean / median forward return and hit rate per horizon, mean
+    adverse excursion and drawdown of the entries at positions `bars` of
+    stacked arrays ({horizon: forward_returns}, exit returns, forward_extremes)
+    """
+    row = {'Trades': len(bars)}
+    for h, forward in returns.items():
+        r = forward[bars] * direction
+        done = r[np.isfinite(r)]
+        row[f'Mean_{h}'] = done.mean() if len(done) else np.nan
+        row[f'Median_{h}'] = np.median(done) if len(done) else np.nan
+        row[f'Hit_{h}'] = (done > 0).mean() if len(done) else np.nan
+    adverse = (highest if direction < 0 else lowest)[bars] * direction
+    row['MAE_Mean'] = np.nanmean(adverse) if np.isfinite(adverse).any() else np.nan
+    row['Max_Drawdown'] = max_drawdown(times[bars], exit_return[bars] * direction)
+    return row
+
+
+def bar_ends(index, interval=None):
+    """
+    When each bar is complete: start + the interval's length (without one,
+    the last spacing), capped at the next bar's start. Wall-clock time, tz dropped.
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    stamps = index.values
+    if len(stamps) == 0:
+        return stamps
+    length = BAR_LENGTHS.get(interval)
+    if length is None and interval in INTRADAY_MINUTES:
+        length = np.timedelta64(INTRADAY_MINUTES[interval], 'm')
+    if length is None:
+        length = stamps[-1] - stamps[-2] if len(stamps) > 1 else np.timedelta64(1, 'D')
+    ends = stamps + length
+    ends[:-1] = np.minimum(ends[:-1], stamps[1:])
+    return ends
+
+
+def asof_positions(index, target_index, interval=None, target_interval=None):
+    """
+    Row of `index` known at each target bar: the last bar completed by the
+    time the target bar completes (-1 before the first)
+    """
+    return np.searchsorted(bar_ends(index, interval), bar_ends(target_index, target_interval),
+                           side='right') - 1
+
+
+def align_to(values, index, target_index, interval=None, target_interval=None):
+    """Values of another timeframe as known at each target bar (False before the first)"""
+    position = asof_positions(index, target_index, interval, target_interval)
+    return np.where(position >= 0, np.asarray(values)[np.maximum(position, 0)], False)
+
+
+class Backtester:
+    """
+    Vectorized historical test of a workflow's signals. Every bar on which a
+    signal turns on is an entry at that bar's close (pattern columns that
+    read later bars are lagged by CONFIRMATION_LAGS first); each symbol's
+    primary (Tide, else Wave) frame is stacked into one array so forward returns,
+    adverse / favourable excursions and hit rates are computed for all bars
+    and symbols with array shifts instead of a per-bar loop.
+    
+    Signals are Buy_Signal / Sell_Signal, the workflow's pattern columns, its
+    setups (SetupLibrary rules per timeframe, higher and lower timeframes
+    aligned to completed bars so nothing is known early) and any extra text
+    rules, e.g. {'DB_on_TL': 'Double_Bottom == 1 AND TL_Break_Up == 1'}.
+    """
+    
+    def __init__(self, engine=None, horizons=DEFAULT_HORIZONS, hold=None, period='2y'):
+        self.engine = engine or ScannerEngine()
+        self.horizons = tuple(sorted(horizons))
+        # Bars a trade is held for the trade list / drawdown (default: longest horizon)
+        self.hold = hold or self.horizons[-1]
+        # History requested for daily bars (intraday / weekly periods follow the engine)
+        self.period = period
+        self.rule_engine = RuleEngine()
+    
+    def load(self, symbol, workflow):
+        """{tf_name: frame with indicator / pattern columns} of one symbol"""
+        frames = {}
+        for tf_name, interval in workflow.get('timeframes', self.engine.timeframe_map).items():
+            df = self.engine.download_data(symbol, interval, self.period)
+            if df is None or len(df) == 0:
+                continue
+            df = self.engine.calculate_indicators(df, workflow.get('indicators', ['Yoda']))
+            frames[tf_name] = lag_confirmations(self.engine.calculate_patterns(df, workflow.get('patterns', [])))
+        return frames
+    
+    def signals(self, frames, workflow, rules=None):
+        """(primary frame, DataFrame of boolean signal columns on its bars), or None"""
+        primary = 'Tide' if 'Tide' in frames else 'Wave'
+        df = frames.get(primary)
+        if df is None:
+            return None
+        
+        columns = {}
+        for name in ['Buy_Signal', 'Sell_Signal'] + list(workflow.get('patterns', [])):
+            if name in df.columns:
+                columns[name] = np.asarray(df[name].fillna(False), dtype=bool)
+        
+        all_setups = SetupLibrary.get_all_setups()
+        for setup_name in workflow.get('setups', []):
+            setup = all_setups.get(setup_name)
+            if setup is not None:
+                columns[setup_name] = self.setup_series(setup, frames, df.index,
+                                                        workflow.get('timeframes'), primary)
+        
+        for name, text in (rules or {}).items():
+            rule = self.rule_engine.parse_text_rule(text) if isinstance(text, str) else text
+            if rule and 'type' not in rule:
+                rule = {'type': 'AND', 'conditions': [rule]}
+            columns[name] = self.rule_engine.evaluate_rule_series(df, rule) if rule else np.zeros(len(df), dtype=bool)
+        
+        return df, pd.DataFrame(columns, index=df.index)
+    
+    def setup_series(self, setup, frames, index, intervals=None, on=None):
+        """
+        A setup's rules on every bar of `index` (the bars of timeframe `on`),
+        combined with its timeframe logic; intervals = {tf_name: interval}
+        """
+        intervals = intervals or {}
+        per_tf = {}
+        for tf_name, spec in setup['timeframes'].items():
+            df = frames.get(tf_name)
+            if df is None:
+                per_tf[tf_name] = np.zeros(len(index), dtype=bool)
+                continue
+            values = np.logical_and.reduce(
+                [self.rule_engine.evaluate_rule_series(df, rule) for rule in spec.get('rules', [])]
+                or [np.zeros(len(df), dtype=bool)])
+            if df.index.equals(index):
+                per_tf[tf_name] = values
+            else:
+                per_tf[tf_name] = align_to(values, df.index, index, intervals.get(tf_name), intervals.get(on))
+        
+        logic = setup.get('logic', ' AND '.join(per_tf))
+        if ' OR ' in logic:
+            parts = [per_tf.get(name.strip()) for name in logic.split(' OR ')]
+            return np.logical_or.reduce([p for p in parts if p is not None])
+        parts = [per_tf.get(name.strip()) for name in logic.split(' AND ')]
+        if any(p is None for p in parts):
+            return np.zeros(len(index), dtype=bool)
+        return np.logical_and.reduce(parts)
+    
+    def run(self, symbols, workflow, rules=None, progress_callback=None):
+        """Load, compute and backtest every symbol; returns a BacktestResult"""
+        histories = {}
+        for i, symbol in enumerate(symbols):
+            if progress_callback:
+                progress_callback(i + 1, len(symbols), symbol)
+            try:
+                loaded = self.signals(self.load(symbol, workflow), workflow, rules)
+                if loaded is not None:
+                    histories[symbol] = loaded
+            except Exception as e:
+                traceback.print_exc()
+        return self.evaluate(histories)
+    
+    def evaluate(self, histories):
+        """BacktestResult from {symbol: (primary frame, signal frame)}"""
+        symbols = list(histories)
+        if not symbols:
+            return BacktestResult(pd.DataFrame(), pd.DataFrame())
+        
+        # Stack every symbol's bars into one long array, group = symbol position
+        lengths = np.array([len(histories[s][0]) for s in symbols])
+        group = np.repeat(np.arange(len(symbols)), lengths)
+        stacked = {field: np.concatenate([np.asarray(histories[s][0][field], dtype=float) for s in symbols])
+                   for field in ('Close', 'High', 'Low')}
+        times = np.concatenate([pd.DatetimeIndex(histories[s][0].index).values for s in symbols])
+        signal_frame = pd.concat([histories[s][1] for s in symbols], ignore_index=True)
+        signal_frame = signal_frame.fillna(False).astype(bool)
+        
+        close = stacked['Close']
+        returns = {h: forward_returns(close, group, h) for h in self.horizons}
+        exit_return = returns[self.hold] if self.hold in returns else forward_returns(close, group, self.hold)
+        lowest, highest = forward_extremes(close, stacked['High'], stacked['Low'], group, self.hold)
+        
+        exit_bar = np.arange(len(close)) + self.hold
+        has_exit = np.isfinite(exit_return)
+        exit_bar = np.where(has_exit, exit_bar, 0)
+        
+        summary_rows = []
+        trade_frames = []
+        for name in signal_frame.columns:
+            # A signal that stays on (a pattern state) is one entry, on the bar it turned on
+            bars = np.flatnonzero(rising_edges(signal_frame[name].to_numpy(), group))
+            direction = -1.0 if name in SHORT_SIGNALS else 1.0
+            row = {'Signal': name, 'Direction': 'short' if direction < 0 else 'long'}
+            row.update(signal_statistics(bars, direction, returns, exit_return, lowest, highest, times))
+            summary_rows.append(row)
+            
+            trade_return = exit_return[bars] * direction
+            adverse = (highest if direction < 0 else lowest)[bars] * direction
+            favourable = (lowest if direction < 0 else highest)[bars] * direction
+            
+            trade_frames.append(pd.DataFrame({
+                'Symbol': np.asarray(symbols, dtype=object)[group[bars]],
+                'Signal': name,
+                'Entry_Time': times[bars],
+                'Entry_Price': close[bars],
+                'Exit_Time': np.where(has_exit[bars], times[exit_bar[bars]], np.datetime64('NaT')),
+                'Exit_Price': np.where(has_exit[bars], close[exit_bar[bars]], np.nan),
+                'Return': trade_return,
+                'MAE': adverse,
+                'MFE': favourable,
+            }))
+        
+        trades = pd.concat(trade_frames, ignore_index=True) if trade_frames else pd.DataFrame()
+        if len(trades):
+            trades = trades.sort_values(['Entry_Time', 'Symbol'], kind='stable', ignore_index=True)
+        return BacktestResult(pd.DataFrame(summary_rows), trades)
@@ -0,0 +1,212 @@
+"""
+Bar Feeds Module
+Pluggable sources of completed OHLCV bars for the streaming scanner
+"""
+
+import json
+import os
+import selectors
+import socket
+import threading
+import time
+
+import pandas as pd
+
+
+def parse_bar(obj):
+    """
+    Normalize a bar message into the scanner's bar dict.
+    Accepts either capitalised or lower-case keys, e.g.
+    {"symbol": "AAPL", "interval": "1d", "timestamp": "2024-05-01",
+     "open": 1, "high": 2, "low": 0.5, "close": 1.5, "volume": 1000}
+    """
+    get = lambda key: obj.get(key, obj.get(key.lower()))
+    close = float(get('Close'))
+    bar = {
+        'Symbol': str(get('Symbol')).upper(),
+        'Interval': get('Interval') or '1d',
+        'Timestamp': pd.Timestamp(get('Timestamp')),
+        'Open': float(get('Open') if get('Open') is not None else close),
+        'High': float(get('High') if get('High') is not None else close),
+        'Low': float(get('Low') if get('Low') is not None else close),
+        'Close': close,
+        'Volume': float(get('Volume') or 0.0),
+    }
+    bar['Received'] = time.perf_counter()
+    return bar
+
+
+class BarFeed:
+    """Base feed: iterate to receive bar dicts, close() to stop"""
+    
+    def __init__(self):
+        self._closed = threading.Event()
+    
+    def close(self):
+        self._closed.set()
+    
+    @property
+    def closed(self):
+        return self._closed.is_set()
+    
+    def __iter__(self):
+        raise NotImplementedError
+
+
+class ReplayFeed(BarFeed):
+    """
+    Replays historical frames as a bar stream in timestamp order.
+    frames: {(symbol, interval): OHLCV DataFrame}. speed=None replays as
+    fast as possible, otherwise sleeps `1 / speed` seconds between bars.
+    """
+    
+    def __init__(self, frames, speed=None, start=None):
+        super().__init__()
+        self.frames = frames
+        self.speed = speed
+        self.start = pd.Timestamp(start) if start is not None else None
+    
+    def __iter__(self):
+        parts = []
+        for (symbol, interval), df in self.frames.items():
+            if df is None or len(df) == 0:
+                continue
+            part = df[['Open', 'High', 'Low', 'Close', 'Volume']].copy()
+            part['Symbol'] = symbol
+            part['Interval'] = interval
+            part['Timestamp'] = part.index
+            parts.append(part)
+        if not parts:
+            return
+        bars = pd.concat(parts, ignore_index=True).sort_values('Timestamp', kind='stable')
+        if self.start is not None:
+            bars = bars[bars['Timestamp'] >= self.start]
+        
+        for row in bars.to_dict('records'):
+            if self.closed:
+                return
+            row['Received'] = time.perf_counter()
+            yield row
+            if self.speed:
+                time.sleep(1.0 / self.speed)
+
+
+class FileTailFeed(BarFeed):
+    """Follows a JSONL file (one bar per line), like `tail -f`"""
+    
+    def __init__(self, path, poll_interval=0.2, from_start=False):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.from_start = from_start
+    
+    def __iter__(self):
+        while not os.path.exists(self.path):
+            if self.closed:
+                return
+            time.sleep(self.poll_interval)
+        
+        with open(self.path, 'r', encoding='utf-8') as f:
+            if not self.from_start:
+                f.seek(0, os.SEEK_END)
+            buffer = ''
+            while not self.closed:
+                chunk = f.readline()
+                if not chunk:
+                    time.sleep(self.poll_interval)
+                    continue
+                buffer += chunk
+                if not buffer.endswith('\n'):
+                    # Writer has not finished the line yet
+                    continue
+                line, buffer = buffer.strip(), ''
+                if line:
+                    try:
+                        yield parse_bar(json.loads(line))
+                    except (ValueError, TypeError):
+                        continue
+
+
+class SocketFeed(BarFeed):
+    """
+    Listens on a local TCP port ('127.0.0.1:9009') or Unix socket path and
+    reads newline-delimited JSON bars from each connected publisher
+    """
+    
+    def __init__(self, address, timeout=0.5):
+        super().__init__()
+        self.address = address
+        self.timeout = timeout
+        self._server = None
+    
+    def _listen(self):
+        if ':' in self.address and not self.address.startswith('/'):
+            host, port = self.address.rsplit(':', 1)
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind((host or '127.0.0.1', int(port)))
+        else:
+            if os.path.exists(self.address):
+                os.remove(self.address)
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(self.address)
+        server.listen(4)
+        server.settimeout(self.timeout)
+        return server
+    
+    def close(self):
+        super().close()
+        if self._server is not None:
+            self._server.close()
+    
+    def __iter__(self):
+        self._server = self._listen()
+        # Publishers are multiplexed, so one idle connection blocks no other
+        selector = selectors.DefaultSelector()
+        selector.register(self._server, selectors.EVENT_READ)
+        try:
+            while not self.closed:
+                try:
+                    events = selector.select(self.timeout)
+                except (OSError, ValueError):
+                    return
+                for key, _ in events:
+                    if key.fileobj is self._server:
+                        try:
+                            conn, _ = self._server.accept()
+                        except (socket.timeout, BlockingIOError):
+                            continue
+                        except OSError:
+                            return
+                        conn.setblocking(False)
+                        selector.register(conn, selectors.EVENT_READ, {'buffer': b''})
+                    else:
+                        yield from self._read(key, selector)
+        finally:
+            for key in list(selector.get_map().values()):
+                key.fileobj.close()
+            selector.close()
+            self._server.close()
+    
+    def _read(self, key, selector):
+        """Bars in the complete lines a ready connection has sent"""
+        conn, state = key.fileobj, key.data
+        try:
+            data = conn.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if not data:
+            selector.unregister(conn)
+            conn.close()
+            return
+        *lines, state['buffer'] = (state['buffer'] + data).split(b'\n')
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield parse_bar(json.loads(line))
+            except (ValueError, TypeError):
+                continue
@@ -0,0 +1,155 @@
+"""
+Correlation Module
+Rolling return correlations of the scanned universe and clusters of correlated symbols
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+
+def returns_matrix(frames):
+    """
+    (dates, symbols, returns) from {symbol: OHLCV DataFrame}: float32 daily
+    log returns on the union of the symbols' dates, NaN where a symbol has no bar
+    """
+    frames = {s: df for s, df in frames.items() if df is not None and len(df) > 0}
+    stamps = [df.index.values for df in frames.values()]
+    index = pd.DatetimeIndex(np.unique(np.concatenate(stamps))) if stamps else pd.DatetimeIndex([])
+    close = np.full((len(index), len(frames)), np.nan)
+    for j, df in enumerate(frames.values()):
+        rows = np.searchsorted(index.values, df.index.values)
+        close[rows, j] = pd.to_numeric(df['Close'], errors='coerce').to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(np.log(close), axis=0).astype(np.float32)
+    return index[1:], list(frames), returns
+
+
+def standardize(returns, min_periods):
+    """
+    Demeaned columns scaled so that z.T @ z is the correlation matrix
+    (missing returns count as the column mean). Returns (z, ok); columns with
+    fewer than min_periods returns or no variance are all zero and not ok.
+    """
+    valid = np.isfinite(returns)
+    counts = valid.sum(axis=0)
+    x = np.where(valid, returns, np.float32(0))
+    mean = x.sum(axis=0) / np.maximum(counts, 1)
+    x = np.where(valid, x - mean, np.float32(0))
+    norm = np.sqrt((x * x).sum(axis=0))
+    ok = (counts >= min_periods) & (norm > 0)
+    z = x / np.where(ok, norm, np.float32(1))
+    z[:, ~ok] = 0
+    return z.astype(np.float32, copy=False), ok
+
+
+def correlation_blocks(z, block):
+    """(i0, j0, z[:, i0:].T @ z[:, j0:]) for the upper-triangle blocks of the correlation matrix"""
+    n = z.shape[1]
+    for i0 in range(0, n, block):
+        zi = z[:, i0:i0 + block]
+        for j0 in range(i0, n, block):
+            yield i0, j0, zi.T @ z[:, j0:j0 + block]
+
+
+class CorrelationClusters:
+    """
+    Groups symbols whose returns move together over the trailing window:
+    two symbols are linked when their correlation is at least `threshold`,
+    and a cluster is a connected group of links (single linkage). The
+    correlation matrix is computed in float32 (block x block) pieces with
+    BLAS matrix products, and each piece is reduced to a spanning forest of
+    its links before the next, so memory stays bounded for thousands of symbols.
+    """
+    
+    def __init__(self, window=63, threshold=0.7, block=1024, min_periods=None):
+        self.window = window
+        self.threshold = threshold
+        self.block = block
+        self.min_periods = min_periods or max(2, window // 2)
+    
+    def matrix(self, returns, end=None):
+        """Full correlation matrix of the window ending at row `end` (NaN for unusable symbols)"""
+        z, ok = standardize(self._window(returns, end), self.min_periods)
+        n = z.shape[1]
+        corr = np.empty((n, n), dtype=np.float32)
+        for i0, j0, piece in correlation_blocks(z, self.block):
+            corr[i0:i0 + piece.shape[0], j0:j0 + piece.shape[1]] = piece
+            corr[j0:j0 + piece.shape[1], i0:i0 + piece.shape[0]] = piece.T
+        corr[~ok, :] = np.nan
+        corr[:, ~ok] = np.nan
+        np.fill_diagonal(corr, np.where(ok, 1.0, np.nan))
+        return corr
+    
+    def rolling(self, returns, step=21):
+        """(end row, correlation matrix) every `step` rows once a full window is available"""
+        for end in range(self.window, returns.shape[0] + 1, step):
+            yield end, self.matrix(returns, end)
+    
+    def labels(self, returns, end=None):
+        """Cluster id per symbol (0 = largest cluster), -1 for symbols without enough data"""
+        z, ok = standardize(self._window(returns, end), self.min_periods)
+        n = z.shape[1]
+        rows, cols = [], []
+        for i0, j0, piece in correlation_blocks(z, self.block):
+            linked = piece >= self.threshold
+            if i0 == j0:
+                linked = np.triu(linked, k=1)
+            r, c = np.nonzero(linked)
+            if len(r) == 0:
+                continue
+            r, c = self._forest(r + i0, c + j0)
+            rows.append(r)
+            cols.append(c)
+        
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+        graph = coo_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(n, n))
+        _, components = connected_components(graph, directed=False)
+        
+        # Renumber by size (largest first), unusable symbols get -1
+        labels = np.full(n, -1, dtype=np.int32)
+        ids, inverse, counts = np.unique(components[ok], return_inverse=True, return_counts=True)
+        rank = np.empty(len(ids), dtype=np.int32)
+        rank[np.lexsort((ids, -counts))] = np.arange(len(ids), dtype=np.int32)
+        labels[ok] = rank[inverse]
+        return labels
+    
+    @staticmethod
+    def _forest(rows, cols):
+        """Links of one block reduced to each node -> its component's first node"""
+        nodes, inverse = np.unique(np.concatenate([rows, cols]), return_inverse=True)
+        local = coo_matrix((np.ones(len(rows), dtype=np.int8),
+                            (inverse[:len(rows)], inverse[len(rows):])), shape=(len(nodes), len(nodes)))
+        _, component = connected_components(local, directed=False)
+        _, first = np.unique(component, return_index=True)
+        return nodes, nodes[first[component]]
+    
+    def _window(self, returns, end):
+        end = returns.shape[0] if end is None else end
+        return returns[max(0, end - self.window):end]
+    
+    def cluster_frame(self, frames):
+        """DataFrame of Symbol, Cluster and Cluster_Size from {symbol: daily OHLCV frame}"""
+        _, symbols, returns = returns_matrix(frames)
+        labels = self.labels(returns)
+        sizes = np.bincount(labels[labels >= 0], minlength=1)
+        return pd.DataFrame({
+            'Symbol': symbols,
+            'Cluster': labels,
+            'Cluster_Size': np.where(labels >= 0, sizes[np.maximum(labels, 0)], 0).astype(np.int32),
+        })
+    
+    def annotate(self, results, engine, interval='1d'):
+        """
+        Copy of a scan results frame with Cluster / Cluster_Size columns, using
+        the engine's (cached) daily bars of the symbols that scanned without error
+        """
+        results = results.copy()
+        valid = results['Error'].isna() if 'Error' in results.columns else pd.Series(True, index=results.index)
+        frames = {symbol: engine.download_data(symbol, interval) for symbol in results.loc[valid, 'Symbol']}
+        clusters = self.cluster_frame(frames).set_index('Symbol')
+        results['Cluster'] = results['Symbol'].map(clusters['Cluster']).fillna(-1).astype(np.int32)
+        results['Cluster_Size'] = results['Symbol'].map(clusters['Cluster_Size']).fillna(0).astype(np.int32)
+        return results
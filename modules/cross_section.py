@@ -0,0 +1,143 @@
+"""
+Cross Section Module
+Universe-wide ranks, z-scores, relative strength and top-K selection of scan results
+"""
+
+import heapq
+
+import numpy as np
+import pandas as pd
+
+
+# Trailing returns recorded on every ScanResult, in bars of the primary timeframe
+RETURN_PERIODS = {
+    'Return_1M': 21,
+    'Return_3M': 63,
+}
+
+# Metrics that are ranked / z-scored across the universe
+RANKED_METRICS = ['Return_1M', 'Return_3M', 'RS_1M', 'RS_3M', 'RSI', 'MACD', 'MTF_Score']
+
+# Composite score = weighted mean of percentile ranks (weights renormalized
+# over the metrics a symbol has)
+DEFAULT_WEIGHTS = {
+    'RS_3M': 0.35,
+    'RS_1M': 0.25,
+    'MTF_Score': 0.25,
+    'RSI': 0.15,
+}
+
+
+def trailing_returns(close, periods=None):
+    """{field: close[-1] / close[-1 - n] - 1} for each period (NaN when too short)"""
+    periods = periods or RETURN_PERIODS
+    close = np.asarray(close, dtype=float)
+    returns = {}
+    for field, n in periods.items():
+        if len(close) > n and close[-1 - n] != 0:
+            returns[field] = float(close[-1] / close[-1 - n] - 1.0)
+        else:
+            returns[field] = np.nan
+    return returns
+
+
+def percentile_ranks(values):
+    """Percentile rank in (0, 1] of each value (ties averaged, NaN stays NaN)"""
+    return pd.Series(np.asarray(values, dtype=float)).rank(pct=True, method='average').to_numpy()
+
+
+def zscores(values):
+    """(x - mean) / std over the finite values; 0 when they are all equal"""
+    values = np.asarray(values, dtype=float)
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return np.full(values.shape, np.nan)
+    std = finite.std()
+    if std == 0:
+        return np.where(np.isfinite(values), 0.0, np.nan)
+    return (values - finite.mean()) / std
+
+
+def top_k(values, k, largest=True):
+    """
+    Positions of the k largest (or smallest) finite values, best first,
+    selected with a heap in O(n log k) instead of sorting everything
+    """
+    values = np.asarray(values, dtype=float)
+    candidates = np.flatnonzero(np.isfinite(values))
+    select = heapq.nlargest if largest else heapq.nsmallest
+    # Ties keep input order: compare on (value, -position) / (value, position)
+    if largest:
+        best = select(k, zip(values[candidates].tolist(), (-candidates).tolist()))
+        return np.array([-pos for _, pos in best], dtype=np.int64)
+    best = select(k, zip(values[candidates].tolist(), candidates.tolist()))
+    return np.array([pos for _, pos in best], dtype=np.int64)
+
+
+class CrossSection:
+    """
+    Post-scan stage over a typed results frame: relative strength against
+    a benchmark symbol (or the universe median when there is none), a
+    percentile rank and z-score column per metric, and a composite score
+    from weighted ranks. Rows with errors are left out of every statistic.
+    """
+    
+    def __init__(self, weights=None, benchmark=None, metrics=None):
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.benchmark = benchmark
+        self.metrics = list(metrics or RANKED_METRICS)
+    
+    def benchmark_returns(self, df, valid):
+        """Returns of the benchmark row, or the median over valid rows"""
+        if self.benchmark is not None:
+            rows = df.index[(df['Symbol'] == self.benchmark).to_numpy() & valid]
+            if len(rows):
+                return {field: float(df.at[rows[0], field]) for field in RETURN_PERIODS if field in df.columns}
+            print(f"Benchmark {self.benchmark} not in results, using the universe median")
+        return {field: float(np.nanmedian(df[field].to_numpy(dtype=float)[valid]))
+                if valid.any() and field in df.columns else np.nan
+                for field in RETURN_PERIODS}
+    
+    def score(self, df):
+        """Copy of df with RS_*, <metric>_Rank, <metric>_Z, Composite and Composite_Rank columns"""
+        df = df.copy()
+        if len(df) == 0:
+            df['Composite'] = pd.Series(dtype=float)
+            df['Composite_Rank'] = pd.Series(dtype=float)
+            return df
+        valid = df['Error'].isna().to_numpy() if 'Error' in df.columns else np.ones(len(df), dtype=bool)
+        
+        # Relative strength: excess trailing return over the benchmark
+        bench = self.benchmark_returns(df, valid)
+        for field in RETURN_PERIODS:
+            if field in df.columns:
+                rs = df[field].to_numpy(dtype=float) - bench.get(field, np.nan)
+                df['RS_' + field.split('_', 1)[1]] = np.where(valid, rs, np.nan)
+        
+        composite = np.zeros(len(df))
+        weight_sum = np.zeros(len(df))
+        for metric in self.metrics:
+            if metric not in df.columns:
+                continue
+            values = np.where(valid, df[metric].to_numpy(dtype=float), np.nan)
+            ranks = percentile_ranks(values)
+            df[f'{metric}_Rank'] = ranks
+            df[f'{metric}_Z'] = zscores(values)
+            weight = self.weights.get(metric, 0.0)
+            if weight:
+                has = np.isfinite(ranks)
+                composite += np.where(has, ranks * weight, 0.0)
+                weight_sum += np.where(has, weight, 0.0)
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            df['Composite'] = np.where(weight_sum > 0, composite / weight_sum, np.nan)
+        df['Composite_Rank'] = percentile_ranks(df['Composite'])
+        return df
+    
+    def top(self, df, k=20, column='Composite', largest=True):
+        """The k best rows of a scored frame by column, best first"""
+        if column not in df.columns:
+            df = self.score(df)
+        if len(df) == 0:
+            return df
+        return df.iloc[top_k(df[column].to_numpy(dtype=float), k, largest)]
@@ -0,0 +1,78 @@
+"""
+Data Cache Module
+Downloaded OHLCV frames kept until their interval's next bar close
+"""
+
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from modules.market_calendar import MarketCalendar
+
+
+class MarketDataCache:
+    """
+    Thread-safe LRU of downloaded frames keyed by (symbol, interval, period).
+    Each entry expires at the next bar close of its interval on the market
+    calendar, so while the market is closed (nights, weekends, holidays)
+    nothing expires and scans do not refetch. While the session is open the
+    current bar of every interval is still forming, so entries then live at
+    most `live_ttl` seconds (None keeps them until the bar close). Frames are shared between
+    callers and must not be mutated (the engine normalizes into a copy).
+    """
+    
+    def __init__(self, calendar=None, max_entries=5000, live_ttl=60.0):
+        self.calendar = calendar or MarketCalendar()
+        self.max_entries = max_entries
+        self.live_ttl = live_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, symbol, interval, period=None, now=None):
+        key = (symbol, interval, period)
+        now = pd.Timestamp(now) if now is not None else self.calendar.now()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now >= entry[1]:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def expiry(self, interval, now=None):
+        """When a frame of an interval fetched at `now` goes stale"""
+        now = self.calendar._local(now if now is not None else self.calendar.now())
+        expires_at = self.calendar.next_bar_close(interval, now)
+        if self.live_ttl is not None and self.calendar.is_open(now):
+            expires_at = min(expires_at, now + pd.Timedelta(seconds=self.live_ttl))
+        return expires_at
+    
+    def put(self, symbol, interval, df, period=None, now=None):
+        """Store a frame until it goes stale (see expiry)"""
+        try:
+            expires_at = self.expiry(interval, now)
+        except ValueError:
+            return
+        with self._lock:
+            self._entries[(symbol, interval, period)] = (df, expires_at)
+            self._entries.move_to_end((symbol, interval, period))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, interval=None):
+        """Drop every entry (or those of one interval)"""
+        with self._lock:
+            if interval is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[1] == interval]:
+                    del self._entries[key]
+    
+    def __len__(self):
+        return len(self._entries)
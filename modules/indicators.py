@@ -166,8 +166,11 @@ class IndicatorLibrary:
         
         df['MACD'] = macd
         df['Signal'] = signal
-        df['MACD_Color'] = np.where(macd > macd.shift(1), 'green', 'red')
-        df['Signal_Color'] = np.where(signal > signal.shift(1), 'green', 'red')
+        # Rising MACD / signal line ('green' bars); colour names come from yoda_colors()
+        macd_up = (macd > macd.shift(1)).to_numpy()
+        signal_up = (signal > signal.shift(1)).to_numpy()
+        df['MACD_Up'] = macd_up
+        df['Signal_Up'] = signal_up
         
         # SMA
         sma = close.rolling(sma_length, min_periods=1).mean()
@@ -175,14 +178,17 @@ class IndicatorLibrary:
         df['CrossUp'] = (close.shift(1) < sma.shift(1)) & (close > sma)
         df['CrossDown'] = (close.shift(1) > sma.shift(1)) & (close < sma)
         
-        # Buy/Sell signals
-        wasGreen = (df['MACD_Color'].shift(1) == 'green') & (df['Signal_Color'].shift(1) == 'green')
-        wasRed = (df['MACD_Color'].shift(1) == 'red') & (df['Signal_Color'].shift(1) == 'red')
-        isGreen = (df['MACD_Color'] == 'green') & (df['Signal_Color'] == 'green')
-        isRed = (df['MACD_Color'] == 'red') & (df['Signal_Color'] == 'red')
+        # Buy/Sell signals on the first bar of an all-green / all-red state
+        # (the bar before the first one counts as neither)
+        isGreen = macd_up & signal_up
+        isRed = ~macd_up & ~signal_up
+        wasGreen = np.zeros_like(isGreen)
+        wasRed = np.zeros_like(isRed)
+        wasGreen[1:] = isGreen[:-1]
+        wasRed[1:] = isRed[:-1]
         
-        df['Buy_MACD'] = (~wasGreen & isGreen).fillna(False)
-        df['Sell_MACD'] = (~wasRed & isRed).fillna(False)
+        df['Buy_MACD'] = ~wasGreen & isGreen
+        df['Sell_MACD'] = ~wasRed & isRed
         
         # TTM Squeeze
         bb = BollingerBands(close, window=length_squeeze, window_dev=bb_mult)
@@ -203,6 +209,14 @@ class IndicatorLibrary:
         
         return df
     
+    @staticmethod
+    def yoda_colors(df):
+        """'green'/'red' MACD and signal colours of a yoda_indicator frame, for charting"""
+        colors = pd.DataFrame(index=df.index)
+        for name in ('MACD', 'Signal'):
+            colors[f'{name}_Color'] = np.where(df[f'{name}_Up'].to_numpy(), 'green', 'red')
+        return colors
+    
     @staticmethod
     def calculate_vwap(df):
         """Volume Weighted Average Price"""
@@ -210,6 +224,63 @@ class IndicatorLibrary:
             return df['Close']
         return (df['Close'] * df['Volume']).cumsum() / df['Volume'].cumsum()
     
+    @staticmethod
+    def _volume(df):
+        """Volume as float (NaN when the frame has none)"""
+        if 'Volume' not in df.columns:
+            return pd.Series(np.nan, index=df.index)
+        return df['Volume'].astype(float)
+    
+    @staticmethod
+    def calculate_avg_volume(df, period=20):
+        """Average volume over the last `period` bars"""
+        return IndicatorLibrary._volume(df).rolling(period, min_periods=period).mean()
+    
+    @staticmethod
+    def calculate_median_volume(df, period=20):
+        """Median volume over the last `period` bars (robust to one-off spikes)"""
+        return IndicatorLibrary._volume(df).rolling(period, min_periods=period).median()
+    
+    @staticmethod
+    def calculate_rvol(df, period=20):
+        """Relative volume: this bar's volume over the average of the `period` bars before it"""
+        volume = IndicatorLibrary._volume(df)
+        average = volume.rolling(period, min_periods=period).mean().shift(1)
+        return volume / average.where(average > 0)
+    
+    @staticmethod
+    def calculate_dollar_volume(df, period=20):
+        """Average traded value (close x volume) over the last `period` bars"""
+        value = df['Close'].astype(float) * IndicatorLibrary._volume(df)
+        return value.rolling(period, min_periods=period).mean()
+    
+    @staticmethod
+    def calculate_volume_profile(df, bins=24, window=None):
+        """
+        Volume by price over the last `window` bars (all by default): each
+        bar's volume is binned at its typical price with a weighted
+        np.histogram. Returns a DataFrame of Price_Low, Price_High, Price
+        (bin centre) and Volume, lowest price first
+        """
+        columns = ['Price_Low', 'Price_High', 'Price', 'Volume']
+        if window:
+            df = df.iloc[-window:]
+        typical = ((df['High'] + df['Low'] + df['Close']) / 3).to_numpy(dtype=float)
+        volume = IndicatorLibrary._volume(df).to_numpy()
+        valid = np.isfinite(typical) & np.isfinite(volume)
+        if not valid.any():
+            return pd.DataFrame(columns=columns)
+        low = np.nanmin(df['Low'].to_numpy(dtype=float))
+        high = np.nanmax(df['High'].to_numpy(dtype=float))
+        counts, edges = np.histogram(typical[valid], bins=bins, range=(low, max(high, low + 1e-9)),
+                                     weights=volume[valid])
+        return pd.DataFrame({
+            'Price_Low': edges[:-1],
+            'Price_High': edges[1:],
+            'Price': (edges[:-1] + edges[1:]) / 2,
+            'Volume': counts,
+        })
+    
     @staticmethod
     def calculate_pivot_points(df):
         """Pivot Points"""
@@ -0,0 +1,197 @@
+"""
+Market Calendar Module
+Local NYSE session calendar (holidays, early closes) and bar-close times
+"""
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+import pandas as pd
+
+
+INTRADAY_MINUTES = {
+    '1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30,
+    '60m': 60, '1h': 60, '90m': 90, '2h': 120, '4h': 240,
+}
+
+DAILY_INTERVALS = ('1d', '5d')
+WEEKLY_INTERVALS = ('1wk',)
+MONTHLY_INTERVALS = ('1mo', '3mo')
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th (1-based) weekday of a month; n=-1 is the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        offset = (weekday - first.weekday()) % 7
+        return first + timedelta(days=offset + 7 * (n - 1))
+    last = date(year, month + 1, 1) - timedelta(days=1) if month < 12 else date(year, 12, 31)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year):
+    """Gregorian Easter Sunday (anonymous algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(day):
+    """Saturday holidays move to Friday, Sunday holidays to Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+class MarketCalendar:
+    """
+    Regular-hours session calendar for US equities (NYSE rules).
+    Holidays and early closes are computed from the exchange's rules, so
+    there is no data file to keep up to date; one-off closures can be
+    passed as extra_holidays.
+    """
+    
+    def __init__(self, tz='America/New_York', open_time=time(9, 30), close_time=time(16, 0),
+                 early_close_time=time(13, 0), extra_holidays=()):
+        self.tz = tz
+        self.open_time = open_time
+        self.close_time = close_time
+        self.early_close_time = early_close_time
+        self.extra_holidays = {pd.Timestamp(d).date() for d in extra_holidays}
+    
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def holidays(year):
+        """Full-day NYSE holidays of a year"""
+        days = {
+            _nth_weekday(year, 1, 0, 3),            # Martin Luther King Jr. Day
+            _nth_weekday(year, 2, 0, 3),            # Washington's Birthday
+            _easter(year) - timedelta(days=2),      # Good Friday
+            _nth_weekday(year, 5, 0, -1),           # Memorial Day
+            _observed(date(year, 7, 4)),            # Independence Day
+            _nth_weekday(year, 9, 0, 1),            # Labor Day
+            _nth_weekday(year, 11, 3, 4),           # Thanksgiving
+            _observed(date(year, 12, 25)),          # Christmas
+        }
+        # New Year's Day on a Saturday is not observed on the prior Friday
+        new_year = date(year, 1, 1)
+        if new_year.weekday() != 5:
+            days.add(_observed(new_year))
+        if year >= 2022:
+            days.add(_observed(date(year, 6, 19)))  # Juneteenth
+        return frozenset(days)
+    
+    def is_holiday(self, day):
+        day = pd.Timestamp(day).date()
+        return day in self.holidays(day.year) or day in self.extra_holidays
+    
+    def is_trading_day(self, day):
+        day = pd.Timestamp(day).date()
+        return day.weekday() < 5 and not self.is_holiday(day)
+    
+    def is_early_close(self, day):
+        """July 3rd, the day after Thanksgiving and Christmas Eve close at 13:00"""
+        day = pd.Timestamp(day).date()
+        if not self.is_trading_day(day):
+            return False
+        if (day.month, day.day) in ((7, 3), (12, 24)):
+            return True
+        return day == _nth_weekday(day.year, 11, 3, 4) + timedelta(days=1)
+    
+    def session(self, day):
+        """(open, close) tz-aware Timestamps of a trading day, or None"""
+        day = pd.Timestamp(day).date()
+        if not self.is_trading_day(day):
+            return None
+        close_time = self.early_close_time if self.is_early_close(day) else self.close_time
+        return (pd.Timestamp(datetime.combine(day, self.open_time), tz=self.tz),
+                pd.Timestamp(datetime.combine(day, close_time), tz=self.tz))
+    
+    def now(self):
+        return pd.Timestamp.now(tz=self.tz)
+    
+    def _local(self, ts):
+        ts = pd.Timestamp(ts)
+        return ts.tz_localize(self.tz) if ts.tzinfo is None else ts.tz_convert(self.tz)
+    
+    def is_open(self, ts=None):
+        """Whether the regular session is open at ts"""
+        ts = self._local(ts if ts is not None else self.now())
+        session = self.session(ts)
+        return session is not None and session[0] <= ts < session[1]
+    
+    def sessions(self, start, days=10):
+        """Upcoming (open, close) sessions starting on start's date"""
+        day = self._local(start).date()
+        found = []
+        while len(found) < days:
+            session = self.session(day)
+            if session is not None:
+                found.append(session)
+            day += timedelta(days=1)
+        return found
+    
+    def next_open(self, ts=None):
+        """First session open strictly after ts"""
+        ts = self._local(ts if ts is not None else self.now())
+        for open_ts, _ in self.sessions(ts, days=2):
+            if open_ts > ts:
+                return open_ts
+        return self.sessions(ts + pd.Timedelta(days=1), days=1)[0][0]
+    
+    def bar_closes(self, interval, session):
+        """Close times of the bars of one session for an interval"""
+        open_ts, close_ts = session
+        minutes = INTRADAY_MINUTES.get(interval)
+        if minutes is None:
+            return [close_ts]
+        closes = []
+        ts = open_ts + pd.Timedelta(minutes=minutes)
+        while ts < close_ts:
+            closes.append(ts)
+            ts += pd.Timedelta(minutes=minutes)
+        closes.append(close_ts)
+        return closes
+    
+    def _is_period_end(self, interval, close_ts):
+        """Whether a session close also ends a weekly / monthly bar"""
+        if interval in WEEKLY_INTERVALS or interval in MONTHLY_INTERVALS:
+            upcoming = self.sessions(close_ts + pd.Timedelta(days=1), days=1)[0][0]
+            if interval in WEEKLY_INTERVALS:
+                return upcoming.isocalendar()[:2] != close_ts.isocalendar()[:2]
+            if interval == '1mo':
+                return upcoming.month != close_ts.month
+            return (upcoming.month - 1) // 3 != (close_ts.month - 1) // 3 or upcoming.year != close_ts.year
+        return True
+    
+    def next_bar_close(self, interval, ts=None):
+        """First bar close of an interval strictly after ts"""
+        ts = self._local(ts if ts is not None else self.now())
+        for session in self.sessions(ts - pd.Timedelta(days=1), days=100):
+            for close in self.bar_closes(interval, session):
+                if close > ts and self._is_period_end(interval, close):
+                    return close
+        raise ValueError(f"No bar close found for interval {interval}")
+    
+    def last_bar_close(self, interval, ts=None):
+        """Most recent bar close of an interval at or before ts"""
+        ts = self._local(ts if ts is not None else self.now())
+        day = ts.date()
+        for _ in range(120):
+            session = self.session(day)
+            if session is not None:
+                for close in reversed(self.bar_closes(interval, session)):
+                    if close <= ts and self._is_period_end(interval, close):
+                        return close
+            day -= timedelta(days=1)
+        raise ValueError(f"No bar close found for interval {interval}")
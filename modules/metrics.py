@@ -0,0 +1,352 @@
+"""
+Metrics Module
+Prometheus-style counters, gauges and histograms for the scanner
+"""
+
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    inner = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+                     for k, v in pairs)
+    return '{' + inner + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Sharded:
+    """
+    Per-thread storage: every thread writes only to its own shard, so
+    updates need no lock; readers sum the shards at scrape time. Shards of
+    finished threads (pool threads of past scans) are folded into a single
+    retired total so they do not accumulate.
+    """
+    
+    def __init__(self, size):
+        self._size = size
+        self._shards = []
+        self._retired = [0.0] * size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+    
+    def shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = [0.0] * self._size
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+            self._local.shard = shard
+            return shard
+    
+    def totals(self):
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    for i, value in enumerate(shard):
+                        self._retired[i] += value
+            self._shards = live
+            totals = list(self._retired)
+        for _, shard in live:
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+class _Metric:
+    """Base of a metric family; labels(...) returns the child for a label set"""
+    
+    kind = 'untyped'
+    
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+    
+    def labels(self, *values, **kwargs):
+        key = values or tuple(str(kwargs[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+    
+    def _default(self):
+        return self._children[()]
+    
+    def _new_child(self):
+        raise NotImplementedError
+    
+    def samples(self):
+        """(suffix, label string, value) tuples for the exposition format"""
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ('_data',)
+    
+    def __init__(self):
+        self._data = _Sharded(1)
+    
+    def inc(self, amount=1.0):
+        self._data.shard()[0] += amount
+    
+    @property
+    def value(self):
+        return self._data.totals()[0]
+
+
+class Counter(_Metric):
+    """Monotonic counter"""
+    
+    kind = 'counter'
+    
+    def _new_child(self):
+        return _CounterChild()
+    
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+    
+    def samples(self):
+        for values, child in list(self._children.items()):
+            yield '_total', _format_labels(self.labelnames, values), child.value
+
+
+class _GaugeChild:
+    __slots__ = ('_data', '_value', '_function')
+    
+    def __init__(self):
+        self._data = _Sharded(1)
+        self._value = 0.0
+        self._function = None
+    
+    def set(self, value):
+        """Single-writer gauges (last scan rate, ...)"""
+        self._value = float(value)
+    
+    def inc(self, amount=1.0):
+        """Multi-writer gauges (busy workers, queue depth) - sharded like counters"""
+        self._data.shard()[0] += amount
+    
+    def dec(self, amount=1.0):
+        self._data.shard()[0] -= amount
+    
+    def set_function(self, function):
+        """Compute the value at scrape time instead"""
+        self._function = function
+    
+    @property
+    def value(self):
+        if self._function is not None:
+            return float(self._function())
+        return self._value + self._data.totals()[0]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    
+    kind = 'gauge'
+    
+    def _new_child(self):
+        return _GaugeChild()
+    
+    def set(self, value):
+        self._default().set(value)
+    
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+    
+    def dec(self, amount=1.0):
+        self._default().dec(amount)
+    
+    def set_function(self, function):
+        self._default().set_function(function)
+    
+    def samples(self):
+        for values, child in list(self._children.items()):
+            yield '', _format_labels(self.labelnames, values), child.value
+
+
+class _HistogramChild:
+    __slots__ = ('_buckets', '_data')
+    
+    def __init__(self, buckets):
+        self._buckets = buckets
+        # one count per bucket plus the +Inf overflow, then sum, then count
+        self._data = _Sharded(len(buckets) + 3)
+    
+    def observe(self, value):
+        shard = self._data.shard()
+        shard[bisect.bisect_left(self._buckets, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+    
+    def totals(self):
+        return self._data.totals()
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram (le buckets, _sum, _count)"""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+    
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+    
+    def observe(self, value):
+        self._default().observe(value)
+    
+    def samples(self):
+        for values, child in list(self._children.items()):
+            totals = child.totals()
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float('inf'),), totals[:-2]):
+                cumulative += count
+                yield '_bucket', _format_labels(self.labelnames, values,
+                                                [('le', _format_value(bound))]), cumulative
+            yield '_sum', _format_labels(self.labelnames, values), totals[-2]
+            yield '_count', _format_labels(self.labelnames, values), totals[-1]
+
+
+class MetricsRegistry:
+    """Named metric families rendered in the Prometheus text format"""
+    
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self.textfile_path = None
+    
+    def _register(self, cls, name, documentation, labelnames=(), **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            return metric
+    
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+    
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+    
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+    
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            full_name = metric.name + ('_total' if metric.kind == 'counter' else '')
+            lines.append(f"# HELP {full_name} {metric.documentation}")
+            lines.append(f"# TYPE {full_name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{labels} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+    
+    def write_textfile(self, path=None):
+        """Atomically write the metrics for node_exporter's textfile collector"""
+        path = path or self.textfile_path
+        if not path:
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.render())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing metrics textfile: {e}")
+    
+    def serve(self, port, address='127.0.0.1'):
+        """Serve /metrics on a daemon thread (no-op if already serving)"""
+        if self._server is not None:
+            return self._server
+        registry = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        server = ThreadingHTTPServer((address, int(port)), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        self._server = server
+        return server
+    
+    def start_from_env(self):
+        """Honour SCANNER_METRICS_PORT / SCANNER_METRICS_TEXTFILE (used by the Streamlit app)"""
+        port = os.environ.get('SCANNER_METRICS_PORT')
+        if port:
+            try:
+                self.serve(int(port), os.environ.get('SCANNER_METRICS_ADDRESS', '127.0.0.1'))
+            except (OSError, ValueError) as e:
+                print(f"Error starting metrics endpoint on port {port}: {e}")
+        textfile = os.environ.get('SCANNER_METRICS_TEXTFILE')
+        if textfile:
+            self.textfile_path = textfile
+
+
+REGISTRY = MetricsRegistry()
+
+FETCHES = REGISTRY.counter(
+    'scanner_fetch', 'Market data fetches by interval and outcome (ok/empty/error/throttled)',
+    ['interval', 'outcome'])
+FETCH_SECONDS = REGISTRY.histogram(
+    'scanner_fetch_seconds', 'Market data fetch latency', ['interval'])
+SYMBOLS = REGISTRY.counter(
+    'scanner_symbols', 'Scanned symbols by outcome (ok/cached/empty/error)', ['outcome'])
+SYMBOL_SECONDS = REGISTRY.histogram(
+    'scanner_symbol_seconds', 'Wall time to scan one symbol (all timeframes)')
+CACHE_LOOKUPS = REGISTRY.counter(
+    'scanner_cache_lookups', 'Cache lookups by cache (data/result) and result (hit/miss)',
+    ['cache', 'result'])
+WORKERS_BUSY = REGISTRY.gauge(
+    'scanner_workers_busy', 'Scan threads currently scanning a symbol')
+WORKER_SLOTS = REGISTRY.gauge(
+    'scanner_worker_slots', 'Scan threads available across running scans')
+QUEUE_DEPTH = REGISTRY.gauge(
+    'scanner_queue_depth', 'Symbols waiting to be scanned across running scans')
+SCAN_RATE = REGISTRY.gauge(
+    'scanner_last_scan_symbols_per_second', 'Throughput of the most recently finished scan')
+JOBS = REGISTRY.gauge(
+    'scanner_jobs', 'Background scan jobs by status', ['status'])
@@ -0,0 +1,419 @@
+"""
+Panel Indicators Module
+Indicators for many symbols at once on time x symbol arrays
+"""
+
+import numpy as np
+import pandas as pd
+
+from modules.indicators import IndicatorLibrary
+
+
+PRICE_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# Shorter frames take the per-symbol path (several ta indicators raise on them)
+MIN_PANEL_BARS = 40
+
+
+def _colsum(block):
+    """Column sums with the same summation order as a 1-D Series.sum()"""
+    return np.ascontiguousarray(block.T).sum(axis=1)
+
+
+def _frame(block):
+    return pd.DataFrame(block, copy=False)
+
+
+def _shift(block, periods=1):
+    """Series.shift on every column (NaN fill)"""
+    out = np.empty_like(block)
+    out[:periods] = np.nan
+    out[periods:] = block[:-periods]
+    return out
+
+
+def _ema(block, span):
+    """ta _ema: span EWM, adjust=False, NaN until `span` bars"""
+    return _frame(block).ewm(span=span, min_periods=span, adjust=False).mean().to_numpy()
+
+
+def _rolling_mean(block, window, min_periods):
+    return _frame(block).rolling(window, min_periods=min_periods).mean().to_numpy()
+
+
+def _true_range(high, low, close):
+    """ta true range: max of H-L, |H-prevC|, |L-prevC| (H-L on the first bar)"""
+    prev_close = _shift(close)
+    tr = np.fmax(high - low, np.abs(high - prev_close))
+    return np.fmax(tr, np.abs(low - prev_close))
+
+
+class PanelIndicatorLibrary:
+    """
+    IndicatorLibrary formulas on 2-D (bars x symbols) float arrays whose
+    columns are complete series without gaps. Each function returns the
+    same values as its IndicatorLibrary counterpart column by column;
+    recursive indicators loop over bars with all symbols in one vector.
+    """
+    
+    @staticmethod
+    def calculate_sma(close, period=20):
+        return _rolling_mean(close, period, 1)
+    
+    @staticmethod
+    def calculate_ema(close, period=20):
+        return _ema(close, period)
+    
+    @staticmethod
+    def calculate_rsi(close, period=14):
+        diff = close - _shift(close)
+        with np.errstate(invalid='ignore'):
+            up = np.where(diff > 0, diff, 0.0)
+            down = -np.where(diff < 0, diff, 0.0)
+        ewm = dict(alpha=1 / period, min_periods=period, adjust=False)
+        emaup = _frame(up).ewm(**ewm).mean().to_numpy()
+        emadn = _frame(down).ewm(**ewm).mean().to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(emadn == 0, 100, 100 - (100 / (1 + emaup / emadn)))
+    
+    @staticmethod
+    def calculate_macd(close, fast=12, slow=26, signal=9):
+        macd = _ema(close, fast) - _ema(close, slow)
+        macd_signal = _ema(macd, signal)
+        return {'macd': macd, 'signal': macd_signal, 'histogram': macd - macd_signal}
+    
+    @staticmethod
+    def calculate_bollinger_bands(close, period=20, std_dev=2):
+        rolling = _frame(close).rolling(period, min_periods=period)
+        middle = rolling.mean().to_numpy()
+        std = rolling.std(ddof=0).to_numpy()
+        return {'upper': middle + std_dev * std, 'middle': middle, 'lower': middle - std_dev * std}
+    
+    @staticmethod
+    def calculate_atr(high, low, close, period=14):
+        """ta AverageTrueRange: 0.0 before the first full window, then Wilder smoothing"""
+        tr = _true_range(high, low, close)
+        atr = np.zeros_like(tr)
+        atr[period - 1] = _colsum(tr[:period]) / period
+        for i in range(period, len(atr)):
+            atr[i] = (atr[i - 1] * (period - 1) + tr[i]) / float(period)
+        return atr
+    
+    @staticmethod
+    def calculate_stochastic(high, low, close, period=14, smooth_k=3):
+        smin = _frame(low).rolling(period, min_periods=period).min().to_numpy()
+        smax = _frame(high).rolling(period, min_periods=period).max().to_numpy()
+        k = 100 * (close - smin) / (smax - smin)
+        return {'k': k, 'd': _rolling_mean(k, smooth_k, smooth_k)}
+    
+    @staticmethod
+    def calculate_obv(close, volume):
+        return np.cumsum(np.where(close < _shift(close), -volume, volume), axis=0)
+    
+    @staticmethod
+    def calculate_adx(high, low, close, period=14):
+        """ta ADXIndicator, including its warm-up zeros and last-bar quirks"""
+        n = len(close)
+        w = period
+        length = n - (w - 1)
+        prev_close = _shift(close)
+        # np.amax / np.amin propagate the NaN of the first bar, which ta then drops
+        directional = np.maximum(high, prev_close) - np.minimum(low, prev_close)
+        diff_up = high - _shift(high)
+        diff_down = _shift(low) - low
+        with np.errstate(invalid='ignore'):
+            pos = np.abs(((diff_up > diff_down) & (diff_up > 0)) * diff_up)
+            neg = np.abs(((diff_down > diff_up) & (diff_down > 0)) * diff_down)
+        
+        def smoothed(values):
+            out = np.zeros((length,) + values.shape[1:])
+            out[0] = _colsum(values[1:w + 1])
+            for i in range(1, length - 1):
+                out[i] = out[i - 1] - (out[i - 1] / float(w)) + values[w + i]
+            return out
+        
+        trs = smoothed(directional)
+        dip = smoothed(pos)
+        din = smoothed(neg)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            di_plus = np.where(trs != 0, 100 * (dip / trs), 0.0)
+            di_minus = np.where(trs != 0, 100 * (din / trs), 0.0)
+            di_sum = di_plus + di_minus
+            dx = np.where(di_sum != 0, 100 * np.abs((di_plus - di_minus) / di_sum), 0.0)
+        
+        adx = np.zeros((length,) + close.shape[1:])
+        adx[w] = np.ascontiguousarray(dx[:w].T).mean(axis=1)
+        for i in range(w + 1, length):
+            adx[i] = ((adx[i - 1] * (w - 1)) + dx[i - 1]) / float(w)
+        adx = np.concatenate((np.zeros((w - 1,) + close.shape[1:]), adx), axis=0)
+        
+        # +DI / -DI are reported shifted by one bar and without the seed / last bar
+        plus = np.zeros_like(close)
+        minus = np.zeros_like(close)
+        plus[w + 1:w + length - 1] = di_plus[1:length - 1]
+        minus[w + 1:w + length - 1] = di_minus[1:length - 1]
+        return {'adx': adx, 'di_plus': plus, 'di_minus': minus}
+    
+    @staticmethod
+    def yoda_indicator(high, low, close, fa=12, sa=26, sig=9, sma_length=50,
+                       length_squeeze=20, bb_mult=2.0, kc_mult=1.5):
+        """Columns added by IndicatorLibrary.yoda_indicator, in the same order"""
+        lib = PanelIndicatorLibrary
+        macd = _ema(close, fa) - _ema(close, sa)
+        signal = _rolling_mean(macd, sig, 1)
+        with np.errstate(invalid='ignore'):
+            macd_up = macd > _shift(macd)
+            signal_up = signal > _shift(signal)
+        
+        sma = _rolling_mean(close, sma_length, 1)
+        prev_close, prev_sma = _shift(close), _shift(sma)
+        with np.errstate(invalid='ignore'):
+            cross_up = (prev_close < prev_sma) & (close > sma)
+            cross_down = (prev_close > prev_sma) & (close < sma)
+        
+        is_green = macd_up & signal_up
+        is_red = ~macd_up & ~signal_up
+        was_green = np.zeros_like(is_green)
+        was_red = np.zeros_like(is_red)
+        was_green[1:] = is_green[:-1]
+        was_red[1:] = is_red[:-1]
+        buy_macd = ~was_green & is_green
+        sell_macd = ~was_red & is_red
+        
+        bb = lib.calculate_bollinger_bands(close, length_squeeze, bb_mult)
+        atr = lib.calculate_atr(high, low, close, length_squeeze)
+        kc_upper = bb['middle'] + atr * kc_mult
+        kc_lower = bb['middle'] - atr * kc_mult
+        with np.errstate(invalid='ignore'):
+            in_squeeze = (bb['lower'] >= kc_lower) & (bb['upper'] <= kc_upper)
+        was_squeeze = np.zeros_like(in_squeeze)
+        was_squeeze[1:] = in_squeeze[:-1]
+        
+        return {
+            'MACD': macd,
+            'Signal': signal,
+            'MACD_Up': macd_up,
+            'Signal_Up': signal_up,
+            'SMA': sma,
+            'CrossUp': cross_up,
+            'CrossDown': cross_down,
+            'Buy_MACD': buy_macd,
+            'Sell_MACD': sell_macd,
+            'TTM_Fired': ~in_squeeze & was_squeeze,
+            'Buy_Signal': buy_macd | cross_up,
+            'Sell_Signal': sell_macd | cross_down,
+        }
+    
+    @staticmethod
+    def calculate_vwap(close, volume):
+        return np.cumsum(close * volume, axis=0) / np.cumsum(volume, axis=0)
+    
+    @staticmethod
+    def calculate_avg_volume(volume, period=20):
+        return _rolling_mean(volume, period, period)
+    
+    @staticmethod
+    def calculate_median_volume(volume, period=20):
+        return _frame(volume).rolling(period, min_periods=period).median().to_numpy()
+    
+    @staticmethod
+    def calculate_rvol(volume, period=20):
+        average = _shift(_rolling_mean(volume, period, period))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(average > 0, volume / average, np.nan)
+    
+    @staticmethod
+    def calculate_dollar_volume(close, volume, period=20):
+        return _rolling_mean(close * volume, period, period)
+
+
+def indicator_columns(indicator, o, h, l, c, v):
+    """
+    (column, values) pairs ScannerEngine.calculate_indicators adds for one
+    indicator, computed on dense blocks; v is None when there is no volume
+    """
+    lib = PanelIndicatorLibrary
+    if indicator == 'Yoda':
+        return list(lib.yoda_indicator(h, l, c).items())
+    if indicator == 'RSI':
+        return [('RSI', lib.calculate_rsi(c))]
+    if indicator == 'MACD':
+        macd = lib.calculate_macd(c)
+        return [('MACD', macd['macd']), ('MACD_Signal', macd['signal']), ('MACD_Hist', macd['histogram'])]
+    if indicator == 'BB':
+        bb = lib.calculate_bollinger_bands(c)
+        return [('BB_Upper', bb['upper']), ('BB_Middle', bb['middle']), ('BB_Lower', bb['lower'])]
+    if indicator == 'ATR':
+        return [('ATR', lib.calculate_atr(h, l, c))]
+    if indicator == 'ADX':
+        adx = lib.calculate_adx(h, l, c)
+        return [('ADX', adx['adx']), ('DI_Plus', adx['di_plus']), ('DI_Minus', adx['di_minus'])]
+    if indicator == 'Stochastic':
+        stoch = lib.calculate_stochastic(h, l, c)
+        return [('Stoch_K', stoch['k']), ('Stoch_D', stoch['d'])]
+    if indicator == 'OBV':
+        return [('OBV', np.zeros_like(c, dtype=np.int64) if v is None else lib.calculate_obv(c, v))]
+    if indicator == 'VWAP':
+        return [('VWAP', c.copy() if v is None else lib.calculate_vwap(c, v))]
+    if indicator in ('AVG_Volume', 'Median_Volume', 'RVOL', 'Dollar_Volume'):
+        if v is None:
+            return [(indicator, np.full(c.shape, np.nan))]
+        if indicator == 'AVG_Volume':
+            return [('AVG_Volume', lib.calculate_avg_volume(v))]
+        if indicator == 'Median_Volume':
+            return [('Median_Volume', lib.calculate_median_volume(v))]
+        if indicator == 'RVOL':
+            return [('RVOL', lib.calculate_rvol(v))]
+        return [('Dollar_Volume', lib.calculate_dollar_volume(c, v))]
+    if indicator in ('EMA_5', 'EMA_20', 'EMA_50'):
+        return [(indicator, lib.calculate_ema(c, int(indicator.split('_')[1])))]
+    if indicator == 'SMA_200':
+        return [('SMA_200', lib.calculate_sma(c, 200))]
+    return []
+
+
+class PricePanel:
+    """
+    OHLCV of many symbols stacked into (time x symbol) arrays over the
+    union of their timestamps, with a `present` mask marking which bars
+    each symbol actually has. compute() runs each indicator once per
+    group of symbols sharing the same bars (usually one group for a daily
+    universe), and frame(symbol) returns that symbol's rows with the
+    indicator columns, equal to ScannerEngine.calculate_indicators on its
+    own frame (OBV is float even for integer volumes). Symbols with gaps in their prices, unsorted timestamps or
+    fewer than MIN_PANEL_BARS bars are left to the per-symbol path.
+    """
+    
+    def __init__(self, index, symbols, data, present, frames, has_volume, eligible):
+        self.index = index
+        self.symbols = list(symbols)
+        self.data = data
+        self.present = present
+        self.has_volume = has_volume
+        self.eligible = eligible
+        self.columns = {}
+        self.computed = np.zeros(len(self.symbols), dtype=bool)
+        self._frames = frames
+        self._positions = {symbol: j for j, symbol in enumerate(self.symbols)}
+    
+    @classmethod
+    def from_frames(cls, frames):
+        """Panel from {symbol: OHLCV DataFrame}; None / empty frames are skipped"""
+        frames = {s: df for s, df in frames.items() if df is not None and len(df) > 0}
+        symbols = list(frames)
+        prepared = []
+        for symbol in symbols:
+            df = frames[symbol]
+            dtypes = df.dtypes
+            if not all(pd.api.types.is_numeric_dtype(dtypes[c]) for c in PRICE_FIELDS[:4] if c in dtypes):
+                df = IndicatorLibrary.normalize_ohlc(df)
+                dtypes = df.dtypes
+            columns = df.columns.tolist()
+            floats = {c for c, dtype in zip(columns, dtypes.to_numpy()) if dtype == np.float64}
+            # One conversion for the usual all-float frame, else column by column
+            values = df.to_numpy() if len(floats) == len(columns) else None
+            ok = (isinstance(df.index, pd.DatetimeIndex) and df.index.is_monotonic_increasing
+                  and df.index.is_unique and all(c in columns for c in PRICE_FIELDS[:4]))
+            prepared.append((df, columns, values, floats, ok))
+        
+        stamps = [p[0].index.values for p in prepared if p[-1]]
+        index = pd.DatetimeIndex(np.unique(np.concatenate(stamps))) if stamps else pd.DatetimeIndex([])
+        data = {field: np.full((len(index), len(symbols)), np.nan) for field in PRICE_FIELDS}
+        present = np.zeros((len(index), len(symbols)), dtype=bool)
+        has_volume = np.zeros(len(symbols), dtype=bool)
+        eligible = np.zeros(len(symbols), dtype=bool)
+        kept = {}
+        
+        for j, (symbol, (df, columns, values, floats, ok)) in enumerate(zip(symbols, prepared)):
+            if not ok:
+                continue
+            rows = np.searchsorted(index.values, df.index.values)
+            present[rows, j] = True
+            has_volume[j] = 'Volume' in columns
+            clean = len(df) >= MIN_PANEL_BARS
+            for field in PRICE_FIELDS:
+                if field not in columns:
+                    continue
+                if values is not None:
+                    column = values[:, columns.index(field)]
+                else:
+                    column = df[field].to_numpy(dtype=float, na_value=np.nan)
+                data[field][rows, j] = column
+                clean = clean and not np.isnan(column).any()
+            eligible[j] = clean
+            # Columns served from the float arrays when the frame is rebuilt
+            kept[symbol] = (df, [(c, c in data and c in floats) for c in columns])
+        return cls(index, symbols, data, present, kept, has_volume, eligible)
+    
+    def field(self, name):
+        """One price field as a (time x symbol) DataFrame, NaN where a symbol has no bar"""
+        return pd.DataFrame(self.data[name], index=self.index, columns=self.symbols)
+    
+    def groups(self):
+        """(rows, columns) of eligible symbols that share exactly the same bars and volume"""
+        groups = {}
+        packed = np.packbits(self.present, axis=0)
+        for j in np.flatnonzero(self.eligible):
+            key = (packed[:, j].tobytes(), bool(self.has_volume[j]))
+            groups.setdefault(key, []).append(j)
+        for cols in groups.values():
+            cols = np.asarray(cols)
+            yield np.flatnonzero(self.present[:, cols[0]]), cols
+    
+    def compute(self, indicator_list):
+        """Calculate the indicators for every eligible symbol; returns self"""
+        for rows, cols in self.groups():
+            o, h, l, c, v = (self.data[f][np.ix_(rows, cols)] for f in PRICE_FIELDS)
+            if not self.has_volume[cols[0]]:
+                v = None
+            for indicator in indicator_list:
+                for name, values in indicator_columns(indicator, o, h, l, c, v):
+                    target = self.columns.get(name)
+                    if target is None:
+                        if values.dtype == bool:
+                            target = np.zeros(self.present.shape, dtype=bool)
+                        else:
+                            target = np.full(self.present.shape, np.nan)
+                        self.columns[name] = target
+                    elif target.dtype != values.dtype:
+                        target = self.columns[name] = target.astype(float)
+                    target[np.ix_(rows, cols)] = values
+            self.computed[cols] = True
+        return self
+    
+    def frame(self, symbol):
+        """The symbol's bars with indicator columns, or None if it was not computed"""
+        j = self._positions.get(symbol)
+        if j is None or not self.computed[j]:
+            return None
+        rows = self.present[:, j]
+        df, layout = self._frames[symbol]
+        out = {}
+        for column, from_panel in layout:
+            out[column] = self.data[column][rows, j] if from_panel else df[column].to_numpy()
+        for name, values in self.columns.items():
+            out[name] = values[rows, j]
+        return pd.DataFrame(out, index=df.index, copy=False)
+    
+    def closes(self, symbol):
+        """The symbol's closes over its own bars"""
+        j = self._positions[symbol]
+        return self.data['Close'][self.present[:, j], j]
+    
+    def last_row(self, symbol):
+        """
+        The symbol's latest bar with indicator columns as a Series (like
+        frame(symbol).iloc[-1] without building the frame), or None
+        """
+        j = self._positions.get(symbol)
+        if j is None or not self.computed[j]:
+            return None
+        df, layout = self._frames[symbol]
+        row = len(self.index) - 1 - int(np.argmax(self.present[::-1, j]))
+        out = {}
+        for column, from_panel in layout:
+            out[column] = self.data[column][row, j] if from_panel else df[column].iat[-1]
+        for name, values in self.columns.items():
+            out[name] = values[row, j]
+        return pd.Series(out, name=df.index[-1])
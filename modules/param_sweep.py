@@ -0,0 +1,382 @@
+"""
+Parameter Sweep Module
+Grid / random search of indicator and pattern parameters ranked by backtest metrics
+"""
+
+import itertools
+import math
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from modules.backtest import (CONFIRMATION_LAGS, DEFAULT_HORIZONS, SHORT_SIGNALS, forward_extremes,
+                              forward_returns, signal_statistics)
+from modules.panel_indicators import PanelIndicatorLibrary, PricePanel, _ema, _shift
+from modules.scanner_engine import ScannerEngine
+
+
+# Parameters a sweep can vary (defaults are the scanner's fixed settings)
+DEFAULT_PARAMS = {
+    'fa': 12,
+    'sa': 26,
+    'sig': 9,
+    'sma_length': 50,
+    'length_squeeze': 20,
+    'bb_mult': 2.0,
+    'kc_mult': 1.5,
+    'rsi_period': 14,
+    'rsi_level': 50,
+    'lookback': 50,
+    'tolerance': 0.02,
+}
+
+# Signals that can be swept; a tuple of names means all of them on the same bar
+SWEEP_SIGNALS = ('Buy_Signal', 'Sell_Signal', 'TTM_Fired', 'Double_Bottom', 'Double_Top', 'RSI_Cross_Up')
+
+
+def grid(space):
+    """Every combination of {param: [values]}, in a stable order"""
+    ranges = [name for name, values in space.items() if isinstance(values, tuple)]
+    if ranges:
+        raise ValueError(f"Ranges need random search: {', '.join(ranges)}")
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_search(space, n, seed=0):
+    """
+    n distinct parameter sets drawn from {param: [values] or (low, high)};
+    integer ranges draw integers, float ranges draw uniformly
+    """
+    rng = np.random.default_rng(seed)
+    names = sorted(space)
+    seen = set()
+    sets = []
+    for _ in range(n * 20):
+        if len(sets) >= n:
+            break
+        params = {}
+        for name in names:
+            choice = space[name]
+            if isinstance(choice, tuple):
+                low, high = choice
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = int(rng.integers(low, high + 1))
+                else:
+                    params[name] = round(float(rng.uniform(low, high)), 4)
+            else:
+                params[name] = choice[rng.integers(len(choice))]
+        key = tuple(params[name] for name in names)
+        if key not in seen:
+            seen.add(key)
+            sets.append(params)
+    return sets
+
+
+def parse_space(spec):
+    """Space from JSON: lists stay choices, {"min": a, "max": b} becomes a (low, high) range"""
+    return {name: (values['min'], values['max']) if isinstance(values, dict) else list(values)
+            for name, values in spec.items()}
+
+
+class SharedIndicators:
+    """
+    Indicator pieces for one (bars x symbols) block, memoized by their own
+    parameters so parameter sets reuse them: one EMA per span, one MACD per
+    (fa, sa), one ATR / Bollinger std per length, one set of swing points,
+    and rolling means of any length from a single cumulative sum per series.
+    Per-set outputs (signals) are recomputed from these, and the memo keeps
+    the `max_entries` most recently used pieces, so memory does not grow
+    with the number of parameter sets. Values match IndicatorLibrary up to
+    float rounding of the cumulative sums.
+    """
+    
+    def __init__(self, high, low, close, max_entries=64):
+        self.high = high
+        self.low = low
+        self.close = close
+        self.max_entries = max_entries
+        self._memo = OrderedDict()
+    
+    def _cached(self, key, compute):
+        value = self._memo.get(key)
+        if value is None:
+            value = self._memo[key] = compute()
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        else:
+            self._memo.move_to_end(key)
+        return value
+    
+    def _cumulative(self, key, values):
+        """Cumulative sums and counts of the finite values, with a leading zero row"""
+        def compute():
+            finite = np.isfinite(values)
+            zero = np.zeros((1,) + values.shape[1:])
+            return (np.concatenate([zero, np.cumsum(np.where(finite, values, 0.0), axis=0)]),
+                    np.concatenate([zero, np.cumsum(finite, axis=0)]))
+        return self._cached(('cumsum', key), compute)
+    
+    def rolling_mean(self, key, values, window):
+        """rolling(window, min_periods=1).mean() of the series memoized as `key`"""
+        def compute():
+            sums, counts = self._cumulative(key, values)
+            end = np.arange(1, len(values) + 1)
+            start = np.maximum(end - window, 0)
+            count = counts[end] - counts[start]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.where(count > 0, (sums[end] - sums[start]) / count, np.nan)
+        return self._cached(('mean', key, window), compute)
+    
+    def ema(self, span):
+        return self._cached(('ema', span), lambda: _ema(self.close, span))
+    
+    def macd(self, fa, sa):
+        return self._cached(('macd', fa, sa), lambda: self.ema(fa) - self.ema(sa))
+    
+    def rising(self, key, values):
+        """values > previous value (False on NaN)"""
+        def compute():
+            with np.errstate(invalid='ignore'):
+                return values > _shift(values)
+        return self._cached(('rising', key), compute)
+    
+    def atr(self, period):
+        return self._cached(('atr', period),
+                            lambda: PanelIndicatorLibrary.calculate_atr(self.high, self.low, self.close, period))
+    
+    def rolling_std(self, period):
+        return self._cached(('std', period),
+                            lambda: pd.DataFrame(self.close).rolling(period, min_periods=period).std(ddof=0).to_numpy())
+    
+    def rsi(self, period):
+        return self._cached(('rsi', period), lambda: PanelIndicatorLibrary.calculate_rsi(self.close, period))
+    
+    def swings(self, kind):
+        """Swing lows ('min') / highs ('max') as in ChartPatterns, plus each bar's last two of them"""
+        def compute():
+            s = self.close
+            if kind == 'min':
+                points = (np.roll(s, 1, axis=0) > s) & (np.roll(s, -1, axis=0) > s)
+            else:
+                points = (np.roll(s, 1, axis=0) < s) & (np.roll(s, -1, axis=0) < s)
+            points[0] = points[-1] = False
+            rows = np.arange(len(s))[:, None]
+            last = np.maximum.accumulate(np.where(points, rows, -1), axis=0)
+            before = np.full_like(last, -1)
+            before[1:] = last[:-1]
+            cols = np.arange(s.shape[1])[None, :]
+            previous = np.where(last >= 0, np.where(points, before, -1)[np.maximum(last, 0), cols], -1)
+            return last, previous
+        return self._cached(('swings', kind), compute)
+    
+    def double_pattern(self, kind, lookback, tolerance):
+        """detect_double_bottom ('min') / detect_double_top ('max') on every bar"""
+        def compute():
+            last, previous = self.swings(kind)
+            if len(self.close) < 5:
+                return np.zeros(self.close.shape, dtype=bool)
+            cols = np.arange(self.close.shape[1])[None, :]
+            v1 = self.close[np.maximum(previous, 0), cols]
+            v2 = self.close[np.maximum(last, 0), cols]
+            start = np.maximum(np.arange(len(self.close)) - lookback, 0)[:, None]
+            with np.errstate(invalid='ignore'):
+                close_enough = np.abs(v1 - v2) / ((v1 + v2) / 2 + 1e-9) <= tolerance
+            return (previous >= start) & close_enough
+        return compute()
+    
+    def yoda(self, p):
+        """Buy_Signal / Sell_Signal of yoda_indicator for parameter set p"""
+        fa, sa, sig = p['fa'], p['sa'], p['sig']
+        
+        def macd_edges():
+            macd = self.macd(fa, sa)
+            signal = self.rolling_mean(('macd', fa, sa), macd, sig)
+            macd_up = self.rising(('macd', fa, sa), macd)
+            signal_up = self.rising(('signal', fa, sa, sig), signal)
+            is_green = macd_up & signal_up
+            is_red = ~macd_up & ~signal_up
+            return is_green & ~_shift_bool(is_green), is_red & ~_shift_bool(is_red)
+        
+        def crosses():
+            sma = self.rolling_mean('close', self.close, p['sma_length'])
+            prev_close, prev_sma = _shift(self.close), _shift(sma)
+            with np.errstate(invalid='ignore'):
+                return ((prev_close < prev_sma) & (self.close > sma),
+                        (prev_close > prev_sma) & (self.close < sma))
+        
+        buy_macd, sell_macd = macd_edges()
+        cross_up, cross_down = crosses()
+        return {
+            'Buy_Signal': buy_macd | cross_up,
+            'Sell_Signal': sell_macd | cross_down,
+        }
+    
+    def ttm_fired(self, p):
+        """yoda_indicator's TTM_Fired for parameter set p"""
+        length = p['length_squeeze']
+        middle = self.rolling_mean('close', self.close, length)
+        middle = np.where(np.arange(len(middle))[:, None] >= length - 1, middle, np.nan)
+        band = self.rolling_std(length) * p['bb_mult']
+        channel = self.atr(length) * p['kc_mult']
+        with np.errstate(invalid='ignore'):
+            in_squeeze = (middle - band >= middle - channel) & (middle + band <= middle + channel)
+        return ~in_squeeze & _shift_bool(in_squeeze)
+    
+    def signal(self, name, p):
+        """Boolean (bars x symbols) array of one sweepable signal"""
+        if name in ('Buy_Signal', 'Sell_Signal'):
+            return self.yoda(p)[name]
+        if name == 'TTM_Fired':
+            return self.ttm_fired(p)
+        # Lagged like Backtester.load: the detector reads the bar after each swing
+        if name == 'Double_Bottom':
+            return _lag_bool(self.double_pattern('min', p['lookback'], p['tolerance']), CONFIRMATION_LAGS[name])
+        if name == 'Double_Top':
+            return _lag_bool(self.double_pattern('max', p['lookback'], p['tolerance']), CONFIRMATION_LAGS[name])
+        if name == 'RSI_Cross_Up':
+            rsi = self.rsi(p['rsi_period'])
+            with np.errstate(invalid='ignore'):
+                return (rsi > p['rsi_level']) & (_shift(rsi) <= p['rsi_level'])
+        raise ValueError(f"Unknown sweep signal {name} (one of {', '.join(SWEEP_SIGNALS)})")
+
+
+def _shift_bool(values):
+    out = np.zeros_like(values)
+    out[1:] = values[:-1]
+    return out
+
+
+def _lag_bool(values, lag):
+    out = np.zeros_like(values)
+    out[lag:] = values[:len(values) - lag]
+    return out
+
+
+class _SweepState:
+    """Blocks of a universe with their forward returns stacked once for every parameter set"""
+    
+    def __init__(self, blocks, horizons, hold):
+        self.indicators = [SharedIndicators(h, l, c) for _, h, l, c in blocks]
+        closes, highs, lows, groups, times = [], [], [], [], []
+        offset = 0
+        for times_block, h, l, c in blocks:
+            # Symbol-major stacking: column j's bars are contiguous
+            closes.append(c.ravel(order='F'))
+            highs.append(h.ravel(order='F'))
+            lows.append(l.ravel(order='F'))
+            groups.append(np.repeat(np.arange(c.shape[1]) + offset, c.shape[0]))
+            times.append(np.tile(times_block, c.shape[1]))
+            offset += c.shape[1]
+        close = np.concatenate(closes)
+        group = np.concatenate(groups)
+        self.times = np.concatenate(times)
+        self.returns = {h: forward_returns(close, group, h) for h in horizons}
+        self.exit_return = self.returns[hold] if hold in self.returns else forward_returns(close, group, hold)
+        self.lowest, self.highest = forward_extremes(close, np.concatenate(highs), np.concatenate(lows),
+                                                     group, hold)
+    
+    def evaluate(self, params, signal):
+        names = (signal,) if isinstance(signal, str) else tuple(signal)
+        p = dict(DEFAULT_PARAMS, **params)
+        masks = []
+        for shared in self.indicators:
+            fired = np.logical_and.reduce([shared.signal(name, p) for name in names])
+            # Entries on rising edges, as in Backtester.evaluate
+            masks.append((fired & ~_shift_bool(fired)).ravel(order='F'))
+        bars = np.flatnonzero(np.concatenate(masks))
+        direction = -1.0 if names[0] in SHORT_SIGNALS else 1.0
+        row = dict(params)
+        row.update(signal_statistics(bars, direction, self.returns, self.exit_return,
+                                     self.lowest, self.highest, self.times))
+        return row
+
+
+_WORKER_STATE = None
+
+
+def _init_worker(blocks, horizons, hold):
+    global _WORKER_STATE
+    _WORKER_STATE = _SweepState(blocks, horizons, hold)
+
+
+def _evaluate_chunk(param_sets, signal):
+    return [_WORKER_STATE.evaluate(params, signal) for params in param_sets]
+
+
+class ParameterSweep:
+    """
+    Backtests one signal under many parameter sets over a universe's cached
+    history and ranks them. Symbols sharing the same bars are stacked into
+    (bars x symbols) blocks, intermediates are shared between parameter sets
+    through SharedIndicators, and with max_workers > 1 contiguous chunks of
+    the (sorted) parameter sets run in a process pool whose workers each
+    build the blocks once.
+    """
+    
+    def __init__(self, engine=None, signal='Buy_Signal', metric='Mean_10', higher_is_better=True,
+                 horizons=DEFAULT_HORIZONS, hold=None, min_trades=20, period='2y', interval='1d',
+                 max_workers=1):
+        self.engine = engine or ScannerEngine()
+        self.signal = signal
+        self.metric = metric
+        self.higher_is_better = higher_is_better
+        self.horizons = tuple(sorted(horizons))
+        self.hold = hold or self.horizons[-1]
+        # Parameter sets with fewer trades are ranked last
+        self.min_trades = min_trades
+        self.period = period
+        self.interval = interval
+        self.max_workers = max_workers
+    
+    def load(self, symbols):
+        """{symbol: OHLCV frame} through the engine (and its data cache)"""
+        frames = {}
+        for symbol in symbols:
+            df = self.engine.download_data(symbol, self.interval, self.period)
+            if df is not None and len(df) > 0:
+                frames[symbol] = df
+        return frames
+    
+    @staticmethod
+    def blocks(frames):
+        """[(bar times, high, low, close)] per group of symbols sharing the same bars"""
+        panel = PricePanel.from_frames(frames)
+        out = []
+        for rows, cols in panel.groups():
+            arrays = [panel.data[f][np.ix_(rows, cols)] for f in ('High', 'Low', 'Close')]
+            out.append((panel.index.values[rows], *arrays))
+        return out
+    
+    def run(self, param_sets, frames=None, symbols=None):
+        """Ranked DataFrame of the parameter sets (Rank 1 = best)"""
+        if frames is None:
+            frames = self.load(symbols or [])
+        blocks = self.blocks(frames)
+        if not blocks or not param_sets:
+            return pd.DataFrame()
+        
+        names = sorted(param_sets[0])
+        ordered = sorted(param_sets, key=lambda p: tuple(p.get(n) for n in names))
+        if self.max_workers > 1 and len(ordered) > 1:
+            size = max(1, math.ceil(len(ordered) / (self.max_workers * 4)))
+            chunks = [ordered[i:i + size] for i in range(0, len(ordered), size)]
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                     initargs=(blocks, self.horizons, self.hold)) as executor:
+                rows = [row for chunk in executor.map(_evaluate_chunk, chunks,
+                                                      itertools.repeat(self.signal))
+                        for row in chunk]
+        else:
+            state = _SweepState(blocks, self.horizons, self.hold)
+            rows = [state.evaluate(params, self.signal) for params in ordered]
+        return self.rank(pd.DataFrame(rows))
+    
+    def rank(self, table):
+        """Sort by the metric (too few trades or NaN last) and number the rows"""
+        score = table[self.metric].where(table['Trades'] >= self.min_trades)
+        order = score.sort_values(ascending=not self.higher_is_better, na_position='last', kind='stable').index
+        table = table.loc[order].reset_index(drop=True)
+        table.insert(0, 'Rank', np.arange(1, len(table) + 1))
+        return table
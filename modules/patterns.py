@@ -3,10 +3,51 @@ Chart Patterns Module
 Detects various chart patterns in price data
 """
 
+import bisect
+
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from scipy.signal import argrelextrema
 
+from modules.indicators import IndicatorLibrary
+
+
+# Pattern names served by detect_levels (one pass computes all of them)
+LEVEL_PATTERNS = ('Near_Resistance', 'Near_Support', 'Level_Break_Up', 'Level_Break_Down')
+
+# Columns detect_levels adds; distances are percent of the close
+LEVEL_COLUMNS = ('Resistance', 'Support', 'Resistance_Dist', 'Support_Dist') + LEVEL_PATTERNS
+
+# Divergence patterns are '<oscillator>_<kind>', e.g. 'RSI_Bull_Div'
+DIVERGENCE_OSCILLATORS = ('RSI', 'MACD', 'OBV')
+DIVERGENCE_KINDS = ('Bull_Div', 'Bear_Div', 'Hidden_Bull_Div', 'Hidden_Bear_Div')
+
+# Trailing bars the last value of a windowed detector depends on at its
+# default lookback, so a caller that needs only the latest bar can pass
+# that tail (lookback + the bar itself, + neighbours for local extrema)
+LAST_BAR_WINDOWS = {
+    'Double_Bottom': 52,
+    'Double_Top': 52,
+    'TL_Break_Up': 32,
+    'TL_Break_Down': 32,
+    'Triangle': 51,
+    'Rising_Wedge': 51,
+    'Falling_Wedge': 51,
+    'Cup_Handle': 101,
+    'Flag': 41,
+}
+
+# Bars the full-window detectors need for their last value to match the
+# whole history: detect_levels keeps swings up to `lookback` (150) bars old,
+# and a swing needs `order` (5) bars on each side of it
+PATTERN_HISTORY = 150 + 2 * 5 + 1
+
+
+def divergence_patterns(oscillators=DIVERGENCE_OSCILLATORS):
+    """Pattern names of the divergences of the given oscillators"""
+    return [f'{oscillator}_{kind}' for oscillator in oscillators for kind in DIVERGENCE_KINDS]
+
 
 class ChartPatterns:
     """Detects chart patterns in OHLC data"""
@@ -298,6 +339,247 @@ class ChartPatterns:
         
         return pd.Series(res, index=df.index)
     
+    @staticmethod
+    def swing_positions(values, order=5, side='high'):
+        """
+        Positions of bars that are the extreme ('high' = max, 'low' = min)
+        of the `order` bars on either side, strict on the left so a flat
+        extreme marks its first bar only. A swing at bar i is known at i + order
+        """
+        values = np.asarray(values).astype(float).ravel()
+        width = 2 * order + 1
+        if len(values) < width:
+            return np.empty(0, dtype=int)
+        windows = sliding_window_view(values, width)
+        center = windows[:, order]
+        if side == 'high':
+            is_swing = (center > windows[:, :order].max(axis=1)) & (center >= windows[:, order + 1:].max(axis=1))
+        else:
+            is_swing = (center < windows[:, :order].min(axis=1)) & (center <= windows[:, order + 1:].min(axis=1))
+        return np.flatnonzero(is_swing) + order
+    
+    @staticmethod
+    def find_swings(high, low, order=5):
+        """
+        Swing highs of `high` and swing lows of `low` merged by position:
+        returns (positions, prices, is_high)
+        """
+        high = np.asarray(high).astype(float).ravel()
+        low = np.asarray(low).astype(float).ravel()
+        high_pos = ChartPatterns.swing_positions(high, order, 'high')
+        low_pos = ChartPatterns.swing_positions(low, order, 'low')
+        positions = np.concatenate([high_pos, low_pos])
+        prices = np.concatenate([high[high_pos], low[low_pos]])
+        kinds = np.concatenate([np.ones(len(high_pos), dtype=bool), np.zeros(len(low_pos), dtype=bool)])
+        by_position = np.argsort(positions, kind='stable')
+        return positions[by_position], prices[by_position], kinds[by_position]
+    
+    @staticmethod
+    def cluster_levels(prices, tolerance=0.015):
+        """
+        Level id of each price (input order, 0 = lowest level). Prices are
+        sorted and a new level starts wherever the gap to the previous price
+        exceeds `tolerance` of it, or where the level would span more than
+        2 * tolerance, so a ladder of close swings cannot chain into one
+        wide level. O(n log n): one searchsorted per level
+        """
+        prices = np.asarray(prices, dtype=float)
+        n = len(prices)
+        if n == 0:
+            return np.empty(0, dtype=int)
+        order = np.argsort(prices, kind='stable')
+        ordered = prices[order]
+        gaps = np.flatnonzero(np.diff(ordered) > tolerance * np.abs(ordered[:-1])) + 1
+        
+        # Level boundaries on plain lists: bisect beats numpy calls on the short swing sets
+        values = ordered.tolist()
+        gaps = gaps.tolist() + [n]
+        sizes = []
+        start = g = 0
+        while start < n:
+            end = bisect.bisect_right(values, values[start] + 2 * tolerance * abs(values[start]))
+            while gaps[g] <= start:
+                g += 1
+            end = min(end, gaps[g])
+            sizes.append(end - start)
+            start = end
+        
+        ids = np.empty(n, dtype=int)
+        ids[order] = np.repeat(np.arange(len(sizes)), sizes)
+        return ids
+    
+    @staticmethod
+    def _levels(prices, tolerance, min_touches):
+        """(ids, touches, mean price) of the levels of one set of swing prices"""
+        ids = ChartPatterns.cluster_levels(prices, tolerance)
+        touches = np.bincount(ids)
+        level = np.bincount(ids, weights=prices) / np.maximum(touches, 1)
+        return ids, touches, np.where(touches >= min_touches, level, np.nan)
+    
+    @staticmethod
+    def support_resistance_levels(df, lookback=150, order=5, tolerance=0.015, min_touches=2,
+                                  half_life=50):
+        """
+        Levels active on the last bar, best first: DataFrame of Level (mean
+        price of its swings), Touches, Score (touches weighted by recency,
+        halving every `half_life` bars), Last_Touch and Side. Only swings
+        confirmed by the last bar are clustered, as in detect_levels
+        """
+        columns = ['Level', 'Touches', 'Score', 'Last_Touch', 'Side']
+        positions, prices, _ = ChartPatterns.find_swings(df['High'], df['Low'], order)
+        n = len(df)
+        active = (positions + order <= n - 1) & (n - 1 - positions <= lookback)
+        if not active.any():
+            return pd.DataFrame(columns=columns)
+        
+        positions, prices = positions[active], prices[active]
+        ids, touches, level = ChartPatterns._levels(prices, tolerance, min_touches)
+        score = np.bincount(ids, weights=0.5 ** ((n - 1 - positions) / half_life))
+        last = np.full(len(touches), -1)
+        np.maximum.at(last, ids, positions)
+        
+        keep = np.isfinite(level)
+        close = float(np.asarray(df['Close'])[-1])
+        levels = pd.DataFrame({
+            'Level': level[keep],
+            'Touches': touches[keep],
+            'Score': score[keep],
+            'Last_Touch': df.index[last[keep]],
+            'Side': np.where(level[keep] > close, 'Resistance', 'Support'),
+        })
+        return levels.sort_values('Score', ascending=False, kind='stable', ignore_index=True)
+    
+    @staticmethod
+    def detect_levels(df, lookback=150, order=5, tolerance=0.015, min_touches=2, near_pct=0.015):
+        """
+        Support / resistance columns on every bar (LEVEL_COLUMNS) from the
+        swing levels known at that bar: nearest level above / below the
+        close, percent distances, Near_* within `near_pct`, and
+        Level_Break_* when the close crosses the previous bar's level.
+        The swings confirmed and still within `lookback` only change when a
+        swing is confirmed or expires, so they are clustered once per such
+        segment and each segment's closes are located with searchsorted.
+        Every bar sees only its own past: detect_levels(df.iloc[:t + 1])
+        gives the same values at bar t
+        """
+        close = np.asarray(df['Close']).astype(float).ravel()
+        n = len(close)
+        positions, prices, _ = ChartPatterns.find_swings(df['High'], df['Low'], order)
+        
+        resistance = np.full(n, np.nan)
+        support = np.full(n, np.nan)
+        # A swing counts from the bar it is confirmed until `lookback` bars after it
+        start = positions + order
+        end = np.minimum(positions + lookback + 1, n)
+        live = start < end
+        start, end, prices = start[live], end[live], prices[live]
+        bounds = np.unique(np.concatenate([start, end, [n]]))
+        for first, stop in zip(bounds[:-1], bounds[1:]):
+            active = (start <= first) & (end > first)
+            if not active.any():
+                continue
+            level = ChartPatterns._levels(prices[active], tolerance, min_touches)[2]
+            level = np.sort(level[np.isfinite(level)])
+            if len(level) == 0:
+                continue
+            segment = close[first:stop]
+            valid = np.isfinite(segment)
+            below = np.searchsorted(level, segment[valid], 'right')
+            rows = np.flatnonzero(valid) + first
+            has_support = below > 0
+            has_resistance = below < len(level)
+            support[rows[has_support]] = level[below[has_support] - 1]
+            resistance[rows[has_resistance]] = level[below[has_resistance]]
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            resistance_dist = (resistance - close) / close * 100
+            support_dist = (close - support) / close * 100
+        previous_resistance = np.concatenate([[np.nan], resistance[:-1]])
+        previous_support = np.concatenate([[np.nan], support[:-1]])
+        with np.errstate(invalid='ignore'):
+            columns = {
+                'Resistance': resistance,
+                'Support': support,
+                'Resistance_Dist': resistance_dist,
+                'Support_Dist': support_dist,
+                'Near_Resistance': resistance_dist <= near_pct * 100,
+                'Near_Support': support_dist <= near_pct * 100,
+                'Level_Break_Up': close > previous_resistance,
+                'Level_Break_Down': close < previous_support,
+            }
+        return {name: pd.Series(values, index=df.index) for name, values in columns.items()}
+    
+    @staticmethod
+    def oscillator(df, name):
+        """Divergence oscillator series: the frame's column if present, else from IndicatorLibrary"""
+        if name in df.columns:
+            return df[name]
+        if name == 'RSI':
+            return IndicatorLibrary.calculate_rsi(df)
+        if name == 'MACD':
+            return IndicatorLibrary.calculate_macd(df)['macd']
+        if name == 'OBV':
+            return IndicatorLibrary.calculate_obv(df)
+        raise ValueError(f"Unknown divergence oscillator: {name}")
+    
+    @staticmethod
+    def detect_divergences(df, oscillator='RSI', order=5, lookback=60, max_lag=3, hold=5):
+        """
+        Regular and hidden divergences between price and an oscillator
+        (RSI, MACD or OBV). Each swing low (high) of price is paired with
+        the oscillator swing low (high) nearest to it within `max_lag` bars,
+        then consecutive price swings at most `lookback` bars apart compare:
+        regular bullish = lower low in price, higher low in the oscillator;
+        hidden bullish = higher low, lower low; bearish mirrors on highs.
+        A divergence is set for `hold` bars from the bar both swings are
+        confirmed, so there is no look-ahead. Returns a dict of Series named
+        like DIVERGENCE_KINDS, prefixed by the oscillator
+        """
+        n = len(df)
+        values = np.asarray(ChartPatterns.oscillator(df, oscillator)).astype(float).ravel()
+        columns = {}
+        for side, price_column, bullish in (('low', 'Low', True), ('high', 'High', False)):
+            price = np.asarray(df[price_column]).astype(float).ravel()
+            swings = ChartPatterns.swing_positions(price, order, side)
+            pivots = ChartPatterns.swing_positions(values, order, side)
+            regular = np.zeros(n + 1)
+            hidden = np.zeros(n + 1)
+            
+            if len(swings) >= 2 and len(pivots):
+                # Nearest oscillator pivot to each price swing (ties go to the earlier one)
+                right = np.clip(np.searchsorted(pivots, swings), 0, len(pivots) - 1)
+                left = np.clip(right - 1, 0, len(pivots) - 1)
+                nearest = np.where(np.abs(pivots[left] - swings) <= np.abs(pivots[right] - swings),
+                                   pivots[left], pivots[right])
+                matched = np.abs(nearest - swings) <= max_lag
+                
+                # Consecutive price swings: previous -> current
+                prev, curr = slice(None, -1), slice(1, None)
+                paired = (matched[prev] & matched[curr] & (nearest[prev] != nearest[curr]) &
+                          (swings[curr] - swings[prev] <= lookback))
+                price_change = price[swings[curr]] - price[swings[prev]]
+                osc_change = values[nearest[curr]] - values[nearest[prev]]
+                if bullish:
+                    is_regular = paired & (price_change < 0) & (osc_change > 0)
+                    is_hidden = paired & (price_change > 0) & (osc_change < 0)
+                else:
+                    is_regular = paired & (price_change > 0) & (osc_change < 0)
+                    is_hidden = paired & (price_change < 0) & (osc_change > 0)
+                
+                # Flag from confirmation for `hold` bars via a difference array
+                confirmed = np.maximum(swings[curr], nearest[curr]) + order
+                for flags, events in ((regular, is_regular), (hidden, is_hidden)):
+                    start = confirmed[events & (confirmed < n)]
+                    np.add.at(flags, start, 1.0)
+                    np.add.at(flags, np.minimum(start + hold, n), -1.0)
+            
+            kind = 'Bull' if bullish else 'Bear'
+            columns[f'{oscillator}_{kind}_Div'] = np.cumsum(regular)[:n] > 0
+            columns[f'{oscillator}_Hidden_{kind}_Div'] = np.cumsum(hidden)[:n] > 0
+        
+        return {name: pd.Series(columns[name], index=df.index)
+                for name in divergence_patterns([oscillator])}
+    
     @staticmethod
     def get_all_patterns(df):
         """
@@ -316,5 +598,10 @@ class ChartPatterns:
         patterns['Flag'] = ChartPatterns.detect_flag_pattern(df)
         patterns['Rising_Wedge'] = ChartPatterns.detect_wedge_pattern(df, 'rising')
         patterns['Falling_Wedge'] = ChartPatterns.detect_wedge_pattern(df, 'falling')
+        levels = ChartPatterns.detect_levels(df)
+        for name in LEVEL_PATTERNS:
+            patterns[name] = levels[name]
+        for oscillator in DIVERGENCE_OSCILLATORS:
+            patterns.update(ChartPatterns.detect_divergences(df, oscillator))
         
         return patterns
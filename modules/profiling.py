@@ -0,0 +1,382 @@
+"""
+Profiling Module
+Per-stage wall / CPU timers and memory accounting for scans, and their reports
+"""
+
+import json
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+class _NullStage:
+    """Shared no-op context used when profiling is off"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullProfiler:
+    """Profiler stand-in whose timers cost one attribute lookup and a no-op context"""
+    
+    enabled = False
+    
+    def stage(self, name):
+        return _NULL_STAGE
+    
+    def symbol(self, symbol):
+        return _NULL_STAGE
+    
+    def frame(self, timeframe, df):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'wall', 'cpu')
+    
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+    
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler._record(self.name, time.perf_counter() - self.wall,
+                              time.thread_time() - self.cpu, exc_type is not None)
+        return False
+
+
+class _Symbol:
+    __slots__ = ('profiler', 'symbol', 'wall', 'cpu')
+    
+    def __init__(self, profiler, symbol):
+        self.profiler = profiler
+        self.symbol = symbol
+    
+    def __enter__(self):
+        self.profiler._local.symbol = self.symbol
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler._record_symbol(self.symbol, time.perf_counter() - self.wall,
+                                     time.thread_time() - self.cpu)
+        self.profiler._local.symbol = None
+        return False
+
+
+class ScanProfiler:
+    """
+    Collects wall and CPU time per stage ('fetch:1d', 'indicator:RSI',
+    'pattern:Flag', 'rules', ...) and per symbol across one scan. Safe to
+    share between scan threads; CPU time is per thread (time.thread_time).
+    Exceptions raised inside a stage are counted against it even when the
+    engine later swallows them.
+    """
+    
+    enabled = True
+    
+    def __init__(self):
+        self._samples = defaultdict(list)
+        self._errors = defaultdict(int)
+        self._symbols = {}
+        self._symbol_stages = defaultdict(lambda: defaultdict(float))
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.started_at = time.time()
+    
+    def stage(self, name):
+        return _Stage(self, name)
+    
+    def symbol(self, symbol):
+        return _Symbol(self, symbol)
+    
+    def frame(self, timeframe, df):
+        pass
+    
+    def _record(self, name, wall, cpu, failed):
+        symbol = getattr(self._local, 'symbol', None)
+        with self._lock:
+            self._samples[name].append((wall, cpu))
+            if failed:
+                self._errors[name] += 1
+            if symbol is not None:
+                self._symbol_stages[symbol][name] += wall
+    
+    def _record_symbol(self, symbol, wall, cpu):
+        with self._lock:
+            self._symbols[symbol] = (wall, cpu)
+    
+    def stage_frame(self):
+        """One row per stage: calls, errors, total and p50/p95/max wall (ms), CPU total"""
+        rows = []
+        with self._lock:
+            items = [(name, np.array(samples)) for name, samples in self._samples.items()]
+            errors = dict(self._errors)
+        for name, samples in items:
+            wall_ms = samples[:, 0] * 1000.0
+            rows.append({
+                'Stage': name,
+                'Calls': len(samples),
+                'Errors': errors.get(name, 0),
+                'Total_ms': wall_ms.sum(),
+                'p50_ms': np.percentile(wall_ms, 50),
+                'p95_ms': np.percentile(wall_ms, 95),
+                'Max_ms': wall_ms.max(),
+                'CPU_ms': samples[:, 1].sum() * 1000.0,
+            })
+        df = pd.DataFrame(rows, columns=['Stage', 'Calls', 'Errors', 'Total_ms', 'p50_ms',
+                                         'p95_ms', 'Max_ms', 'CPU_ms'])
+        return df.sort_values('Total_ms', ascending=False, ignore_index=True)
+    
+    def slowest_symbols(self, n=10):
+        """The n slowest symbols with their wall/CPU time and dominant stage"""
+        with self._lock:
+            symbols = dict(self._symbols)
+            stages = {s: dict(st) for s, st in self._symbol_stages.items()}
+        rows = []
+        for symbol, (wall, cpu) in sorted(symbols.items(), key=lambda kv: kv[1][0], reverse=True)[:n]:
+            by_stage = stages.get(symbol, {})
+            top = max(by_stage, key=by_stage.get) if by_stage else None
+            rows.append({
+                'Symbol': symbol,
+                'Wall_ms': wall * 1000.0,
+                'CPU_ms': cpu * 1000.0,
+                'Slowest_Stage': top,
+                'Stage_ms': by_stage.get(top, 0.0) * 1000.0,
+            })
+        return pd.DataFrame(rows, columns=['Symbol', 'Wall_ms', 'CPU_ms', 'Slowest_Stage', 'Stage_ms'])
+    
+    def report(self, top_n=10):
+        """JSON-serializable profile of the scan"""
+        with self._lock:
+            wall_total = sum(w for w, _ in self._symbols.values())
+            cpu_total = sum(c for _, c in self._symbols.values())
+            n_symbols = len(self._symbols)
+        return {
+            'started_at': self.started_at,
+            'symbols': n_symbols,
+            'symbol_wall_ms': wall_total * 1000.0,
+            'symbol_cpu_ms': cpu_total * 1000.0,
+            'stages': self.stage_frame().to_dict('records'),
+            'slowest_symbols': self.slowest_symbols(top_n).to_dict('records'),
+        }
+    
+    def to_json(self, path=None, top_n=10):
+        """Profile report as a JSON string, also written to path if given"""
+        text = json.dumps(self.report(top_n), indent=2, default=float)
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+
+class _MemoryStage:
+    __slots__ = ('profiler', 'name', 'start', 'peak')
+    
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+    
+    def __enter__(self):
+        stack = self.profiler._stack()
+        current, peak = tracemalloc.get_traced_memory()
+        # Keep the overall and enclosing stage's peaks before resetting it for this one
+        self.profiler._traced_peak = max(self.profiler._traced_peak, peak)
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, peak)
+        tracemalloc.reset_peak()
+        self.start = current
+        self.peak = current
+        stack.append(self)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        stack = self.profiler._stack()
+        stack.pop()
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(self.peak, peak)
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, peak)
+        self.profiler._record(self.name, peak - self.start, current - self.start)
+        return False
+
+
+class MemoryProfiler:
+    """
+    Memory profile of a scan, used in place of a ScanProfiler:
+    tracemalloc peak growth and net retained bytes per stage, plus the
+    size of every computed timeframe frame broken down by column and dtype.
+    tracemalloc is process-wide, so per-stage peaks are exact only with
+    max_workers=1; with a pool they include other threads' allocations.
+    Tracing slows scans down noticeably, so timings taken alongside are
+    not representative.
+    """
+    
+    enabled = True
+    
+    def __init__(self, frames=1):
+        self.frames = frames
+        self._stages = defaultdict(list)
+        self._frames = defaultdict(list)
+        self._columns = defaultdict(lambda: [0, 0])
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_tracing = False
+        self._traced_peak = 0
+        self.traced_peak = None
+        self.started_at = time.time()
+    
+    def start(self):
+        """Start tracemalloc unless it is already tracing"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        tracemalloc.reset_peak()
+        return self
+    
+    def stop(self):
+        """Stop tracemalloc if start() started it; the collected report is kept"""
+        self.traced_peak = self._peak()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+    
+    def _peak(self):
+        """Largest traced memory seen, including peaks before stage resets"""
+        if not tracemalloc.is_tracing():
+            return self.traced_peak
+        return max(self._traced_peak, tracemalloc.get_traced_memory()[1])
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+    
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+    
+    def stage(self, name):
+        if not tracemalloc.is_tracing():
+            return _NULL_STAGE
+        return _MemoryStage(self, name)
+    
+    def symbol(self, symbol):
+        return self.stage('symbol')
+    
+    def frame(self, timeframe, df):
+        """Account the size of a computed frame (deep, so object columns count their strings)"""
+        if df is None:
+            return
+        usage = df.memory_usage(index=True, deep=True)
+        dtypes = df.dtypes
+        with self._lock:
+            self._frames[timeframe].append((len(df), len(df.columns), int(usage.sum())))
+            for column, size in usage.items():
+                dtype = 'index' if column == 'Index' else str(dtypes.get(column, 'object'))
+                entry = self._columns[(column, dtype)]
+                entry[0] += int(size)
+                entry[1] += 1
+    
+    def _record(self, name, peak, net):
+        with self._lock:
+            self._stages[name].append((peak, net))
+    
+    def stage_frame(self):
+        """One row per stage: calls, max / mean peak growth and mean net retained (KB)"""
+        rows = []
+        with self._lock:
+            items = [(name, np.array(samples, dtype=float)) for name, samples in self._stages.items()]
+        for name, samples in items:
+            rows.append({
+                'Stage': name,
+                'Calls': len(samples),
+                'Peak_KB': samples[:, 0].max() / 1024.0,
+                'Mean_Peak_KB': samples[:, 0].mean() / 1024.0,
+                'Mean_Net_KB': samples[:, 1].mean() / 1024.0,
+            })
+        df = pd.DataFrame(rows, columns=['Stage', 'Calls', 'Peak_KB', 'Mean_Peak_KB', 'Mean_Net_KB'])
+        return df.sort_values('Peak_KB', ascending=False, ignore_index=True)
+    
+    def timeframe_frame(self):
+        """Frame sizes per timeframe: count, rows, columns, mean / max / total KB"""
+        rows = []
+        with self._lock:
+            items = [(tf, np.array(sizes, dtype=float)) for tf, sizes in self._frames.items()]
+        for timeframe, sizes in items:
+            rows.append({
+                'Timeframe': timeframe,
+                'Frames': len(sizes),
+                'Mean_Rows': sizes[:, 0].mean(),
+                'Columns': int(sizes[:, 1].max()),
+                'Mean_KB': sizes[:, 2].mean() / 1024.0,
+                'Max_KB': sizes[:, 2].max() / 1024.0,
+                'Total_MB': sizes[:, 2].sum() / 1024.0 ** 2,
+            })
+        return pd.DataFrame(rows, columns=['Timeframe', 'Frames', 'Mean_Rows', 'Columns',
+                                           'Mean_KB', 'Max_KB', 'Total_MB'])
+    
+    def column_frame(self, n=20):
+        """The n columns using the most memory across all frames, with their dtype and share"""
+        with self._lock:
+            items = [(column, dtype, size, count) for (column, dtype), (size, count) in self._columns.items()]
+        df = pd.DataFrame(items, columns=['Column', 'Dtype', 'Total_Bytes', 'Frames'])
+        total = df['Total_Bytes'].sum()
+        df['Mean_KB'] = df['Total_Bytes'] / df['Frames'].clip(lower=1) / 1024.0
+        df['Share'] = df['Total_Bytes'] / total if total else 0.0
+        df = df.sort_values('Total_Bytes', ascending=False, ignore_index=True)
+        return df if n is None else df.head(n)
+    
+    def dtype_frame(self):
+        """Total bytes and column count per dtype"""
+        columns = self.column_frame(n=None)
+        df = columns.groupby('Dtype').agg(Columns=('Column', 'nunique'), Total_Bytes=('Total_Bytes', 'sum'))
+        total = df['Total_Bytes'].sum()
+        df['Share'] = df['Total_Bytes'] / total if total else 0.0
+        return df.sort_values('Total_Bytes', ascending=False).reset_index()
+    
+    def report(self, top_n=20):
+        """JSON-serializable memory profile of the scan"""
+        current = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        return {
+            'started_at': self.started_at,
+            'traced_peak_bytes': self._peak(),
+            'traced_current_bytes': current,
+            'stages': self.stage_frame().to_dict('records'),
+            'timeframes': self.timeframe_frame().to_dict('records'),
+            'dtypes': self.dtype_frame().to_dict('records'),
+            'columns': self.column_frame(top_n).to_dict('records'),
+        }
+    
+    def to_json(self, path=None, top_n=20):
+        """Memory report as a JSON string, also written to path if given"""
+        text = json.dumps(self.report(top_n), indent=2, default=float)
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
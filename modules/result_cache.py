@@ -0,0 +1,72 @@
+"""
+Result Cache Module
+Per-symbol scan result cache used for incremental rescans
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def workflow_fingerprint(workflow):
+    """Stable short hash of a workflow definition"""
+    payload = json.dumps(workflow, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def bar_signature(df):
+    """
+    Identity of the latest bar of a frame: its timestamp plus close and
+    volume, so a still-forming intraday/daily bar that ticks is treated as
+    changed even though its timestamp is not
+    """
+    if df is None or len(df) == 0:
+        return None
+    last = df.iloc[-1]
+    volume = last['Volume'] if 'Volume' in df.columns else None
+    return (str(df.index[-1]), float(last['Close']), None if volume is None else float(volume))
+
+
+class ScanResultCache:
+    """
+    Thread-safe LRU of ScanResult records keyed by
+    (symbol, workflow fingerprint, latest-bar signature per timeframe)
+    """
+    
+    def __init__(self, max_entries=20000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(symbol, fingerprint, df_dict):
+        bars = tuple(sorted((tf, bar_signature(df)) for tf, df in df_dict.items()))
+        return (symbol, fingerprint, bars)
+    
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+    
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+    
+    def __len__(self):
+        return len(self._entries)
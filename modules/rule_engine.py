@@ -107,6 +107,56 @@ class RuleEngine:
         except Exception as e:
             return False
     
+    def evaluate_condition_series(self, df: pd.DataFrame, condition: Dict) -> np.ndarray:
+        """
+        Evaluate a single condition on every bar at once
+        Returns a boolean array (False where a value is NaN or a column is missing)
+        """
+        result = np.zeros(len(df), dtype=bool)
+        try:
+            indicator = condition.get('indicator')
+            op_func = self.operators.get(condition.get('operator'))
+            
+            if indicator not in df.columns or op_func is None:
+                return result
+            
+            left = np.asarray(df[indicator], dtype=float)
+            if 'reference' in condition:
+                reference = condition['reference']
+                if reference not in df.columns:
+                    return result
+                right = np.asarray(df[reference], dtype=float)
+            else:
+                right = np.full(len(df), float(condition.get('value', 0)))
+            
+            valid = ~(np.isnan(left) | np.isnan(right))
+            with np.errstate(invalid='ignore'):
+                return valid & op_func(left, right)
+        except Exception as e:
+            return result
+    
+    def evaluate_rule_series(self, df: pd.DataFrame, rule: Dict) -> np.ndarray:
+        """
+        Evaluate a rule (same format as evaluate_rule) on every bar at once;
+        element -1 equals evaluate_rule(df, rule)
+        """
+        try:
+            rule_type = rule.get('type', 'AND')
+            conditions = rule.get('conditions', [])
+            
+            if not conditions or rule_type not in ('AND', 'OR'):
+                return np.zeros(len(df), dtype=bool)
+            
+            results = [self.evaluate_rule_series(df, condition) if 'type' in condition
+                       else self.evaluate_condition_series(df, condition)
+                       for condition in conditions]
+            
+            if rule_type == 'AND':
+                return np.logical_and.reduce(results)
+            return np.logical_or.reduce(results)
+        except Exception as e:
+            return np.zeros(len(df), dtype=bool)
+    
     def parse_text_rule(self, text: str) -> Dict:
         """
         Parse a text rule into a structured format
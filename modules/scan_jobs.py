@@ -0,0 +1,260 @@
+"""
+Scan Jobs Module
+Runs scans as background jobs so the Streamlit script thread never blocks
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.data_cache import MarketDataCache
+from modules.metrics import JOBS, REGISTRY
+from modules.profiling import ScanProfiler
+from modules.scanner_engine import ScannerEngine
+from modules.result_cache import ScanResultCache
+from modules.scan_journal import DEFAULT_JOURNAL_DIR, ScanJournal
+from modules.scan_results import results_to_frame
+
+
+class ScanJob:
+    """State of one background scan (progress, partial results, cancel flag)"""
+    
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    CANCELLED = 'cancelled'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    
+    def __init__(self, symbols, workflow, workflow_name=None, job_id=None, journal=None):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.symbols = list(symbols)
+        self.workflow = dict(workflow)
+        self.workflow_name = workflow_name
+        self.status = self.QUEUED
+        self.error = None
+        self.current_symbol = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.journal = journal
+        # ScanProfiler with stage timings when the job was submitted with profile=True
+        self.profiler = None
+        
+        self._done = set()
+        self._results = []
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+    
+    @property
+    def total(self):
+        return len(self.symbols)
+    
+    @property
+    def completed(self):
+        return len(self._done)
+    
+    @property
+    def progress(self):
+        """Fraction of symbols finished, 0.0 - 1.0"""
+        return self.completed / self.total if self.total else 1.0
+    
+    @property
+    def is_active(self):
+        return self.status in (self.QUEUED, self.RUNNING)
+    
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+    
+    def remaining_symbols(self):
+        """Symbols not yet scanned, in original order"""
+        with self._lock:
+            return [s for s in self.symbols if s not in self._done]
+    
+    def partial_results(self):
+        """Typed results frame of everything scanned so far"""
+        with self._lock:
+            records = list(self._results)
+        return results_to_frame(records)
+    
+    def cancel(self):
+        self._cancel.set()
+    
+    def is_cancel_requested(self):
+        return self._cancel.is_set()
+    
+    def _record(self, symbol, result):
+        with self._lock:
+            self._done.add(symbol)
+            if result:
+                self._results.append(result)
+    
+    def _restore(self, journal):
+        """Prefill progress from a journal written by an earlier run"""
+        with self._lock:
+            self._done = journal.completed_symbols()
+            self._results = journal.records()
+    
+    def _on_progress(self, current, total, symbol):
+        self.current_symbol = symbol
+
+
+class ScanJobManager:
+    """
+    App-level registry of scan jobs backed by a thread pool.
+    Jobs keep running while the UI reruns or navigates to other pages, and
+    each job checkpoints to a ScanJournal so it survives an app restart.
+    """
+    
+    def __init__(self, max_workers=2, max_jobs=20, journal_dir=DEFAULT_JOURNAL_DIR,
+                 alert_engine=None, max_journals=50, journal_max_age_days=30.0):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scan-job')
+        self.max_jobs = max_jobs
+        self.journal_dir = journal_dir
+        self.max_journals = max_journals
+        self.journal_max_age_days = journal_max_age_days
+        # Downloaded frames are reused until their next bar close, so a rescan
+        # reaches the result cache without refetching unchanged timeframes
+        self.data_cache = MarketDataCache()
+        self.result_cache = ScanResultCache()
+        self.alert_engine = alert_engine
+        self.jobs = {}
+        self._lock = threading.Lock()
+        
+        # Job counts are computed when metrics are scraped
+        for status in (ScanJob.QUEUED, ScanJob.RUNNING, ScanJob.CANCELLED,
+                       ScanJob.COMPLETED, ScanJob.FAILED):
+            JOBS.labels(status).set_function(
+                lambda status=status: sum(1 for j in list(self.jobs.values()) if j.status == status))
+        self.prune_journals()
+    
+    def submit(self, symbols, workflow, workflow_name=None, profile=False):
+        """Queue a new scan and return its ScanJob"""
+        job = ScanJob(symbols, workflow, workflow_name)
+        if profile:
+            job.profiler = ScanProfiler()
+        job.journal = ScanJournal(job.id, self.journal_dir).start(symbols, workflow, workflow_name)
+        with self._lock:
+            self.jobs[job.id] = job
+            self._prune()
+        self.executor.submit(self._run, job)
+        self.prune_journals()
+        return job
+    
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+    
+    def list_jobs(self):
+        """All known jobs, newest first"""
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return sorted(jobs, key=lambda j: j.created_at, reverse=True)
+    
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+    
+    def resume(self, job_id):
+        """
+        Continue a cancelled or failed job with its remaining symbols.
+        Jobs unknown to this process (e.g. after a restart) are rebuilt
+        from their journal.
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            job = self._job_from_journal(job_id)
+            if job is None:
+                return None
+        with self._lock:
+            # Two concurrent resumes must not both queue the job
+            job = self.jobs.setdefault(job.id, job)
+            if job.is_active:
+                return job
+            job._cancel.clear()
+            job.status = ScanJob.QUEUED
+            job.error = None
+            job.finished_at = None
+            self._prune()
+        self.executor.submit(self._run, job)
+        return job
+    
+    def _run(self, job):
+        job.status = ScanJob.RUNNING
+        if job.started_at is None:
+            job.started_at = time.time()
+        try:
+            scanner = ScannerEngine(result_cache=self.result_cache, data_cache=self.data_cache,
+                                    profiler=job.profiler)
+            record = job._record
+            if self.alert_engine is not None:
+                def record(symbol, result):
+                    job._record(symbol, result)
+                    self.alert_engine.observe(result, job.workflow)
+            
+            scanner.scan_multiple_symbols(
+                job.remaining_symbols(),
+                job.workflow,
+                progress_callback=job._on_progress,
+                result_callback=record,
+                should_stop=job.is_cancel_requested,
+                journal=job.journal
+            )
+            stopped_early = job.is_cancel_requested() and job.completed < job.total
+            job.status = ScanJob.CANCELLED if stopped_early else ScanJob.COMPLETED
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = ScanJob.FAILED
+        finally:
+            if self.alert_engine is not None:
+                self.alert_engine.flush()
+            job.current_symbol = None
+            job.finished_at = time.time()
+            REGISTRY.write_textfile()
+    
+    def prune_journals(self):
+        """Apply journal retention, sparing queued / running jobs; returns the deleted ids"""
+        with self._lock:
+            active = {job.id for job in self.jobs.values() if job.is_active}
+        deleted = ScanJournal.prune(self.journal_dir, self.max_journals, self.journal_max_age_days,
+                                    keep=active)
+        if deleted:
+            # Without its journal a finished job can no longer be resumed
+            with self._lock:
+                for scan_id in deleted:
+                    job = self.jobs.get(scan_id)
+                    if job is not None and not job.is_active:
+                        del self.jobs[scan_id]
+        return deleted
+    
+    def list_journaled_scans(self):
+        """Summaries of scans checkpointed on disk"""
+        return ScanJournal.list_scans(self.journal_dir)
+    
+    def load_scan(self, scan_id):
+        """Results of a (possibly partial) scan read back from its journal"""
+        return ScanJournal(scan_id, self.journal_dir).load_results()
+    
+    def _job_from_journal(self, scan_id):
+        journal = ScanJournal(scan_id, self.journal_dir)
+        header = journal.header()
+        if header is None:
+            return None
+        job = ScanJob(header.get('symbols', []), header.get('workflow', {}),
+                      header.get('workflow_name'), job_id=scan_id, journal=journal)
+        job._restore(journal)
+        job.status = ScanJob.CANCELLED
+        return job
+    
+    def _prune(self):
+        """Drop the oldest finished jobs beyond max_jobs"""
+        finished = sorted((j for j in self.jobs.values() if not j.is_active),
+                          key=lambda j: j.created_at)
+        while len(self.jobs) > self.max_jobs and finished:
+            del self.jobs[finished.pop(0).id]
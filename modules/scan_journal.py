@@ -0,0 +1,229 @@
+"""
+Scan Journal Module
+Append-only JSONL checkpoint of completed symbols so large scans can resume
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+
+from modules.scan_results import ScanResult, results_to_frame
+
+
+DEFAULT_JOURNAL_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'scans'
+)
+
+# Listing summaries per journal path: reused while the file is unchanged and
+# extended from the last parsed offset while a running scan appends to it
+_SUMMARIES = {}
+_SUMMARIES_LOCK = threading.Lock()
+
+
+class ScanJournal:
+    """
+    One file per scan id. The first line is a header describing the scan
+    (workflow, symbol universe); every following line is one finished
+    symbol. A crash can at worst truncate the last line, which is ignored
+    on read and cut off before the next append, so a resumed scan starts
+    its records on a line of their own.
+    """
+    
+    def __init__(self, scan_id=None, directory=DEFAULT_JOURNAL_DIR):
+        self.scan_id = scan_id or uuid.uuid4().hex[:12]
+        self.directory = directory
+        self.path = os.path.join(directory, f"{self.scan_id}.jsonl")
+        self._lock = threading.Lock()
+        self._tail_checked = False
+    
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+    
+    def start(self, symbols, workflow, workflow_name=None):
+        """Write the header for a new scan (no-op if the journal exists)"""
+        if self.exists:
+            return self
+        os.makedirs(self.directory, exist_ok=True)
+        header = {
+            'type': 'header',
+            'scan_id': self.scan_id,
+            'created_at': time.time(),
+            'workflow_name': workflow_name,
+            'workflow': workflow,
+            'symbols': list(symbols),
+        }
+        self._write(header)
+        return self
+    
+    def append(self, symbol, result):
+        """Record a finished symbol (result may be None when there was no data)"""
+        entry = {
+            'type': 'result',
+            'symbol': symbol,
+            'result': result._asdict() if result else None,
+        }
+        self._write(entry)
+    
+    def header(self):
+        """Header entry of the journal, or None if it has not been started"""
+        for entry in self._entries():
+            if entry.get('type') == 'header':
+                return entry
+            break
+        return None
+    
+    def completed_symbols(self):
+        """Set of symbols already journaled"""
+        return {e['symbol'] for e in self._entries() if e.get('type') == 'result'}
+    
+    def records(self):
+        """ScanResult records in journal order (last entry wins per symbol)"""
+        latest = {}
+        for entry in self._entries():
+            if entry.get('type') == 'result' and entry.get('result'):
+                latest[entry['symbol']] = ScanResult(**entry['result'])
+        return list(latest.values())
+    
+    def load_results(self):
+        """Materialize the typed results frame from the journal"""
+        return results_to_frame(self.records())
+    
+    def summary(self):
+        """Small dict describing the scan for listing in the UI"""
+        header, done = self._scan_state()
+        return dict(header, scan_id=self.scan_id, completed=len(done))
+    
+    def delete(self):
+        with _SUMMARIES_LOCK:
+            _SUMMARIES.pop(self.path, None)
+        if self.exists:
+            os.remove(self.path)
+    
+    @staticmethod
+    def list_scans(directory=DEFAULT_JOURNAL_DIR):
+        """Summaries of every journaled scan, newest first"""
+        if not os.path.isdir(directory):
+            return []
+        scans = []
+        for name in os.listdir(directory):
+            if name.endswith('.jsonl'):
+                journal = ScanJournal(name[:-len('.jsonl')], directory)
+                scans.append(journal.summary())
+        return sorted(scans, key=lambda s: s['created_at'] or 0, reverse=True)
+    
+    @staticmethod
+    def prune(directory=DEFAULT_JOURNAL_DIR, max_scans=50, max_age_days=30.0, keep=()):
+        """
+        Delete journals beyond the newest `max_scans` or older than
+        `max_age_days` (None = no age limit); ids in `keep` are spared.
+        Returns the deleted scan ids
+        """
+        deleted = []
+        cutoff = time.time() - max_age_days * 86400.0 if max_age_days is not None else None
+        for position, scan in enumerate(ScanJournal.list_scans(directory)):
+            if scan['scan_id'] in keep:
+                continue
+            expired = cutoff is not None and (scan['created_at'] or 0) < cutoff
+            if position >= max_scans or expired:
+                try:
+                    ScanJournal(scan['scan_id'], directory).delete()
+                    deleted.append(scan['scan_id'])
+                except OSError as e:
+                    print(f"Error deleting scan journal {scan['scan_id']}: {e}")
+        return deleted
+    
+    def _write(self, entry):
+        line = json.dumps(entry, default=str) + '\n'
+        with self._lock:
+            if not self._tail_checked:
+                self._cut_torn_tail()
+                self._tail_checked = True
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+    
+    def _cut_torn_tail(self):
+        """Truncate the file back to its last newline (drops a record torn by a crash)"""
+        if not self.exists:
+            return
+        with open(self.path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b'\n':
+                return
+            position = end
+            while position > 0:
+                size = min(4096, position)
+                position -= size
+                f.seek(position)
+                newline = f.read(size).rfind(b'\n')
+                if newline >= 0:
+                    f.truncate(position + newline + 1)
+                    return
+            f.truncate(0)
+    
+    def _scan_state(self):
+        """
+        (header fields, set of completed symbols), parsing only what was
+        appended since the last call
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return self._listing_header({}), set()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        
+        with _SUMMARIES_LOCK:
+            cached = _SUMMARIES.get(self.path)
+        if cached is not None and cached['stamp'] == stamp:
+            return cached['header'] or self._listing_header({}), cached['done']
+        if cached is None or stat.st_size < cached['offset']:
+            cached = {'offset': 0, 'header': None, 'done': set()}
+        else:
+            cached = dict(cached, done=set(cached['done']))
+        
+        with open(self.path, 'rb') as f:
+            f.seek(cached['offset'])
+            data = f.read()
+        # A trailing line without a newline is still being written
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get('type') == 'result':
+                cached['done'].add(entry['symbol'])
+            elif entry.get('type') == 'header' and cached['header'] is None:
+                cached['header'] = self._listing_header(entry)
+        cached['offset'] += end
+        cached['stamp'] = stamp
+        
+        with _SUMMARIES_LOCK:
+            _SUMMARIES[self.path] = cached
+        return cached['header'] or self._listing_header({}), cached['done']
+    
+    @staticmethod
+    def _listing_header(header):
+        """The header fields a listing shows (the symbol list only as its length)"""
+        return {
+            'workflow_name': header.get('workflow_name'),
+            'created_at': header.get('created_at'),
+            'total': len(header.get('symbols', [])),
+        }
+    
+    def _entries(self):
+        if not self.exists:
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Partially written line from an interrupted scan
+                    continue
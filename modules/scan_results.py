@@ -0,0 +1,196 @@
+"""
+Scan Results Module
+Compact encodings for scan result columns
+"""
+
+from enum import IntEnum
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class FlagRegistry:
+    """
+    Maps a fixed set of names to bit positions so that any combination
+    of them fits in a single int64 result column
+    """
+    
+    def __init__(self, names):
+        self.names = list(names)
+        if len(self.names) > 63:
+            raise ValueError("FlagRegistry supports at most 63 flags")
+        self.bits = {name: 1 << i for i, name in enumerate(self.names)}
+        self._labels = {0: '-'}
+    
+    def bit(self, name):
+        """Bit value for a name (0 if unknown)"""
+        return self.bits.get(name, 0)
+    
+    def encode(self, names):
+        """Encode an iterable of names into a bitmask"""
+        mask = 0
+        for name in names:
+            mask |= self.bits.get(name, 0)
+        return mask
+    
+    def decode(self, mask):
+        """Decode a bitmask into the list of names it contains"""
+        mask = int(mask)
+        return [name for name in self.names if mask & self.bits[name]]
+    
+    def label(self, mask):
+        """Display string for a bitmask, e.g. 'Double_Bottom, TL_Break_Up'"""
+        mask = int(mask)
+        label = self._labels.get(mask)
+        if label is None:
+            label = ', '.join(self.decode(mask)) or '-'
+            self._labels[mask] = label
+        return label
+    
+    def labels(self, masks):
+        """Display strings for a column of bitmasks (each distinct mask decoded once)"""
+        values = as_mask_array(masks)
+        uniq, inverse = np.unique(values, return_inverse=True)
+        labels = np.array([self.label(m) for m in uniq], dtype=object)
+        index = masks.index if isinstance(masks, pd.Series) else None
+        return pd.Series(labels[inverse.ravel()], index=index, dtype=object)
+    
+    def present(self, masks):
+        """Names set in at least one of the masks, in registry order"""
+        values = as_mask_array(masks)
+        if values.size == 0:
+            return []
+        return self.decode(np.bitwise_or.reduce(values))
+    
+    def contains(self, masks, name):
+        """Boolean array: which masks contain the given name"""
+        return (as_mask_array(masks) & self.bit(name)) != 0
+
+
+def as_mask_array(masks):
+    """Coerce a mask column (possibly with NaN from error rows) to int64"""
+    if isinstance(masks, pd.Series):
+        masks = masks.fillna(0)
+    return np.asarray(masks, dtype=np.int64).ravel()
+
+
+PATTERN_FLAGS = FlagRegistry([
+    'Double_Bottom', 'Double_Top', 'Head_Shoulders', 'Inv_Head_Shoulders',
+    'TL_Break_Up', 'TL_Break_Down', 'Triangle', 'Cup_Handle', 'Flag',
+    'Rising_Wedge', 'Falling_Wedge', 'Near_Resistance', 'Near_Support',
+    'Level_Break_Up', 'Level_Break_Down',
+    'RSI_Bull_Div', 'RSI_Bear_Div', 'RSI_Hidden_Bull_Div', 'RSI_Hidden_Bear_Div',
+    'MACD_Bull_Div', 'MACD_Bear_Div', 'MACD_Hidden_Bull_Div', 'MACD_Hidden_Bear_Div',
+    'OBV_Bull_Div', 'OBV_Bear_Div', 'OBV_Hidden_Bull_Div', 'OBV_Hidden_Bear_Div',
+])
+
+SETUP_FLAGS = FlagRegistry([
+    'Momentum_Long', 'Momentum_Short', 'Breakout',
+])
+
+
+class Signal(IntEnum):
+    """Latest-bar signal of a scanned symbol"""
+    SELL = -1
+    NEUTRAL = 0
+    BUY = 1
+
+
+class ScanResult(NamedTuple):
+    """
+    One row of scan output. Numerics are plain floats (NaN when missing),
+    availability flags are bools and the signal is a Signal code; all
+    display formatting happens in format_results(). Fresh is False when
+    the record was reused from the result cache on a rescan.
+    """
+    Symbol: str
+    Close: float = np.nan
+    Signal: int = int(Signal.NEUTRAL)
+    RSI: float = np.nan
+    MACD: float = np.nan
+    Pattern_Mask: int = 0
+    Setup_Mask: int = 0
+    MTF_Score: float = np.nan
+    Return_1M: float = np.nan
+    Return_3M: float = np.nan
+    Wave: bool = False
+    Tide: bool = False
+    SuperTide: bool = False
+    Fresh: bool = True
+    Error: Optional[str] = None
+    
+    @classmethod
+    def failed(cls, symbol, error):
+        """Result record for a symbol whose scan raised"""
+        return cls(Symbol=symbol, Error=error)
+
+
+RESULT_DTYPES = {
+    'Symbol': object,
+    'Close': np.float64,
+    'Signal': np.int8,
+    'RSI': np.float32,
+    'MACD': np.float32,
+    'Pattern_Mask': np.int64,
+    'Setup_Mask': np.int64,
+    'MTF_Score': np.float32,
+    'Return_1M': np.float32,
+    'Return_3M': np.float32,
+    'Wave': bool,
+    'Tide': bool,
+    'SuperTide': bool,
+    'Fresh': bool,
+    'Error': object,
+}
+
+
+def results_to_frame(records):
+    """Build a typed results DataFrame from ScanResult records"""
+    records = list(records)
+    columns = list(ScanResult._fields)
+    if not records:
+        return pd.DataFrame({col: pd.Series(dtype=RESULT_DTYPES[col]) for col in columns})
+    df = pd.DataFrame.from_records(records, columns=columns)
+    return df.astype({col: RESULT_DTYPES[col] for col in columns if col in df.columns})
+
+
+def alignment_label(score):
+    """Text label for a multi-timeframe alignment score in [-1, 1]"""
+    if pd.isna(score):
+        return 'N/A'
+    if score > 0.5:
+        return 'Bullish ⬆'
+    if score < -0.5:
+        return 'Bearish ⬇'
+    return 'Neutral ⬌'
+
+
+def add_display_labels(df):
+    """Return a copy of df with 'Patterns' / 'Setups' strings derived from the masks"""
+    df = df.copy()
+    if 'Pattern_Mask' in df.columns:
+        df['Patterns'] = PATTERN_FLAGS.labels(df['Pattern_Mask'])
+    if 'Setup_Mask' in df.columns:
+        df['Setups'] = SETUP_FLAGS.labels(df['Setup_Mask'])
+    return df
+
+
+def format_results(df):
+    """
+    Display copy of a typed results frame: signal names, alignment labels,
+    availability ticks and pattern/setup strings
+    """
+    df = add_display_labels(df)
+    if 'Signal' in df.columns:
+        codes = df['Signal'].fillna(Signal.NEUTRAL).astype(int)
+        df['Signal'] = codes.map({s.value: s.name for s in Signal})
+    if 'MTF_Score' in df.columns:
+        df.insert(df.columns.get_loc('MTF_Score'), 'MTF_Alignment',
+                  df['MTF_Score'].map(alignment_label))
+    for col in ('Wave', 'Tide', 'SuperTide'):
+        if col in df.columns:
+            df[col] = np.where(df[col].astype(bool), '✓', '✗')
+    if 'Fresh' in df.columns:
+        df['Fresh'] = np.where(df['Fresh'].astype(bool), '🆕 new', '♻️ cached')
+    return df
@@ -7,18 +7,46 @@ import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import time
 import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from modules.indicators import IndicatorLibrary
-from modules.patterns import ChartPatterns
+from modules.patterns import LEVEL_PATTERNS, ChartPatterns, divergence_patterns
+from modules.scan_results import PATTERN_FLAGS, SETUP_FLAGS, ScanResult, Signal, results_to_frame
+from modules.result_cache import ScanResultCache, workflow_fingerprint
+from modules.profiling import NULL_PROFILER
+from modules.panel_indicators import PricePanel
+from modules.cross_section import trailing_returns
+from modules.metrics import (CACHE_LOOKUPS, FETCH_SECONDS, FETCHES, QUEUE_DEPTH, SCAN_RATE,
+                             SYMBOL_SECONDS, SYMBOLS, WORKER_SLOTS, WORKERS_BUSY)
 
 
 class ScannerEngine:
     """Main scanner engine with multi-timeframe support"""
     
-    def __init__(self):
+    # Columns summarize_latest reads besides the workflow's pattern columns
+    SUMMARY_COLUMNS = ('Close', 'SMA', 'Buy_Signal', 'Sell_Signal', 'RSI', 'MACD')
+    
+    DIVERGENCE_PATTERNS = frozenset(divergence_patterns())
+    
+    def __init__(self, result_cache=None, data_cache=None, profiler=None, data_provider=None,
+                 lean=False):
         self.indicator_lib = IndicatorLibrary()
         self.pattern_detector = ChartPatterns()
         
+        # Shared across scans so unchanged symbols are not recomputed
+        self.result_cache = result_cache
+        # Optional MarketDataCache: frames are reused until their next bar close
+        self.data_cache = data_cache
+        # ScanProfiler for stage timings; the null profiler makes timers no-ops
+        self.profiler = profiler or NULL_PROFILER
+        # data_provider(symbol, interval, period) -> OHLCV DataFrame replaces
+        # Yahoo Finance (e.g. SyntheticMarket.provider() for benchmarks)
+        self.data_provider = data_provider
+        # Lean mode keeps only each timeframe's last row of the summary
+        # columns instead of every computed frame until the symbol is done
+        self.lean = lean
+        
         self.timeframe_map = {
             'Wave': '4h',
             'Tide': '1d',
@@ -26,7 +54,22 @@ class ScannerEngine:
         }
     
     def download_data(self, symbol, timeframe='1d', period='6mo'):
-        """Download market data for a symbol"""
+        """Download market data for a symbol (via the data cache when set)"""
+        if self.data_cache is None:
+            return self._fetch_data(symbol, timeframe, period)
+        
+        df = self.data_cache.get(symbol, timeframe, period)
+        CACHE_LOOKUPS.labels('data', 'miss' if df is None else 'hit').inc()
+        if df is None:
+            df = self._fetch_data(symbol, timeframe, period)
+            if df is not None:
+                self.data_cache.put(symbol, timeframe, df, period)
+        return df
+    
+    def _fetch_data(self, symbol, timeframe='1d', period='6mo'):
+        """Fetch market data for a symbol from Yahoo Finance (or the data provider)"""
+        started = time.perf_counter()
+        outcome = 'error'
         try:
             # Map timeframe
             interval = timeframe
@@ -39,11 +82,22 @@ class ScannerEngine:
             elif timeframe == '1wk':
                 period = '2y'
             
-            df = yf.download(symbol, period=period, interval=interval, progress=False)
+            if self.data_provider is not None:
+                df = self.data_provider(symbol, interval, period)
+            else:
+                # Ticker.history keeps no module-level state, unlike yf.download,
+                # so it is safe to call from several scan threads at once
+                df = yf.Ticker(symbol).history(period=period, interval=interval,
+                                               auto_adjust=False, actions=False)
             
-            if df.empty:
+            if df is None or df.empty:
+                outcome = 'empty'
                 return None
             
+            # Daily and slower bars are keyed by date, as yf.download returns them
+            if getattr(df.index, 'tz', None) is not None and interval in ['1d', '5d', '1wk', '1mo', '3mo']:
+                df.index = df.index.tz_localize(None)
+            
             # Ensure we have OHLC columns
             if 'Close' not in df.columns:
                 return None
@@ -52,223 +106,466 @@ class ScannerEngine:
             if isinstance(df.columns, pd.MultiIndex):
                 df.columns = df.columns.get_level_values(0)
             
-            return df[['Open', 'High', 'Low', 'Close', 'Volume']].dropna()
+            df = df[['Open', 'High', 'Low', 'Close', 'Volume']].dropna()
+            outcome = 'ok' if len(df) > 0 else 'empty'
+            return df
         except Exception as e:
+            message = f"{type(e).__name__} {e}".lower()
+            if 'ratelimit' in message or 'rate limit' in message or 'too many requests' in message:
+                outcome = 'throttled'
             return None
+        finally:
+            FETCHES.labels(timeframe, outcome).inc()
+            FETCH_SECONDS.labels(timeframe).observe(time.perf_counter() - started)
     
     def calculate_indicators(self, df, indicator_list):
         """Calculate all indicators for a dataframe"""
         try:
-            df = self.indicator_lib.normalize_ohlc(df)
+            with self.profiler.stage('normalize'):
+                df = self.indicator_lib.normalize_ohlc(df)
             
             for indicator in indicator_list:
-                if indicator == 'Yoda':
-                    df = self.indicator_lib.yoda_indicator(df)
-                elif indicator == 'RSI':
-                    df['RSI'] = self.indicator_lib.calculate_rsi(df)
-                elif indicator == 'MACD':
-                    macd = self.indicator_lib.calculate_macd(df)
-                    df['MACD'] = macd['macd']
-                    df['MACD_Signal'] = macd['signal']
-                    df['MACD_Hist'] = macd['histogram']
-                elif indicator == 'BB':
-                    bb = self.indicator_lib.calculate_bollinger_bands(df)
-                    df['BB_Upper'] = bb['upper']
-                    df['BB_Middle'] = bb['middle']
-                    df['BB_Lower'] = bb['lower']
-                elif indicator == 'ATR':
-                    df['ATR'] = self.indicator_lib.calculate_atr(df)
-                elif indicator == 'ADX':
-                    adx = self.indicator_lib.calculate_adx(df)
-                    df['ADX'] = adx['adx']
-                    df['DI_Plus'] = adx['di_plus']
-                    df['DI_Minus'] = adx['di_minus']
-                elif indicator == 'Stochastic':
-                    stoch = self.indicator_lib.calculate_stochastic(df)
-                    df['Stoch_K'] = stoch['k']
-                    df['Stoch_D'] = stoch['d']
-                elif indicator == 'OBV':
-                    df['OBV'] = self.indicator_lib.calculate_obv(df)
-                elif indicator == 'VWAP':
-                    df['VWAP'] = self.indicator_lib.calculate_vwap(df)
-                elif indicator == 'EMA_5':
-                    df['EMA_5'] = self.indicator_lib.calculate_ema(df, 5)
-                elif indicator == 'EMA_20':
-                    df['EMA_20'] = self.indicator_lib.calculate_ema(df, 20)
-                elif indicator == 'EMA_50':
-                    df['EMA_50'] = self.indicator_lib.calculate_ema(df, 50)
-                elif indicator == 'SMA_200':
-                    df['SMA_200'] = self.indicator_lib.calculate_sma(df, 200)
+                with self.profiler.stage(f'indicator:{indicator}'):
+                    if indicator == 'Yoda':
+                        df = self.indicator_lib.yoda_indicator(df)
+                    elif indicator == 'RSI':
+                        df['RSI'] = self.indicator_lib.calculate_rsi(df)
+                    elif indicator == 'MACD':
+                        macd = self.indicator_lib.calculate_macd(df)
+                        df['MACD'] = macd['macd']
+                        df['MACD_Signal'] = macd['signal']
+                        df['MACD_Hist'] = macd['histogram']
+                    elif indicator == 'BB':
+                        bb = self.indicator_lib.calculate_bollinger_bands(df)
+                        df['BB_Upper'] = bb['upper']
+                        df['BB_Middle'] = bb['middle']
+                        df['BB_Lower'] = bb['lower']
+                    elif indicator == 'ATR':
+                        df['ATR'] = self.indicator_lib.calculate_atr(df)
+                    elif indicator == 'ADX':
+                        adx = self.indicator_lib.calculate_adx(df)
+                        df['ADX'] = adx['adx']
+                        df['DI_Plus'] = adx['di_plus']
+                        df['DI_Minus'] = adx['di_minus']
+                    elif indicator == 'Stochastic':
+                        stoch = self.indicator_lib.calculate_stochastic(df)
+                        df['Stoch_K'] = stoch['k']
+                        df['Stoch_D'] = stoch['d']
+                    elif indicator == 'OBV':
+                        df['OBV'] = self.indicator_lib.calculate_obv(df)
+                    elif indicator == 'VWAP':
+                        df['VWAP'] = self.indicator_lib.calculate_vwap(df)
+                    elif indicator == 'AVG_Volume':
+                        df['AVG_Volume'] = self.indicator_lib.calculate_avg_volume(df)
+                    elif indicator == 'Median_Volume':
+                        df['Median_Volume'] = self.indicator_lib.calculate_median_volume(df)
+                    elif indicator == 'RVOL':
+                        df['RVOL'] = self.indicator_lib.calculate_rvol(df)
+                    elif indicator == 'Dollar_Volume':
+                        df['Dollar_Volume'] = self.indicator_lib.calculate_dollar_volume(df)
+                    elif indicator == 'EMA_5':
+                        df['EMA_5'] = self.indicator_lib.calculate_ema(df, 5)
+                    elif indicator == 'EMA_20':
+                        df['EMA_20'] = self.indicator_lib.calculate_ema(df, 20)
+                    elif indicator == 'EMA_50':
+                        df['EMA_50'] = self.indicator_lib.calculate_ema(df, 50)
+                    elif indicator == 'SMA_200':
+                        df['SMA_200'] = self.indicator_lib.calculate_sma(df, 200)
             
             return df
         except Exception as e:
             traceback.print_exc()
             return df
     
-    def calculate_patterns(self, df, pattern_list):
-        """Calculate all patterns for a dataframe"""
-        try:
-            for pattern in pattern_list:
-                if pattern == 'Double_Bottom':
-                    df['Double_Bottom'] = self.pattern_detector.detect_double_bottom(df['Close'])
+    def detect_patterns(self, df, pattern_list):
+        """{column: boolean Series} of each pattern (level patterns bring every LEVEL_COLUMNS entry)"""
+        columns = {}
+        levels = None
+        divergences = {}
+        for pattern in pattern_list:
+            with self.profiler.stage(f'pattern:{pattern}'):
+                if pattern in LEVEL_PATTERNS:
+                    # One level pass serves every level pattern and the distance columns
+                    if levels is None:
+                        levels = self.pattern_detector.detect_levels(df)
+                        columns.update(levels)
+                elif pattern in self.DIVERGENCE_PATTERNS:
+                    # One pass per oscillator serves its four divergence kinds
+                    oscillator = pattern.split('_', 1)[0]
+                    if oscillator not in divergences:
+                        divergences[oscillator] = self.pattern_detector.detect_divergences(df, oscillator)
+                    columns[pattern] = divergences[oscillator][pattern]
+                elif pattern == 'Double_Bottom':
+                    columns['Double_Bottom'] = self.pattern_detector.detect_double_bottom(df['Close'])
                 elif pattern == 'Double_Top':
-                    df['Double_Top'] = self.pattern_detector.detect_double_top(df['Close'])
+                    columns['Double_Top'] = self.pattern_detector.detect_double_top(df['Close'])
                 elif pattern == 'Head_Shoulders':
-                    df['Head_Shoulders'] = self.pattern_detector.detect_head_and_shoulders(df)
+                    columns['Head_Shoulders'] = self.pattern_detector.detect_head_and_shoulders(df)
                 elif pattern == 'Inv_Head_Shoulders':
-                    df['Inv_Head_Shoulders'] = self.pattern_detector.detect_inverse_head_and_shoulders(df)
+                    columns['Inv_Head_Shoulders'] = self.pattern_detector.detect_inverse_head_and_shoulders(df)
                 elif pattern == 'TL_Break_Up':
-                    df['TL_Break_Up'] = self.pattern_detector.detect_trendline_breakout(df, 'up')
+                    columns['TL_Break_Up'] = self.pattern_detector.detect_trendline_breakout(df, 'up')
                 elif pattern == 'TL_Break_Down':
-                    df['TL_Break_Down'] = self.pattern_detector.detect_trendline_breakout(df, 'down')
+                    columns['TL_Break_Down'] = self.pattern_detector.detect_trendline_breakout(df, 'down')
                 elif pattern == 'Triangle':
-                    df['Triangle'] = self.pattern_detector.detect_triangle_pattern(df)
+                    columns['Triangle'] = self.pattern_detector.detect_triangle_pattern(df)
                 elif pattern == 'Cup_Handle':
-                    df['Cup_Handle'] = self.pattern_detector.detect_cup_and_handle(df)
+                    columns['Cup_Handle'] = self.pattern_detector.detect_cup_and_handle(df)
                 elif pattern == 'Flag':
-                    df['Flag'] = self.pattern_detector.detect_flag_pattern(df)
+                    columns['Flag'] = self.pattern_detector.detect_flag_pattern(df)
                 elif pattern == 'Rising_Wedge':
-                    df['Rising_Wedge'] = self.pattern_detector.detect_wedge_pattern(df, 'rising')
+                    columns['Rising_Wedge'] = self.pattern_detector.detect_wedge_pattern(df, 'rising')
                 elif pattern == 'Falling_Wedge':
-                    df['Falling_Wedge'] = self.pattern_detector.detect_wedge_pattern(df, 'falling')
-            
+                    columns['Falling_Wedge'] = self.pattern_detector.detect_wedge_pattern(df, 'falling')
+        return columns
+    
+    def calculate_patterns(self, df, pattern_list):
+        """Calculate all patterns for a dataframe"""
+        try:
+            for column, values in self.detect_patterns(df, pattern_list).items():
+                df[column] = values
             return df
         except Exception as e:
             traceback.print_exc()
             return df
     
-    def scan_symbol(self, symbol, workflow):
-        """Scan a single symbol with the given workflow"""
+    def prepare_panel(self, symbols, workflow, max_workers=1, should_stop=None):
+        """
+        Fetch every symbol's timeframes up front and compute the workflow
+        indicators for the whole universe per timeframe on a PricePanel.
+        Returns {symbol: {tf_name: (data, panel)}} for scan_symbol; symbols
+        the panel could not take are computed per symbol as usual.
+        """
+        timeframes = workflow.get('timeframes', self.timeframe_map)
+        indicators = workflow.get('indicators', ['Yoda'])
+        pairs = [(symbol, tf_name, interval) for symbol in symbols
+                 for tf_name, interval in timeframes.items()]
+        
+        def fetch(pair):
+            if should_stop and should_stop():
+                return None
+            with self.profiler.stage(f'fetch:{pair[2]}'):
+                df = self.download_data(pair[0], pair[2])
+            return df if df is not None and len(df) > 0 else None
+        
+        try:
+            if max_workers > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    data = dict(zip(pairs, executor.map(fetch, pairs)))
+            else:
+                data = {pair: fetch(pair) for pair in pairs}
+            
+            prepared = {symbol: {} for symbol in symbols}
+            for tf_name, interval in timeframes.items():
+                frames = {symbol: data[(symbol, tf_name, interval)] for symbol in symbols}
+                with self.profiler.stage('panel:build'):
+                    panel = PricePanel.from_frames(frames)
+                with self.profiler.stage('panel:indicators'):
+                    panel.compute(indicators)
+                for symbol in symbols:
+                    prepared[symbol][tf_name] = (frames[symbol], panel)
+            return prepared
+        except Exception as e:
+            traceback.print_exc()
+            return {}
+    
+    def scan_symbol(self, symbol, workflow, prepared=None):
+        """Scan a single symbol with the given workflow (prepared: its prepare_panel entry)"""
+        started = time.perf_counter()
+        WORKERS_BUSY.inc()
+        try:
+            with self.profiler.symbol(symbol):
+                result = self._scan_symbol(symbol, workflow, prepared)
+        finally:
+            WORKERS_BUSY.dec()
+        
+        SYMBOL_SECONDS.observe(time.perf_counter() - started)
+        if result is None:
+            SYMBOLS.labels('empty').inc()
+        elif result.Error:
+            SYMBOLS.labels('error').inc()
+        else:
+            SYMBOLS.labels('ok' if result.Fresh else 'cached').inc()
+        return result
+    
+    def _scan_symbol(self, symbol, workflow, prepared=None):
         try:
             # Get timeframes from workflow
             timeframes = workflow.get('timeframes', self.timeframe_map)
             indicators = workflow.get('indicators', ['Yoda'])
             patterns = workflow.get('patterns', [])
-            setups = workflow.get('setups', [])
             
             # Download data for all timeframes
             df_dict = {}
             for tf_name, tf_interval in timeframes.items():
-                df = self.download_data(symbol, tf_interval)
-                if df is not None and len(df) > 0:
-                    # Calculate indicators
-                    df = self.calculate_indicators(df, indicators)
-                    # Calculate patterns
-                    df = self.calculate_patterns(df, patterns)
-                    df_dict[tf_name] = df
+                if prepared is not None:
+                    df = prepared.get(tf_name, (None, None))[0]
                 else:
-                    df_dict[tf_name] = None
+                    with self.profiler.stage(f'fetch:{tf_interval}'):
+                        df = self.download_data(symbol, tf_interval)
+                df_dict[tf_name] = df if df is not None and len(df) > 0 else None
             
             # Check if we have any valid data
             if not any(df is not None for df in df_dict.values()):
                 return None
             
-            # Get the latest data from Tide (1d) timeframe
-            tide_df = df_dict.get('Tide')
-            if tide_df is None or len(tide_df) == 0:
-                # Try Wave if Tide is not available
-                tide_df = df_dict.get('Wave')
-                if tide_df is None or len(tide_df) == 0:
-                    return None
+            # Reuse the previous result if no timeframe got a new/updated bar
+            cache_key = None
+            if self.result_cache is not None:
+                with self.profiler.stage('result_cache'):
+                    cache_key = ScanResultCache.make_key(symbol, workflow_fingerprint(workflow), df_dict)
+                    cached = self.result_cache.get(cache_key)
+                CACHE_LOOKUPS.labels('result', 'miss' if cached is None else 'hit').inc()
+                if cached is not None:
+                    return cached._replace(Fresh=False)
             
-            last_row = tide_df.iloc[-1]
-            
-            # Check for signals
-            has_buy_signal = bool(last_row.get('Buy_Signal', False)) if 'Buy_Signal' in tide_df.columns else False
-            has_sell_signal = bool(last_row.get('Sell_Signal', False)) if 'Sell_Signal' in tide_df.columns else False
+            last_rows = {}
+            returns = {}
+            for tf_name, df in df_dict.items():
+                if df is None:
+                    last_rows[tf_name] = None
+                    continue
+                panel = prepared.get(tf_name, (None, None))[1] if prepared is not None else None
+                if panel is not None and not patterns:
+                    # Only the latest bar is needed, so skip building the frame
+                    last = panel.last_row(symbol)
+                    if last is not None:
+                        last_rows[tf_name] = last
+                        returns[tf_name] = trailing_returns(panel.closes(symbol))
+                        continue
+                with self.profiler.stage(f'timeframe:{tf_name}'):
+                    # Calculate indicators (or take this symbol's slice of the panel)
+                    computed = panel.frame(symbol) if panel is not None else None
+                    df = self.calculate_indicators(df, indicators) if computed is None else computed
+                    # Calculate patterns
+                    df = self.calculate_patterns(df, patterns)
+                self.profiler.frame(tf_name, df)
+                returns[tf_name] = trailing_returns(df['Close'].to_numpy())
+                if self.lean:
+                    # Copy the few values needed and release the frame right away
+                    keep = [c for c in self.SUMMARY_COLUMNS + tuple(patterns) if c in df.columns]
+                    last_rows[tf_name] = df[keep].iloc[-1].copy() if len(df) > 0 else None
+                    df_dict[tf_name] = df = None
+                else:
+                    df_dict[tf_name] = df
+                    last_rows[tf_name] = df.iloc[-1] if len(df) > 0 else None
+            with self.profiler.stage('assemble'):
+                result = self.summarize_latest(symbol, last_rows, workflow, returns)
             
-            # Check patterns
-            detected_patterns = []
-            for pattern in patterns:
-                if pattern in tide_df.columns and bool(last_row.get(pattern, False)):
-                    detected_patterns.append(pattern)
+            if result is not None and cache_key is not None:
+                self.result_cache.put(cache_key, result)
+            return result
             
-            # Evaluate setups (simplified)
-            setup_results = []
+        except Exception as e:
+            traceback.print_exc()
+            return ScanResult.failed(symbol, str(e))
+    
+    def summarize_latest(self, symbol, last_rows, workflow, returns=None):
+        """
+        Build the ScanResult from the latest row of each timeframe
+        (a Series or dict of indicator/pattern columns, or None if missing)
+        and optional {timeframe: trailing_returns(...)}.
+        Shared by the batch scan and the streaming scanner.
+        """
+        patterns = workflow.get('patterns', [])
+        setups = workflow.get('setups', [])
+        
+        # Get the latest data from Tide (1d) timeframe
+        primary = 'Tide'
+        last_row = last_rows.get('Tide')
+        if last_row is None:
+            # Try Wave if Tide is not available
+            primary = 'Wave'
+            last_row = last_rows.get('Wave')
+            if last_row is None:
+                return None
+        primary_returns = (returns or {}).get(primary) or {}
+        
+        # Check for signals
+        has_buy_signal = bool(last_row.get('Buy_Signal', False)) if 'Buy_Signal' in last_row else False
+        has_sell_signal = bool(last_row.get('Sell_Signal', False)) if 'Sell_Signal' in last_row else False
+        
+        # Check patterns
+        detected_patterns = []
+        for pattern in patterns:
+            if pattern in last_row and bool(last_row.get(pattern, False)):
+                detected_patterns.append(pattern)
+        
+        # Evaluate setups (simplified)
+        setup_results = []
+        with self.profiler.stage('rules'):
             for setup_name in setups:
                 if setup_name == 'Momentum_Long' and has_buy_signal:
                     setup_results.append('Momentum_Long')
                 elif setup_name == 'Momentum_Short' and has_sell_signal:
                     setup_results.append('Momentum_Short')
-            
-            # Calculate metrics
-            rsi = last_row.get('RSI', np.nan)
-            macd = last_row.get('MACD', np.nan)
-            
-            # Multi-timeframe alignment
-            mtf_signal = self._calculate_mtf_alignment(df_dict)
-            
-            result = {
-                'Symbol': symbol,
-                'Close': float(last_row['Close']),
-                'Signal': 'BUY' if has_buy_signal else ('SELL' if has_sell_signal else 'NEUTRAL'),
-                'RSI': float(rsi) if not pd.isna(rsi) else None,
-                'MACD': float(macd) if not pd.isna(macd) else None,
-                'Patterns': ', '.join(detected_patterns) if detected_patterns else '-',
-                'Setups': ', '.join(setup_results) if setup_results else '-',
-                'MTF_Alignment': mtf_signal,
-                'Wave': '✓' if df_dict.get('Wave') is not None else '✗',
-                'Tide': '✓' if df_dict.get('Tide') is not None else '✗',
-                'SuperTide': '✓' if df_dict.get('SuperTide') is not None else '✗'
-            }
-            
-            return result
-            
-        except Exception as e:
-            traceback.print_exc()
-            return {
-                'Symbol': symbol,
-                'Error': str(e)
-            }
+        
+        # Calculate metrics
+        rsi = last_row.get('RSI', np.nan)
+        macd = last_row.get('MACD', np.nan)
+        
+        # Multi-timeframe alignment
+        with self.profiler.stage('mtf_alignment'):
+            mtf_score = self._calculate_mtf_alignment(last_rows)
+        
+        if has_buy_signal:
+            signal = Signal.BUY
+        elif has_sell_signal:
+            signal = Signal.SELL
+        else:
+            signal = Signal.NEUTRAL
+        
+        return ScanResult(
+            Symbol=symbol,
+            Close=float(last_row['Close']),
+            Signal=int(signal),
+            RSI=float(rsi),
+            MACD=float(macd),
+            Pattern_Mask=PATTERN_FLAGS.encode(detected_patterns),
+            Setup_Mask=SETUP_FLAGS.encode(setup_results),
+            MTF_Score=mtf_score,
+            Return_1M=primary_returns.get('Return_1M', np.nan),
+            Return_3M=primary_returns.get('Return_3M', np.nan),
+            Wave=last_rows.get('Wave') is not None,
+            Tide=last_rows.get('Tide') is not None,
+            SuperTide=last_rows.get('SuperTide') is not None
+        )
     
-    def _calculate_mtf_alignment(self, df_dict):
-        """Calculate multi-timeframe alignment score"""
+    def _calculate_mtf_alignment(self, last_rows):
+        """
+        Calculate multi-timeframe alignment score in [-1, 1]
+        (+1 every timeframe bullish, -1 every timeframe bearish, NaN on error)
+        """
         try:
             scores = []
             
-            for tf_name, df in df_dict.items():
-                if df is None or len(df) == 0:
+            for tf_name, last in last_rows.items():
+                if last is None:
                     continue
                 
-                last = df.iloc[-1]
-                
                 # Check if price is above SMA
-                if 'SMA' in df.columns and 'Close' in df.columns:
+                if 'SMA' in last and 'Close' in last:
                     if last['Close'] > last['SMA']:
                         scores.append(1)
                     else:
                         scores.append(-1)
-                elif 'Buy_Signal' in df.columns:
+                elif 'Buy_Signal' in last:
                     if last.get('Buy_Signal', False):
                         scores.append(1)
                     elif last.get('Sell_Signal', False):
                         scores.append(-1)
             
             if not scores:
-                return 'Neutral'
+                return 0.0
             
-            avg_score = np.mean(scores)
-            if avg_score > 0.5:
-                return 'Bullish ⬆'
-            elif avg_score < -0.5:
-                return 'Bearish ⬇'
-            else:
-                return 'Neutral ⬌'
+            return float(np.mean(scores))
                 
         except Exception:
-            return 'N/A'
+            return float('nan')
+    
+    def run_stream(self, feed, workflow, symbols=None, on_event=None, should_stop=None):
+        """
+        Streaming mode: seed the given symbols from history, then consume
+        bars from a BarFeed and report signal changes through on_event.
+        Returns the final results frame when the feed ends.
+        """
+        from modules.stream_scanner import StreamingScanner
+        
+        stream = StreamingScanner(workflow, engine=self)
+        if symbols:
+            stream.seed_from_engine(symbols)
+        return stream.run(feed, on_event=on_event, should_stop=should_stop)
     
-    def scan_multiple_symbols(self, symbols, workflow, progress_callback=None):
-        """Scan multiple symbols"""
-        results = []
+    def scan_multiple_symbols(self, symbols, workflow, progress_callback=None,
+                              result_callback=None, should_stop=None, journal=None,
+                              max_workers=1, panel=False):
+        """
+        Scan multiple symbols
+        result_callback(symbol, result) is called as each symbol finishes
+        (result is None when there was no data) and
+        should_stop() is checked before each symbol so callers can cancel.
+        With a ScanJournal, symbols already journaled are skipped, each new
+        result is appended to it and the returned frame is read back from it.
+        max_workers > 1 scans symbols on a thread pool (downloads dominate);
+        callbacks still run on the calling thread and results keep input order.
+        panel=True fetches the whole universe first and computes indicators
+        on time x symbol arrays (much faster for large universes, but every
+        frame is held in memory until the scan ends).
+        """
+        results = {}
+        
+        if journal is not None:
+            journal.start(symbols, workflow)
+            done = journal.completed_symbols()
+            symbols = [s for s in symbols if s not in done]
         total = len(symbols)
         
-        for i, symbol in enumerate(symbols):
-            if progress_callback:
-                progress_callback(i + 1, total, symbol)
-            
-            result = self.scan_symbol(symbol, workflow)
+        prepared = {}
+        if panel and symbols:
+            prepared = self.prepare_panel(symbols, workflow, max_workers, should_stop)
+        
+        def finish(i, symbol, result):
             if result:
-                results.append(result)
+                results[i] = result
+            if journal is not None:
+                journal.append(symbol, result)
+            if result_callback:
+                result_callback(symbol, result)
+        
+        slots = max(1, max_workers)
+        queued = total
+        QUEUE_DEPTH.inc(queued)
+        WORKER_SLOTS.inc(slots)
+        started_at = time.perf_counter()
+        
+        def dequeue():
+            nonlocal queued
+            queued -= 1
+            QUEUE_DEPTH.dec()
+        
+        try:
+            if max_workers <= 1:
+                for i, symbol in enumerate(symbols):
+                    if should_stop and should_stop():
+                        break
+                    
+                    if progress_callback:
+                        progress_callback(i + 1, total, symbol)
+                    
+                    dequeue()
+                    finish(i, symbol, self.scan_symbol(symbol, workflow, prepared.get(symbol)))
+            else:
+                # Keep a bounded number of symbols in flight so cancellation is prompt
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    pending = {}
+                    queue = iter(enumerate(symbols))
+                    started = 0
+                    while True:
+                        while len(pending) < max_workers * 2 and not (should_stop and should_stop()):
+                            item = next(queue, None)
+                            if item is None:
+                                break
+                            i, symbol = item
+                            started += 1
+                            if progress_callback:
+                                progress_callback(started, total, symbol)
+                            dequeue()
+                            future = executor.submit(self.scan_symbol, symbol, workflow, prepared.get(symbol))
+                            pending[future] = (i, symbol)
+                        if not pending:
+                            break
+                        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            i, symbol = pending.pop(future)
+                            finish(i, symbol, future.result())
+        finally:
+            QUEUE_DEPTH.dec(queued)
+            WORKER_SLOTS.dec(slots)
+        
+        elapsed = time.perf_counter() - started_at
+        if total and elapsed > 0:
+            SCAN_RATE.set(len(results) / elapsed)
         
-        return pd.DataFrame(results)
+        if journal is not None:
+            return journal.load_results()
+        return results_to_frame(results[i] for i in sorted(results))
@@ -0,0 +1,117 @@
+"""
+Scheduler Module
+Runs workflow scans on bar closes of the market calendar
+"""
+
+import threading
+import time
+import traceback
+
+import pandas as pd
+
+from modules.data_cache import MarketDataCache
+from modules.market_calendar import MarketCalendar
+
+
+class ScanScheduler:
+    """
+    Long-running scan loop aligned to the market calendar.
+    Each wake-up is either a bar close of one or more workflow intervals
+    (scanned `settle_seconds` after the close, so the provider has the
+    final bar) or a pre-warm shortly before the open that fills the data
+    cache. Data comes through a MarketDataCache, so nothing is fetched
+    while the market is closed; during the session a scan refetches the
+    intervals whose bar just closed and the slower ones whose current bar
+    is still forming.
+    """
+    
+    def __init__(self, symbols, workflow, engine=None, calendar=None, on_results=None,
+                 alert_engine=None, prewarm_minutes=10, settle_seconds=60, max_workers=4):
+        self.symbols = list(symbols)
+        self.workflow = workflow
+        self.calendar = calendar or MarketCalendar()
+        if engine is None:
+            from modules.scanner_engine import ScannerEngine
+            engine = ScannerEngine(data_cache=MarketDataCache(self.calendar))
+        elif engine.data_cache is None:
+            engine.data_cache = MarketDataCache(self.calendar)
+        self.engine = engine
+        self.on_results = on_results
+        self.alert_engine = alert_engine
+        self.prewarm = pd.Timedelta(minutes=prewarm_minutes)
+        self.settle = pd.Timedelta(seconds=settle_seconds)
+        self.max_workers = max_workers
+        
+        self.intervals = sorted(set(workflow.get('timeframes', engine.timeframe_map).values()))
+        self.history = []
+        self._stop = threading.Event()
+    
+    def next_event(self, now=None):
+        """(when, kind, intervals) of the next wake-up; kind is 'scan' or 'prewarm'"""
+        now = pd.Timestamp(now) if now is not None else self.calendar.now()
+        
+        # Bar closes are due `settle` later, so look back by that much
+        closes = {}
+        for interval in self.intervals:
+            close = self.calendar.next_bar_close(interval, now - self.settle)
+            closes.setdefault(close, []).append(interval)
+        close = min(closes)
+        when, kind, intervals = close + self.settle, 'scan', closes[close]
+        
+        prewarm_at = self.calendar.next_open(now) - self.prewarm
+        if now < prewarm_at < when:
+            when, kind, intervals = prewarm_at, 'prewarm', list(self.intervals)
+        return when, kind, intervals
+    
+    def run_scan(self, intervals=None):
+        """Scan every symbol now; intervals only labels which bars closed"""
+        started = time.perf_counter()
+        results = self.engine.scan_multiple_symbols(self.symbols, self.workflow,
+                                                    max_workers=self.max_workers)
+        elapsed = time.perf_counter() - started
+        
+        if self.alert_engine is not None:
+            self.alert_engine.observe_frame(results, self.workflow)
+            self.alert_engine.flush()
+        if self.on_results:
+            self.on_results(results, intervals or self.intervals, elapsed)
+        return results, elapsed
+    
+    def prewarm_cache(self):
+        """Fetch every (symbol, interval) into the data cache before the open"""
+        for symbol in self.symbols:
+            if self._stop.is_set():
+                break
+            for interval in self.intervals:
+                self.engine.download_data(symbol, interval)
+    
+    def run(self, should_stop=None, log=print):
+        """Block, sleeping until each event, until stop() or should_stop()"""
+        while not self._stop.is_set() and not (should_stop and should_stop()):
+            when, kind, intervals = self.next_event()
+            log(f"Next {kind} at {when:%Y-%m-%d %H:%M:%S %Z} ({', '.join(intervals)})")
+            
+            # Sleep in short slices so stop requests are honoured promptly
+            while not self._stop.is_set():
+                remaining = (when - self.calendar.now()).total_seconds()
+                if remaining <= 0 or (should_stop and should_stop()):
+                    break
+                self._stop.wait(min(remaining, 30.0))
+            if self._stop.is_set() or (should_stop and should_stop()):
+                break
+            
+            try:
+                if kind == 'prewarm':
+                    self.prewarm_cache()
+                    log(f"Pre-warmed {len(self.symbols)} symbols x {len(self.intervals)} intervals")
+                else:
+                    results, elapsed = self.run_scan(intervals)
+                    self.history.append((when, intervals, len(results), elapsed))
+                    log(f"Scanned {len(self.symbols)} symbols for {', '.join(intervals)} "
+                        f"close in {elapsed:.1f}s")
+            except Exception as e:
+                traceback.print_exc()
+                log(f"Scheduled {kind} failed: {e}")
+    
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,172 @@
+"""
+Signal Query Module
+"When did this fire": rules and setups evaluated on every bar of cached multi-timeframe history
+"""
+
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from modules.backtest import Backtester, asof_positions
+from modules.patterns import LEVEL_COLUMNS, LEVEL_PATTERNS
+from modules.rule_engine import RuleEngine, SetupLibrary
+from modules.scan_results import PATTERN_FLAGS
+
+
+# Indicators computed for queries (patterns are only computed when a query names them)
+DEFAULT_INDICATORS = ['Yoda', 'RSI', 'MACD', 'ADX', 'BB', 'ATR', 'Stochastic',
+                      'EMA_5', 'EMA_20', 'EMA_50', 'SMA_200', 'AVG_Volume', 'RVOL', 'Dollar_Volume']
+
+EVENT_COLUMNS = ['Symbol', 'Timestamp', 'Timeframe', 'Setup', 'Close']
+
+
+def referenced_columns(rule):
+    """Every indicator / reference name used in a rule tree"""
+    if 'conditions' in rule:
+        return set().union(*[referenced_columns(c) for c in rule['conditions']]) if rule['conditions'] else set()
+    return {name for name in (rule.get('indicator'), rule.get('reference')) if name}
+
+
+class SignalQuery:
+    """
+    Evaluates setups and text rules on every bar of each symbol's history
+    and returns the bars where they were true as a sparse event table.
+    A query is a SetupLibrary name (e.g. 'Momentum_Long') or a text rule
+    whose columns may be qualified with a timeframe, e.g.
+    'Tide.Buy_Signal == 1 AND Wave.RSI > 50' (unqualified = the `on` timeframe).
+    Rules run as boolean arrays over all bars; columns of other timeframes
+    are joined as of each `on` bar's close, so a bar only sees lower and
+    higher timeframe bars that had completed by then.
+    """
+    
+    def __init__(self, engine=None, timeframes=None, indicators=None, period='6mo'):
+        self.backtester = Backtester(engine, period=period)
+        self.engine = self.backtester.engine
+        self.timeframes = dict(timeframes or self.engine.timeframe_map)
+        self.indicators = list(indicators or DEFAULT_INDICATORS)
+        self.rule_engine = RuleEngine()
+    
+    def compile(self, query):
+        """('setup', setup) for a SetupLibrary name, else ('rule', rule tree)"""
+        setups = SetupLibrary.get_all_setups()
+        if isinstance(query, str) and query in setups:
+            return 'setup', setups[query]
+        rule = self.rule_engine.parse_text_rule(query) if isinstance(query, str) else query
+        if not rule:
+            raise ValueError(f"Cannot parse query: {query}")
+        if 'type' not in rule:
+            rule = {'type': 'AND', 'conditions': [rule]}
+        return 'rule', rule
+    
+    def _split(self, name, on):
+        """'Wave.RSI' -> ('Wave', 'RSI'); unqualified names belong to `on`"""
+        tf_name, _, column = name.partition('.')
+        if column and tf_name in self.timeframes:
+            return tf_name, column
+        return on, name
+    
+    def requirements(self, compiled, on):
+        """(timeframes, patterns) the compiled queries need"""
+        timeframes = {on}
+        names = set()
+        for kind, spec in compiled.values():
+            if kind == 'setup':
+                timeframes.update(tf for tf in spec['timeframes'] if tf in self.timeframes)
+                for tf_spec in spec['timeframes'].values():
+                    for rule in tf_spec.get('rules', []):
+                        names |= referenced_columns(rule)
+            else:
+                for name in referenced_columns(spec):
+                    tf_name, column = self._split(name, on)
+                    timeframes.add(tf_name)
+                    names.add(column)
+        patterns = [p for p in PATTERN_FLAGS.names if p in names]
+        # Level prices / distances come with any level pattern
+        if names.intersection(LEVEL_COLUMNS) and not set(patterns).intersection(LEVEL_PATTERNS):
+            patterns.append(LEVEL_PATTERNS[0])
+        return [tf for tf in self.timeframes if tf in timeframes], patterns
+    
+    def evaluate_rule(self, frames, rule, on):
+        """Boolean array of a (possibly timeframe-qualified) rule on the bars of `on`"""
+        base = frames[on]
+        positions = {}
+        view = {}
+        for name in referenced_columns(rule):
+            tf_name, column = self._split(name, on)
+            df = frames.get(tf_name)
+            if df is None or column not in df.columns:
+                continue
+            values = np.asarray(df[column], dtype=float)
+            if tf_name == on:
+                view[name] = values
+                continue
+            if tf_name not in positions:
+                positions[tf_name] = asof_positions(df.index, base.index, self.timeframes[tf_name],
+                                                    self.timeframes[on])
+            rows = positions[tf_name]
+            view[name] = np.where(rows >= 0, values[np.maximum(rows, 0)], np.nan)
+        return self.rule_engine.evaluate_rule_series(pd.DataFrame(view, index=base.index), rule)
+    
+    @staticmethod
+    def cutoff(since, latest):
+        """Timestamp from a date or an offset ('30D') back from the latest bar"""
+        if isinstance(since, str):
+            try:
+                since = pd.Timedelta(since)
+            except ValueError:
+                return pd.Timestamp(since)
+        if isinstance(since, pd.Timedelta):
+            return latest - since
+        return pd.Timestamp(since)
+    
+    def run(self, symbols, queries, since=None, on='Tide', progress_callback=None):
+        """
+        Event table (Symbol, Timestamp, Timeframe, Setup, Close) of the `on`
+        bars where each query was true. queries is one query or {name: query};
+        since is a timestamp or an offset such as '30D' back from the latest bar.
+        """
+        if not isinstance(queries, dict):
+            queries = {str(queries): queries}
+        compiled = {name: self.compile(query) for name, query in queries.items()}
+        timeframes, patterns = self.requirements(compiled, on)
+        workflow = {
+            'indicators': self.indicators,
+            'patterns': patterns,
+            'timeframes': {tf: self.timeframes[tf] for tf in timeframes},
+        }
+        
+        events = []
+        latest = None
+        for i, symbol in enumerate(symbols):
+            if progress_callback:
+                progress_callback(i + 1, len(symbols), symbol)
+            try:
+                frames = self.backtester.load(symbol, workflow)
+                base = frames.get(on)
+                if base is None:
+                    continue
+                latest = base.index[-1] if latest is None else max(latest, base.index[-1])
+                for name, (kind, spec) in compiled.items():
+                    if kind == 'setup':
+                        fired = self.backtester.setup_series(spec, frames, base.index, self.timeframes, on)
+                    else:
+                        fired = self.evaluate_rule(frames, spec, on)
+                    rows = np.flatnonzero(fired)
+                    if len(rows):
+                        events.append(pd.DataFrame({
+                            'Symbol': symbol,
+                            'Timestamp': base.index[rows],
+                            'Timeframe': on,
+                            'Setup': name,
+                            'Close': np.asarray(base['Close'], dtype=float)[rows],
+                        }))
+            except Exception as e:
+                traceback.print_exc()
+        
+        if not events:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+        table = pd.concat(events, ignore_index=True)
+        if since is not None:
+            table = table[table['Timestamp'] >= self.cutoff(since, latest)]
+        return table.sort_values(['Timestamp', 'Symbol', 'Setup'], kind='stable', ignore_index=True)
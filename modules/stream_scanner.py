@@ -0,0 +1,197 @@
+"""
+Stream Scanner Module
+Live scanning mode: per-symbol rolling state updated bar by bar
+"""
+
+import time
+import traceback
+from collections import deque
+from itertools import islice
+from typing import Any, NamedTuple
+
+import pandas as pd
+
+from modules.cross_section import trailing_returns
+from modules.patterns import LAST_BAR_WINDOWS, PATTERN_HISTORY
+from modules.scan_results import results_to_frame
+from modules.streaming_indicators import StreamingIndicatorSet
+
+
+class SignalEvent(NamedTuple):
+    """A change of Signal / Patterns / Setups for one symbol"""
+    Symbol: str
+    Timeframe: str
+    Timestamp: Any
+    Field: str
+    Previous: int
+    Current: int
+    Result: Any
+    Latency_ms: float
+
+
+class _SymbolState:
+    """Rolling state for one (symbol, timeframe)"""
+    
+    def __init__(self, indicators, pattern_window):
+        self.indicators = StreamingIndicatorSet(indicators)
+        self.bars = deque(maxlen=pattern_window)
+        self.last_timestamp = None
+        self.row = None
+
+
+class StreamingScanner:
+    """
+    Consumes bars from a BarFeed and re-evaluates the workflow only for
+    the symbol that just received a bar. Indicators are updated per bar
+    via StreamingIndicatorSet. Windowed pattern detectors run on just the
+    tail their last value depends on (LAST_BAR_WINDOWS); the others
+    (levels, divergences, head and shoulders) on the last `pattern_window`
+    bars. Feeds are expected to deliver completed bars:
+    a bar whose timestamp is not newer than the last one is ignored.
+    """
+    
+    EVENT_FIELDS = ('Signal', 'Pattern_Mask', 'Setup_Mask')
+    
+    def __init__(self, workflow, engine=None, pattern_window=PATTERN_HISTORY):
+        if engine is None:
+            from modules.scanner_engine import ScannerEngine
+            engine = ScannerEngine()
+        self.engine = engine
+        self.workflow = workflow
+        self.timeframes = workflow.get('timeframes', engine.timeframe_map)
+        self.indicators = workflow.get('indicators', ['Yoda'])
+        self.patterns = workflow.get('patterns', [])
+        self.pattern_window = pattern_window
+        
+        # (tail length or None for the whole window, patterns evaluated on it)
+        windows = {}
+        for pattern in self.patterns:
+            windows.setdefault(LAST_BAR_WINDOWS.get(pattern), []).append(pattern)
+        self._pattern_groups = list(windows.items())
+        self._pattern_span = None if None in windows else max(windows, default=None)
+        
+        self.interval_to_tf = {}
+        for tf_name, interval in self.timeframes.items():
+            self.interval_to_tf.setdefault(interval, []).append(tf_name)
+        
+        self._states = {}
+        self.results = {}
+        self.bars_processed = 0
+    
+    def seed(self, symbol, frames):
+        """Seed a symbol from historical frames {timeframe name: OHLCV DataFrame}"""
+        for tf_name, df in frames.items():
+            if tf_name not in self.timeframes or df is None or len(df) == 0:
+                continue
+            df = self.engine.indicator_lib.normalize_ohlc(df)
+            state = _SymbolState(self.indicators, self.pattern_window)
+            state.indicators.seed(df)
+            tail = df.iloc[-self.pattern_window:]
+            for ts, o, h, l, c, v in zip(tail.index, tail['Open'], tail['High'], tail['Low'],
+                                         tail['Close'], tail['Volume']):
+                state.bars.append((ts, o, h, l, c, v))
+            state.last_timestamp = pd.Timestamp(df.index[-1])
+            state.row = self._with_patterns(state, dict(state.indicators.row))
+            self._states[(symbol, tf_name)] = state
+        result = self._summarize(symbol)
+        if result is not None:
+            self.results[symbol] = result
+        return result
+    
+    def seed_from_engine(self, symbols):
+        """Download history through the engine and seed every symbol"""
+        for symbol in symbols:
+            frames = {tf: self.engine.download_data(symbol, interval)
+                      for tf, interval in self.timeframes.items()}
+            self.seed(symbol, frames)
+    
+    def on_bar(self, bar):
+        """Apply one bar; returns the list of SignalEvents it caused"""
+        symbol = bar['Symbol']
+        tf_names = self.interval_to_tf.get(bar.get('Interval'), [])
+        timestamp = pd.Timestamp(bar['Timestamp'])
+        updated = []
+        
+        for tf_name in tf_names:
+            state = self._states.get((symbol, tf_name))
+            if state is None:
+                state = _SymbolState(self.indicators, self.pattern_window)
+                self._states[(symbol, tf_name)] = state
+            elif state.last_timestamp is not None and timestamp <= state.last_timestamp:
+                continue
+            row = state.indicators.update(bar)
+            state.bars.append((timestamp, bar['Open'], bar['High'], bar['Low'],
+                               bar['Close'], bar['Volume']))
+            state.last_timestamp = timestamp
+            state.row = self._with_patterns(state, row)
+            updated.append(tf_name)
+        
+        if not updated:
+            return []
+        self.bars_processed += 1
+        
+        previous = self.results.get(symbol)
+        result = self._summarize(symbol)
+        if result is None:
+            return []
+        self.results[symbol] = result
+        
+        received = bar.get('Received')
+        latency = (time.perf_counter() - received) * 1000.0 if received else float('nan')
+        events = []
+        for field in self.EVENT_FIELDS:
+            before = getattr(previous, field) if previous is not None else 0
+            after = getattr(result, field)
+            if before != after:
+                events.append(SignalEvent(symbol, ','.join(updated), timestamp, field,
+                                          int(before), int(after), result, latency))
+        return events
+    
+    def run(self, feed, on_event=None, should_stop=None):
+        """Consume a feed until it ends or should_stop() returns True"""
+        for bar in feed:
+            if should_stop and should_stop():
+                feed.close()
+                break
+            events = self.on_bar(bar)
+            if on_event:
+                for event in events:
+                    on_event(event)
+        return self.results_frame()
+    
+    def results_frame(self):
+        """Latest ScanResult of every symbol seen so far"""
+        return results_to_frame(self.results.values())
+    
+    def _with_patterns(self, state, row):
+        if not self.patterns or len(state.bars) == 0:
+            return row
+        # One frame of the longest tail any group needs; groups read views of it
+        bars = state.bars
+        if self._pattern_span is not None and self._pattern_span < len(bars):
+            bars = islice(bars, len(bars) - self._pattern_span, None)
+        timestamps, *values = zip(*bars)
+        frame = pd.DataFrame(dict(zip(['Open', 'High', 'Low', 'Close', 'Volume'], values)),
+                             index=pd.DatetimeIndex(timestamps, name='Timestamp'), dtype=float)
+        
+        for window, patterns in self._pattern_groups:
+            tail = frame if window is None else frame.iloc[-window:]
+            try:
+                columns = self.engine.detect_patterns(tail, patterns)
+            except Exception as e:
+                traceback.print_exc()
+                continue
+            for pattern in patterns:
+                if pattern in columns:
+                    row[pattern] = bool(columns[pattern].iloc[-1])
+        return row
+    
+    def _summarize(self, symbol):
+        last_rows = {tf: getattr(self._states.get((symbol, tf)), 'row', None)
+                     for tf in self.timeframes}
+        returns = {}
+        for tf in self.timeframes:
+            state = self._states.get((symbol, tf))
+            if state is not None:
+                returns[tf] = trailing_returns([b[4] for b in state.bars])
+        return self.engine.summarize_latest(symbol, last_rows, self.workflow, returns)
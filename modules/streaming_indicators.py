@@ -0,0 +1,588 @@
+"""
+Streaming Indicators Module
+Stateful per-bar counterparts of the IndicatorLibrary indicators: O(1) per
+bar, except the rolling median, which is O(window)
+"""
+
+import bisect
+import math
+from collections import deque
+
+import numpy as np
+
+
+NAN = float('nan')
+
+
+def _bar_values(bar):
+    """(open, high, low, close, volume) from a dict / Series / namedtuple bar"""
+    get = bar.get if hasattr(bar, 'get') else (lambda k, d=None: getattr(bar, k, d))
+    close = float(get('Close'))
+    volume = get('Volume', 0.0)
+    return (
+        float(get('Open', close)),
+        float(get('High', close)),
+        float(get('Low', close)),
+        close,
+        0.0 if volume is None else float(volume),
+    )
+
+
+class _EWM:
+    """
+    Exponential mean with pandas ewm(adjust=False) semantics: leading NaNs
+    are skipped and output is NaN until min_periods valid values were seen
+    """
+    
+    def __init__(self, alpha, min_periods):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.mean = None
+        self.count = 0
+    
+    def update(self, x):
+        if not math.isnan(x):
+            if self.mean is None:
+                self.mean = x
+            else:
+                self.mean = (1.0 - self.alpha) * self.mean + self.alpha * x
+            self.count += 1
+        if self.mean is None or self.count < self.min_periods:
+            return NAN
+        return self.mean
+
+
+class _RollingMean:
+    """NaN-aware rolling mean, same as Series.rolling(window, min_periods).mean()"""
+    
+    def __init__(self, window, min_periods):
+        self.window = window
+        self.min_periods = min_periods
+        self.values = deque()
+        self.total = 0.0
+        self.count = 0
+    
+    def update(self, x):
+        self.values.append(x)
+        if not math.isnan(x):
+            self.total += x
+            self.count += 1
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if not math.isnan(old):
+                self.total -= old
+                self.count -= 1
+        if self.count < self.min_periods or self.count == 0:
+            return NAN
+        return self.total / self.count
+
+
+class _RollingMedian:
+    """
+    Rolling median over a sorted copy of the window, same as
+    rolling(window).median(). Insert and remove shift the list, so an update
+    is O(window); for the short volume windows this is cheaper than heaps
+    """
+    
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.ordered = []
+    
+    def update(self, x):
+        self.values.append(x)
+        if not math.isnan(x):
+            bisect.insort(self.ordered, x)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if not math.isnan(old):
+                del self.ordered[bisect.bisect_left(self.ordered, old)]
+        n = len(self.ordered)
+        if n < self.window:
+            return NAN
+        mid = n // 2
+        return self.ordered[mid] if n % 2 else (self.ordered[mid - 1] + self.ordered[mid]) / 2.0
+
+
+class _RollingMoments:
+    """Windowed Welford mean / population std (rolling(window).std(ddof=0))"""
+    
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+    
+    def update(self, x):
+        self.values.append(x)
+        n = len(self.values)
+        delta = x - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (x - self.mean)
+        if n > self.window:
+            old = self.values.popleft()
+            n -= 1
+            delta = old - self.mean
+            self.mean -= delta / n
+            self.m2 -= delta * (old - self.mean)
+        if n < self.window:
+            return NAN, NAN
+        return self.mean, math.sqrt(max(self.m2, 0.0) / n)
+
+
+class _RollingExtreme:
+    """Monotonic-deque rolling max (or min), amortised O(1)"""
+    
+    def __init__(self, window, kind='max'):
+        self.window = window
+        self.better = (lambda a, b: a >= b) if kind == 'max' else (lambda a, b: a <= b)
+        self.items = deque()
+        self.i = 0
+    
+    def update(self, x):
+        while self.items and self.better(x, self.items[-1][1]):
+            self.items.pop()
+        self.items.append((self.i, x))
+        if self.items[0][0] <= self.i - self.window:
+            self.items.popleft()
+        self.i += 1
+        if self.i < self.window:
+            return NAN
+        return self.items[0][1]
+
+
+class _WilderAverage:
+    """ta-style Wilder average: plain mean of the first `window` inputs, then (prev*(w-1)+x)/w"""
+    
+    def __init__(self, window):
+        self.window = window
+        self.seed = []
+        self.value = None
+    
+    def update(self, x):
+        if self.value is None:
+            self.seed.append(x)
+            if len(self.seed) == self.window:
+                self.value = sum(self.seed) / self.window
+                self.seed = None
+            return self.value
+        self.value = (self.value * (self.window - 1) + x) / self.window
+        return self.value
+
+
+class StreamingIndicator:
+    """
+    Base class: seed() once from a historical OHLCV frame, then call
+    update(bar) for every new bar. Outputs equal the batch IndicatorLibrary
+    values for the same bar.
+    """
+    
+    def seed(self, df):
+        """Replay a historical frame; returns self"""
+        n = len(df)
+        close = np.asarray(df['Close'], dtype=float)
+        cols = []
+        for col in ('Open', 'High', 'Low'):
+            cols.append(np.asarray(df[col], dtype=float) if col in df.columns else close)
+        volume = np.asarray(df['Volume'], dtype=float) if 'Volume' in df.columns else np.zeros(n)
+        for o, h, l, c, v in zip(cols[0], cols[1], cols[2], close, volume):
+            self.value = self.step(o, h, l, c, v)
+        return self
+    
+    def update(self, bar):
+        """Feed one bar (dict, Series or namedtuple with OHLCV fields)"""
+        self.value = self.step(*_bar_values(bar))
+        return self.value
+    
+    def step(self, o, h, l, c, v):
+        raise NotImplementedError
+
+
+class StreamingSMA(StreamingIndicator):
+    """calculate_sma: rolling mean with min_periods=1"""
+    
+    def __init__(self, period=20):
+        self._mean = _RollingMean(period, 1)
+        self.value = NAN
+    
+    def step(self, o, h, l, c, v):
+        return self._mean.update(c)
+
+
+class StreamingEMA(StreamingIndicator):
+    """calculate_ema (ta EMAIndicator)"""
+    
+    def __init__(self, period=20):
+        self._ewm = _EWM(2.0 / (period + 1), period)
+        self.value = NAN
+    
+    def step(self, o, h, l, c, v):
+        return self._ewm.update(c)
+
+
+class StreamingRSI(StreamingIndicator):
+    """calculate_rsi (Wilder smoothing, ta RSIIndicator)"""
+    
+    def __init__(self, period=14):
+        self._up = _EWM(1.0 / period, period)
+        self._down = _EWM(1.0 / period, period)
+        self._prev = None
+        self.value = NAN
+    
+    def step(self, o, h, l, c, v):
+        diff = NAN if self._prev is None else c - self._prev
+        self._prev = c
+        up = self._up.update(diff if diff > 0 else 0.0)
+        down = self._down.update(-diff if diff < 0 else 0.0)
+        if math.isnan(down):
+            return NAN
+        if down == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + up / down)
+
+
+class StreamingMACD(StreamingIndicator):
+    """calculate_macd -> {'macd', 'signal', 'histogram'}"""
+    
+    def __init__(self, fast=12, slow=26, signal=9):
+        self._fast = _EWM(2.0 / (fast + 1), fast)
+        self._slow = _EWM(2.0 / (slow + 1), slow)
+        self._signal = _EWM(2.0 / (signal + 1), signal)
+        self.value = {'macd': NAN, 'signal': NAN, 'histogram': NAN}
+    
+    def step(self, o, h, l, c, v):
+        macd = self._fast.update(c) - self._slow.update(c)
+        signal = self._signal.update(macd)
+        return {'macd': macd, 'signal': signal, 'histogram': macd - signal}
+
+
+class StreamingBollinger(StreamingIndicator):
+    """calculate_bollinger_bands -> {'upper', 'middle', 'lower'}"""
+    
+    def __init__(self, period=20, std_dev=2):
+        self._moments = _RollingMoments(period)
+        self.std_dev = std_dev
+        self.value = {'upper': NAN, 'middle': NAN, 'lower': NAN}
+    
+    def step(self, o, h, l, c, v):
+        mean, std = self._moments.update(c)
+        return {
+            'upper': mean + self.std_dev * std,
+            'middle': mean,
+            'lower': mean - self.std_dev * std,
+        }
+
+
+class StreamingATR(StreamingIndicator):
+    """calculate_atr (ta AverageTrueRange: 0.0 during warm-up)"""
+    
+    def __init__(self, period=14):
+        self._avg = _WilderAverage(period)
+        self._prev_close = None
+        self.value = 0.0
+    
+    def step(self, o, h, l, c, v):
+        if self._prev_close is None:
+            tr = h - l
+        else:
+            tr = max(h - l, abs(h - self._prev_close), abs(l - self._prev_close))
+        self._prev_close = c
+        atr = self._avg.update(tr)
+        return 0.0 if atr is None else atr
+
+
+class StreamingADX(StreamingIndicator):
+    """calculate_adx -> {'adx', 'di_plus', 'di_minus'} (ta ADXIndicator semantics)"""
+    
+    def __init__(self, period=14):
+        self.period = period
+        self._i = 0
+        self._prev = None
+        self._tr = self._dmp = self._dmn = 0.0
+        self._dx_seed = []
+        self._adx = None
+        self.value = {'adx': 0.0, 'di_plus': 0.0, 'di_minus': 0.0}
+    
+    def step(self, o, h, l, c, v):
+        w = self.period
+        i = self._i
+        self._i += 1
+        if self._prev is None:
+            self._prev = (h, l, c)
+            return {'adx': 0.0, 'di_plus': 0.0, 'di_minus': 0.0}
+        
+        ph, pl, pc = self._prev
+        self._prev = (h, l, c)
+        tr = max(h, pc) - min(l, pc)
+        up, down = h - ph, pl - l
+        dmp = up if (up > down and up > 0) else 0.0
+        dmn = down if (down > up and down > 0) else 0.0
+        
+        # Sums over bars 1..w seed the Wilder smoothing at bar w
+        if i <= w:
+            self._tr += tr
+            self._dmp += dmp
+            self._dmn += dmn
+        else:
+            self._tr += tr - self._tr / w
+            self._dmp += dmp - self._dmp / w
+            self._dmn += dmn - self._dmn / w
+        if i < w:
+            return {'adx': 0.0, 'di_plus': 0.0, 'di_minus': 0.0}
+        
+        di_plus = 100.0 * self._dmp / self._tr if self._tr != 0 else 0.0
+        di_minus = 100.0 * self._dmn / self._tr if self._tr != 0 else 0.0
+        di_sum = di_plus + di_minus
+        dx = 100.0 * abs((di_plus - di_minus) / di_sum) if di_sum != 0 else 0.0
+        
+        if self._adx is None:
+            self._dx_seed.append(dx)
+            if len(self._dx_seed) == w:
+                self._adx = sum(self._dx_seed) / w
+                self._dx_seed = None
+        else:
+            self._adx = (self._adx * (w - 1) + dx) / w
+        
+        # ta reports 0 for the DI lines on the seed bar itself
+        if i == w:
+            di_plus = di_minus = 0.0
+        return {'adx': 0.0 if self._adx is None else self._adx,
+                'di_plus': di_plus, 'di_minus': di_minus}
+
+
+class StreamingStochastic(StreamingIndicator):
+    """calculate_stochastic -> {'k', 'd'}"""
+    
+    def __init__(self, period=14, smooth_k=3, smooth_d=3):
+        self._high = _RollingExtreme(period, 'max')
+        self._low = _RollingExtreme(period, 'min')
+        self._d = _RollingMean(smooth_k, smooth_k)
+        self.value = {'k': NAN, 'd': NAN}
+    
+    def step(self, o, h, l, c, v):
+        hh = self._high.update(h)
+        ll = self._low.update(l)
+        rng = hh - ll
+        if math.isnan(rng):
+            k = NAN
+        elif rng == 0:
+            k = NAN if c == ll else math.copysign(math.inf, c - ll)
+        else:
+            k = 100.0 * (c - ll) / rng
+        return {'k': k, 'd': self._d.update(k)}
+
+
+class StreamingOBV(StreamingIndicator):
+    """calculate_obv (ta: volume counts as positive unless close fell)"""
+    
+    def __init__(self):
+        self._prev = None
+        self.value = 0.0
+    
+    def step(self, o, h, l, c, v):
+        signed = -v if (self._prev is not None and c < self._prev) else v
+        self._prev = c
+        return self.value + signed
+
+
+class StreamingVWAP(StreamingIndicator):
+    """calculate_vwap (cumulative since the start of the series)"""
+    
+    def __init__(self):
+        self._pv = 0.0
+        self._v = 0.0
+        self.value = NAN
+    
+    def step(self, o, h, l, c, v):
+        self._pv += c * v
+        self._v += v
+        return self._pv / self._v if self._v != 0 else NAN
+
+
+class StreamingAvgVolume(StreamingIndicator):
+    """calculate_avg_volume"""
+    
+    def __init__(self, period=20):
+        self._mean = _RollingMean(period, period)
+        self.value = NAN
+    
+    def step(self, o, h, l, c, v):
+        return self._mean.update(v)
+
+
+class StreamingMedianVolume(StreamingIndicator):
+    """calculate_median_volume"""
+    
+    def __init__(self, period=20):
+        self._median = _RollingMedian(period)
+        self.value = NAN
+    
+    def step(self, o, h, l, c, v):
+        return self._median.update(v)
+
+
+class StreamingRVOL(StreamingIndicator):
+    """calculate_rvol: volume over the previous bars' average"""
+    
+    def __init__(self, period=20):
+        self._mean = _RollingMean(period, period)
+        self._previous = NAN
+        self.value = NAN
+    
+    def step(self, o, h, l, c, v):
+        average = self._previous
+        self._previous = self._mean.update(v)
+        return v / average if average > 0 else NAN
+
+
+class StreamingDollarVolume(StreamingIndicator):
+    """calculate_dollar_volume"""
+    
+    def __init__(self, period=20):
+        self._mean = _RollingMean(period, period)
+        self.value = NAN
+    
+    def step(self, o, h, l, c, v):
+        return self._mean.update(c * v)
+
+
+class StreamingYoda(StreamingIndicator):
+    """
+    yoda_indicator: rising MACD / signal state, SMA crosses, TTM squeeze and the
+    combined Buy_Signal / Sell_Signal, one bar at a time
+    """
+    
+    def __init__(self, fa=12, sa=26, sig=9, sma_length=50,
+                 length_squeeze=20, bb_mult=2.0, kc_mult=1.5):
+        self._fast = _EWM(2.0 / (fa + 1), fa)
+        self._slow = _EWM(2.0 / (sa + 1), sa)
+        self._signal = _RollingMean(sig, 1)
+        self._sma = _RollingMean(sma_length, 1)
+        self._bb = StreamingBollinger(length_squeeze, bb_mult)
+        self._atr = StreamingATR(length_squeeze)
+        self.kc_mult = kc_mult
+        
+        self._prev_macd = NAN
+        self._prev_signal = NAN
+        self._prev_close = NAN
+        self._prev_sma = NAN
+        self._prev_green = False
+        self._prev_red = False
+        self._prev_squeeze = False
+        self.value = None
+    
+    def step(self, o, h, l, c, v):
+        macd = self._fast.update(c) - self._slow.update(c)
+        signal = self._signal.update(macd)
+        macd_up = macd > self._prev_macd
+        signal_up = signal > self._prev_signal
+        is_green = macd_up and signal_up
+        is_red = (not macd_up) and (not signal_up)
+        
+        sma = self._sma.update(c)
+        cross_up = (self._prev_close < self._prev_sma) and (c > sma)
+        cross_down = (self._prev_close > self._prev_sma) and (c < sma)
+        
+        bb = self._bb.step(o, h, l, c, v)
+        atr = self._atr.step(o, h, l, c, v)
+        kc_upper = bb['middle'] + atr * self.kc_mult
+        kc_lower = bb['middle'] - atr * self.kc_mult
+        in_squeeze = (bb['lower'] >= kc_lower) and (bb['upper'] <= kc_upper)
+        
+        buy_macd = is_green and not self._prev_green
+        sell_macd = is_red and not self._prev_red
+        out = {
+            'MACD': macd,
+            'Signal': signal,
+            'MACD_Up': macd_up,
+            'Signal_Up': signal_up,
+            'SMA': sma,
+            'CrossUp': cross_up,
+            'CrossDown': cross_down,
+            'Buy_MACD': buy_macd,
+            'Sell_MACD': sell_macd,
+            'TTM_Fired': (not in_squeeze) and self._prev_squeeze,
+            'Buy_Signal': buy_macd or cross_up,
+            'Sell_Signal': sell_macd or cross_down,
+        }
+        
+        self._prev_macd, self._prev_signal = macd, signal
+        self._prev_close, self._prev_sma = c, sma
+        self._prev_green, self._prev_red = is_green, is_red
+        self._prev_squeeze = in_squeeze
+        return out
+
+
+class StreamingIndicatorSet:
+    """
+    Streaming version of ScannerEngine.calculate_indicators: one object per
+    symbol/timeframe that turns each bar into a row dict with the same
+    column names the batch path produces
+    """
+    
+    def __init__(self, indicator_list):
+        self.indicator_list = list(indicator_list)
+        self.indicators = []
+        for name in self.indicator_list:
+            factory = self.FACTORIES.get(name)
+            if factory is not None:
+                self.indicators.append((name, factory()))
+        self.row = {}
+    
+    FACTORIES = {
+        'Yoda': StreamingYoda,
+        'RSI': StreamingRSI,
+        'MACD': StreamingMACD,
+        'BB': StreamingBollinger,
+        'ATR': StreamingATR,
+        'ADX': StreamingADX,
+        'Stochastic': StreamingStochastic,
+        'OBV': StreamingOBV,
+        'VWAP': StreamingVWAP,
+        'AVG_Volume': StreamingAvgVolume,
+        'Median_Volume': StreamingMedianVolume,
+        'RVOL': StreamingRVOL,
+        'Dollar_Volume': StreamingDollarVolume,
+        'EMA_5': lambda: StreamingEMA(5),
+        'EMA_20': lambda: StreamingEMA(20),
+        'EMA_50': lambda: StreamingEMA(50),
+        'SMA_200': lambda: StreamingSMA(200),
+    }
+    
+    def seed(self, df):
+        """Replay history through every indicator; returns self"""
+        for _, indicator in self.indicators:
+            indicator.seed(df)
+        if len(df):
+            self.row = self._assemble(df.iloc[-1])
+        return self
+    
+    def update(self, bar):
+        """Feed one bar and return the latest row of indicator columns"""
+        o, h, l, c, v = _bar_values(bar)
+        for _, indicator in self.indicators:
+            indicator.value = indicator.step(o, h, l, c, v)
+        self.row = self._assemble(bar)
+        return self.row
+    
+    def _assemble(self, bar):
+        o, h, l, c, v = _bar_values(bar)
+        row = {'Open': o, 'High': h, 'Low': l, 'Close': c, 'Volume': v}
+        for name, indicator in self.indicators:
+            value = indicator.value
+            if name == 'Yoda':
+                row.update(value)
+            elif name == 'MACD':
+                row.update({'MACD': value['macd'], 'MACD_Signal': value['signal'],
+                            'MACD_Hist': value['histogram']})
+            elif name == 'BB':
+                row.update({'BB_Upper': value['upper'], 'BB_Middle': value['middle'],
+                            'BB_Lower': value['lower']})
+            elif name == 'ADX':
+                row.update({'ADX': value['adx'], 'DI_Plus': value['di_plus'],
+                            'DI_Minus': value['di_minus']})
+            elif name == 'Stochastic':
+                row.update({'Stoch_K': value['k'], 'Stoch_D': value['d']})
+            else:
+                row[name] = value
+        return row
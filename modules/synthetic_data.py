@@ -0,0 +1,180 @@
+"""
+Synthetic Data Module
+Deterministic regime-switching GBM OHLCV data for benchmarks and offline runs
+"""
+
+import zlib
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from modules.market_calendar import INTRADAY_MINUTES
+
+
+# Per-bar drift / volatility of each regime at daily scale, and the
+# Markov matrix of switching between them
+DEFAULT_REGIMES = {
+    'bull': (0.0008, 0.012),
+    'bear': (-0.0010, 0.022),
+    'range': (0.0, 0.008),
+}
+DEFAULT_TRANSITIONS = np.array([
+    [0.97, 0.01, 0.02],
+    [0.02, 0.95, 0.03],
+    [0.03, 0.02, 0.95],
+])
+
+# Price shapes as (position in window, relative level) knots
+PATTERN_TEMPLATES = {
+    'double_bottom': [(0.0, 1.00), (0.25, 0.88), (0.5, 0.96), (0.75, 0.88), (1.0, 1.02)],
+    'double_top': [(0.0, 1.00), (0.25, 1.12), (0.5, 1.04), (0.75, 1.12), (1.0, 0.98)],
+    'head_shoulders': [(0.0, 1.00), (0.2, 1.08), (0.35, 1.02), (0.5, 1.15), (0.65, 1.02),
+                       (0.8, 1.08), (1.0, 0.97)],
+    'inv_head_shoulders': [(0.0, 1.00), (0.2, 0.92), (0.35, 0.98), (0.5, 0.85), (0.65, 0.98),
+                           (0.8, 0.92), (1.0, 1.03)],
+    'cup_handle': [(0.0, 1.00), (0.3, 0.85), (0.6, 0.85), (0.85, 1.00), (0.92, 0.96), (1.0, 1.03)],
+    'breakout_up': [(0.0, 1.00), (0.9, 1.00), (1.0, 1.06)],
+    'breakout_down': [(0.0, 1.00), (0.9, 1.00), (1.0, 0.94)],
+    'flag': [(0.0, 1.00), (0.4, 1.12), (0.9, 1.09), (1.0, 1.14)],
+}
+
+BARS_PER_YEAR = {'1d': 252, '5d': 52, '1wk': 52, '1mo': 12, '3mo': 4}
+
+
+def _stable_seed(*parts):
+    """Seed from strings/ints that is identical across processes (unlike hash())"""
+    return zlib.crc32('|'.join(str(p) for p in parts).encode('utf-8'))
+
+
+@lru_cache(maxsize=64)
+def _timestamps(interval, bars, end):
+    """Bar timestamps ending at `end`, regular-hours only for intraday intervals"""
+    end = pd.Timestamp(end).normalize()
+    minutes = INTRADAY_MINUTES.get(interval)
+    if minutes is not None:
+        per_day = max(1, int(np.ceil(390 / minutes)))
+        days = pd.bdate_range(end=end, periods=int(np.ceil(bars / per_day)))
+        offsets = pd.to_timedelta(570 + minutes * np.arange(per_day), unit='m')
+        stamps = (days.values[:, None] + offsets.values[None, :]).ravel()
+        return pd.DatetimeIndex(stamps[-bars:])
+    if interval in ('1wk', '5d'):
+        return pd.date_range(end=end, periods=bars, freq='W-MON')
+    if interval in ('1mo', '3mo'):
+        return pd.date_range(end=end, periods=bars, freq='MS' if interval == '1mo' else 'QS')
+    return pd.bdate_range(end=end, periods=bars)
+
+
+class SyntheticMarket:
+    """
+    Generates reproducible OHLCV frames: the same (seed, symbol, interval)
+    always yields the same bars. Returns follow a geometric Brownian motion
+    whose drift/volatility switch between regimes on a Markov chain;
+    optionally a chart-pattern shape is blended into the last bars.
+    """
+    
+    def __init__(self, seed=42, bars=500, end='2024-06-28', regimes=None, transitions=None,
+                 pattern_rate=0.0):
+        self.seed = seed
+        self.bars = bars
+        self.end = end
+        self.regimes = regimes or DEFAULT_REGIMES
+        self.transitions = DEFAULT_TRANSITIONS if transitions is None else np.asarray(transitions)
+        self.pattern_rate = pattern_rate
+    
+    @staticmethod
+    def universe(n, prefix='SYN'):
+        """n synthetic ticker names"""
+        width = max(4, len(str(n)))
+        return [f"{prefix}{i:0{width}d}" for i in range(n)]
+    
+    def _scale(self, interval):
+        """Convert daily drift/vol to the interval's bar length"""
+        minutes = INTRADAY_MINUTES.get(interval)
+        if minutes is not None:
+            return minutes / 390.0
+        return 252.0 / BARS_PER_YEAR.get(interval, 252)
+    
+    def pattern_for(self, symbol):
+        """Pattern embedded in a symbol's series (None for most symbols)"""
+        rng = np.random.default_rng(_stable_seed(self.seed, symbol, 'pattern'))
+        if rng.random() >= self.pattern_rate:
+            return None
+        names = sorted(PATTERN_TEMPLATES)
+        return names[rng.integers(len(names))]
+    
+    def generate(self, symbol, interval='1d', bars=None, pattern=None):
+        """OHLCV DataFrame for a symbol / interval"""
+        bars = bars or self.bars
+        rng = np.random.default_rng(_stable_seed(self.seed, symbol, interval))
+        scale = self._scale(interval)
+        
+        # Regime path
+        names = list(self.regimes)
+        mu = np.array([self.regimes[n][0] for n in names]) * scale
+        sigma = np.array([self.regimes[n][1] for n in names]) * np.sqrt(scale)
+        cumulative = np.cumsum(self.transitions, axis=1)
+        draws = rng.random(bars)
+        state = np.empty(bars, dtype=np.int64)
+        state[0] = rng.integers(len(names))
+        for i in range(1, bars):
+            state[i] = min(np.searchsorted(cumulative[state[i - 1]], draws[i]), len(names) - 1)
+        
+        # GBM closes
+        shocks = rng.standard_normal(bars)
+        log_returns = mu[state] - 0.5 * sigma[state] ** 2 + sigma[state] * shocks
+        start_price = 10.0 + 490.0 * rng.random()
+        close = start_price * np.exp(np.cumsum(log_returns))
+        
+        pattern = pattern or self.pattern_for(symbol)
+        if pattern is not None:
+            close = self._embed(close, pattern, rng)
+        
+        # Bars around the close path
+        bar_sigma = sigma[state]
+        open_ = np.empty(bars)
+        open_[0] = close[0]
+        open_[1:] = close[:-1] * np.exp(0.25 * bar_sigma[1:] * rng.standard_normal(bars - 1))
+        wick = np.abs(rng.standard_normal((2, bars))) * bar_sigma * 0.5
+        high = np.maximum(open_, close) * (1.0 + wick[0])
+        low = np.minimum(open_, close) * (1.0 - wick[1])
+        base_volume = 1e5 * (1 + 99 * rng.random())
+        volume = np.round(base_volume * scale * np.exp(0.3 * rng.standard_normal(bars))
+                          * (1.0 + 20.0 * np.abs(log_returns)))
+        
+        return pd.DataFrame(
+            {'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume},
+            index=_timestamps(interval, bars, self.end)
+        )
+    
+    def _embed(self, close, pattern, rng):
+        """Blend a pattern template into the last part of the series"""
+        knots = PATTERN_TEMPLATES[pattern]
+        window = int(min(len(close) - 1, max(40, len(close) // 5)))
+        x = np.linspace(0.0, 1.0, window)
+        shape = np.interp(x, [k[0] for k in knots], [k[1] for k in knots])
+        anchor = close[-window - 1]
+        noise = np.exp(0.004 * rng.standard_normal(window))
+        close = close.copy()
+        close[-window:] = anchor * shape * noise
+        return close
+    
+    def frames(self, symbols, intervals=('4h', '1d', '1wk')):
+        """{(symbol, interval): DataFrame} for a universe"""
+        return {(s, iv): self.generate(s, iv) for s in symbols for iv in intervals}
+    
+    def provider(self, cache=False):
+        """
+        data_provider(symbol, interval, period) callable for ScannerEngine;
+        cache=True keeps generated frames so repeated scans time the engine only
+        """
+        frames = {}
+        
+        def fetch(symbol, interval, period=None):
+            if not cache:
+                return self.generate(symbol, interval)
+            key = (symbol, interval)
+            if key not in frames:
+                frames[key] = self.generate(symbol, interval)
+            return frames[key]
+        return fetch
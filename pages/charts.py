@@ -10,7 +10,10 @@ from plotly.subplots import make_subplots
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from modules.indicators import IndicatorLibrary
+from modules.patterns import ChartPatterns, divergence_patterns
 from modules.scanner_engine import ScannerEngine
+from modules.similarity import ShapeIndex
 
 
 def render_charts_page():
@@ -98,6 +101,10 @@ def load_and_display_chart(symbol, timeframe):
         # Multi-timeframe analysis
         st.divider()
         display_multi_timeframe_analysis(symbol, workflow)
+        
+        # Symbols with a similar recent shape
+        st.divider()
+        display_similar_shapes(df, symbol, timeframe)
 
 
 def display_metrics(df, symbol):
@@ -157,13 +164,16 @@ def display_main_chart(df, symbol, timeframe):
     
     st.subheader(f"💹 {symbol} - Candlestick Chart ({timeframe})")
     
-    # Create subplots: main chart + volume
+    # Create subplots: main chart + volume profile beside it, volume below
     fig = make_subplots(
-        rows=2, cols=1,
+        rows=2, cols=2,
         row_heights=[0.7, 0.3],
+        column_widths=[0.85, 0.15],
+        specs=[[{}, {}], [{}, None]],
         shared_xaxes=True,
         vertical_spacing=0.03,
-        subplot_titles=(f'{symbol} Price', 'Volume')
+        horizontal_spacing=0.01,
+        subplot_titles=(f'{symbol} Price', 'Volume Profile', 'Volume')
     )
     
     # Candlestick
@@ -230,6 +240,19 @@ def display_main_chart(df, symbol, timeframe):
             row=1, col=1
         )
     
+    # Strongest support / resistance levels of clustered swing points
+    levels = ChartPatterns.support_resistance_levels(df).head(6)
+    for level in levels.itertuples():
+        fig.add_hline(
+            y=level.Level,
+            line_dash='dash',
+            line_width=1,
+            line_color='rgba(239, 83, 80, 0.7)' if level.Side == 'Resistance' else 'rgba(38, 166, 154, 0.7)',
+            annotation_text=f"{level.Side} {level.Level:.2f} ({level.Touches}x)",
+            annotation_position='top left',
+            row=1, col=1
+        )
+    
     # Mark Buy/Sell signals
     if 'Buy_Signal' in df.columns:
         buy_signals = df[df['Buy_Signal'] == True]
@@ -284,6 +307,24 @@ def display_main_chart(df, symbol, timeframe):
         row=2, col=1
     )
     
+    # Volume by price over the charted bars, on the price axis of the main chart
+    profile = IndicatorLibrary.calculate_volume_profile(df, bins=24)
+    if len(profile) > 0 and profile['Volume'].sum() > 0:
+        poc = int(profile['Volume'].to_numpy().argmax())
+        fig.add_trace(
+            go.Bar(
+                x=profile['Volume'],
+                y=profile['Price'],
+                orientation='h',
+                name='Volume Profile',
+                marker_color=['orange' if i == poc else 'rgba(100, 149, 237, 0.6)' for i in range(len(profile))],
+                showlegend=False
+            ),
+            row=1, col=2
+        )
+        fig.update_yaxes(matches='y', showticklabels=False, row=1, col=2)
+        fig.update_xaxes(showticklabels=False, row=1, col=2)
+    
     # Update layout
     fig.update_layout(
         height=800,
@@ -350,22 +391,34 @@ def display_indicator_charts(df, symbol):
             st.info("💡 RSI or Stochastic indicators not calculated. Add them to your workflow to view this chart.")
     
     with tab2:
-        if 'MACD' in df.columns and 'MACD_Signal' in df.columns:
+        has_macd = 'MACD' in df.columns and 'MACD_Signal' in df.columns
+        has_yoda = 'MACD_Up' in df.columns and 'Signal_Up' in df.columns
+        if has_macd or has_yoda:
             fig = go.Figure()
             
             fig.add_trace(go.Scatter(x=df.index, y=df['MACD'], name='MACD', line=dict(color='blue', width=2)))
-            fig.add_trace(go.Scatter(x=df.index, y=df['MACD_Signal'], name='Signal', line=dict(color='orange', width=2)))
+            if has_macd:
+                fig.add_trace(go.Scatter(x=df.index, y=df['MACD_Signal'], name='Signal', line=dict(color='orange', width=2)))
             
             # Histogram
             if 'MACD_Hist' in df.columns:
                 colors = ['green' if val >= 0 else 'red' for val in df['MACD_Hist']]
                 fig.add_trace(go.Bar(x=df.index, y=df['MACD_Hist'], name='Histogram', marker_color=colors, opacity=0.5))
             
+            # Yoda state: rising (green) / falling (red) MACD and signal line
+            if has_yoda:
+                yoda = IndicatorLibrary.yoda_colors(df)
+                fig.add_trace(go.Scatter(x=df.index, y=df['MACD'], name='MACD State', mode='markers',
+                                         marker=dict(color=yoda['MACD_Color'], size=5)))
+                fig.add_trace(go.Scatter(x=df.index, y=df['Signal'], name='Yoda Signal', mode='lines+markers',
+                                         line=dict(color='gray', width=1),
+                                         marker=dict(color=yoda['Signal_Color'], size=5)))
+            
             fig.add_hline(y=0, line_dash="dash", line_color="white")
             fig.update_layout(height=400, template='plotly_dark', title='MACD Indicator')
             st.plotly_chart(fig, use_container_width=True)
         else:
-            st.info("💡 MACD indicator not calculated. Add 'MACD' to your workflow to view this chart.")
+            st.info("💡 MACD indicator not calculated. Add 'MACD' or 'Yoda' to your workflow to view this chart.")
     
     with tab3:
         if 'OBV' in df.columns:
@@ -409,14 +462,18 @@ def display_signals_table(df, symbol):
             })
         
         # Check for patterns
-        pattern_cols = ['Double_Bottom', 'Double_Top', 'TL_Break_Up', 'TL_Break_Down']
+        pattern_cols = ['Double_Bottom', 'Double_Top', 'TL_Break_Up', 'TL_Break_Down',
+                        'Level_Break_Up', 'Level_Break_Down'] + divergence_patterns()
         for pat in pattern_cols:
             if pat in df.columns and row[pat]:
+                # Divergences stay set for a few bars; list the bar they were confirmed
+                if pat.endswith('_Div') and idx > 0 and df[pat].iloc[idx - 1]:
+                    continue
                 signals.append({
                     'Date': date,
                     'Type': pat.replace('_', ' '),
                     'Price': row['Close'],
-                    'Direction': '🟢 Long' if 'Bottom' in pat or 'Up' in pat else '🔴 Short',
+                    'Direction': '🟢 Long' if 'Bottom' in pat or 'Up' in pat or 'Bull' in pat else '🔴 Short',
                     'Confidence': 'Medium'
                 })
     
@@ -476,3 +533,72 @@ def display_multi_timeframe_analysis(symbol, workflow):
                         st.metric("Close", f"${last['Close']:.2f}")
                 else:
                     st.error(f"No data for {tf_name}")
+
+
+def display_similar_shapes(df, symbol, timeframe):
+    """Top-K symbols of the scanner universe whose recent closes look like this chart's"""
+    
+    st.subheader("🔎 Similar Price Shapes")
+    
+    universe = st.session_state.get('symbols') or []
+    if not universe:
+        st.info("Load a symbol list on the Scanner page to search it for similar shapes")
+        return
+    
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        window = st.slider("Bars to compare", min_value=20, max_value=120, value=60, step=5,
+                           key='shape_window')
+    with col2:
+        top_k = st.number_input("Matches", min_value=1, max_value=50, value=10, key='shape_top_k')
+    
+    # The index is kept for the session and rebuilt when the universe or window changes
+    key = (tuple(sorted(universe)), timeframe, window)
+    index = st.session_state.get('shape_index')
+    with col3:
+        st.write("")  # Spacing
+        build = st.button("🧭 Build Index" if index is None or st.session_state.get('shape_index_key') != key
+                          else "🔄 Rebuild Index", use_container_width=True)
+    
+    if build:
+        progress = st.progress(0.0)
+        index = ShapeIndex.build(
+            ScannerEngine(), universe, interval=timeframe, window=window,
+            progress_callback=lambda current, total, sym: progress.progress(current / total, text=sym)
+        )
+        progress.empty()
+        st.session_state.shape_index = index
+        st.session_state.shape_index_key = key
+    
+    if index is None or st.session_state.get('shape_index_key') != key:
+        st.caption(f"Indexes the last {window} {timeframe} bars of {len(universe)} symbols")
+        return
+    
+    matches = index.query(df['Close'].to_numpy()[-window:], k=int(top_k), exclude={symbol})
+    if len(matches) == 0:
+        st.info("Not enough data to compare shapes")
+        return
+    
+    st.caption(f"Shape correlation of the last {window} bars against {len(index)} indexed symbols")
+    st.dataframe(
+        matches,
+        use_container_width=True,
+        column_config={
+            'Similarity': st.column_config.ProgressColumn(
+                'Similarity', help='Correlation of the normalized shapes', format='%.3f',
+                min_value=-1, max_value=1
+            ),
+            'Distance': st.column_config.NumberColumn('Distance', format='%.3f'),
+        }
+    )
+    
+    # Overlay the normalized shapes of the best matches
+    fig = go.Figure()
+    reference = index.shape(df['Close'].to_numpy())
+    if reference is not None:
+        fig.add_trace(go.Scatter(y=reference, name=symbol, line=dict(width=3, color='black')))
+    for match in matches['Symbol'].head(5):
+        fig.add_trace(go.Scatter(y=index.row(match), name=match, opacity=0.7))
+    fig.update_layout(height=300, margin=dict(l=10, r=10, t=10, b=10), xaxis_title='Resampled bar',
+                      yaxis_title='Normalized close')
+    st.plotly_chart(fig, use_container_width=True)
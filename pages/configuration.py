@@ -46,6 +46,10 @@ def render_indicators_config():
         'Stochastic': 'Stochastic Oscillator (%K, %D)',
         'OBV': 'On Balance Volume',
         'VWAP': 'Volume Weighted Average Price',
+        'AVG_Volume': 'Average volume (20-period)',
+        'Median_Volume': 'Median volume (20-period)',
+        'RVOL': 'Relative volume: volume over the previous 20-period average',
+        'Dollar_Volume': 'Average traded value, Close x Volume (20-period) - liquidity filter',
         'EMA_5': 'Exponential Moving Average (5-period)',
         'EMA_20': 'Exponential Moving Average (20-period)',
         'EMA_50': 'Exponential Moving Average (50-period)',
@@ -140,7 +144,15 @@ def render_patterns_config():
         'Cup_Handle': 'U-shaped pattern with handle - Bullish continuation',
         'Flag': 'Sharp move followed by consolidation - Continuation',
         'Rising_Wedge': 'Converging trendlines trending up - Bearish',
-        'Falling_Wedge': 'Converging trendlines trending down - Bullish'
+        'Falling_Wedge': 'Converging trendlines trending down - Bullish',
+        'Near_Support': 'Close within 1.5% above a level of clustered swing points - Bullish bounce zone',
+        'Near_Resistance': 'Close within 1.5% below a level of clustered swing points - Bearish rejection zone',
+        'Level_Break_Up': 'Close breaks above the nearest resistance level - Bullish',
+        'Level_Break_Down': 'Close breaks below the nearest support level - Bearish',
+        'RSI_Bull_Div': 'Lower low in price, higher low in RSI - Bullish reversal (also MACD_, OBV_)',
+        'RSI_Bear_Div': 'Higher high in price, lower high in RSI - Bearish reversal (also MACD_, OBV_)',
+        'RSI_Hidden_Bull_Div': 'Higher low in price, lower low in RSI - Bullish continuation (also MACD_, OBV_)',
+        'RSI_Hidden_Bear_Div': 'Lower high in price, higher high in RSI - Bearish continuation (also MACD_, OBV_)'
     }
     
     for pattern, description in patterns_info.items():
@@ -271,7 +283,8 @@ def render_setups_config():
     rule_examples = {
         'Momentum Bullish': 'RSI > 50 AND MACD > 0 AND ADX > 20',
         'Oversold Bounce': 'RSI < 30 AND Price > BB_Lower',
-        'Breakout Confirmation': 'Close > SMA_200 AND Volume > AVG_Volume * 1.5',
+        'Breakout Confirmation': 'Close > SMA_200 AND RVOL > 1.5',
+        'Liquid Names Only': 'Dollar_Volume > 20000000 AND Volume > AVG_Volume',
         'Trend Following': 'EMA_20 > EMA_50 AND ADX > 25',
     }
     
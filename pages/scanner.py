@@ -5,10 +5,16 @@ Main scanning interface with CSV upload and results display
 
 import streamlit as st
 import pandas as pd
+import numpy as np
+import time
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
-from modules.scanner_engine import ScannerEngine
+from modules.alerts import AlertEngine
+from modules.cross_section import RANKED_METRICS, CrossSection
+from modules.metrics import REGISTRY
+from modules.scan_jobs import ScanJob, ScanJobManager
+from modules.scan_results import PATTERN_FLAGS, SETUP_FLAGS, Signal, as_mask_array, format_results
 
 
 def render_scanner_page():
@@ -110,15 +116,18 @@ def render_scanner_page():
                 st.error("⚠️ Please load symbols first!")
             else:
                 run_scan(workflow)
+        st.checkbox("⏱️ Profile scan stages", value=False, key='scan_profile',
+                    help="Record per-stage wall/CPU timings (fetch, indicators, patterns, rules)")
     
     with col_btn2:
         if st.button("🗑️ Clear Results", use_container_width=True):
             st.session_state.scan_results = None
+            st.session_state.scan_job_id = None
             st.rerun()
     
     with col_btn3:
         if st.session_state.scan_results is not None:
-            csv = st.session_state.scan_results.to_csv(index=False)
+            csv = format_results(st.session_state.scan_results).to_csv(index=False)
             st.download_button(
                 label="📥 Export CSV",
                 data=csv,
@@ -127,70 +136,228 @@ def render_scanner_page():
                 use_container_width=True
             )
     
+    # Background job status (polled on every rerun)
+    job = render_job_status()
+    
+    # Stage timings of a profiled scan
+    if job is not None and job.profiler is not None:
+        render_profile(job)
+    
+    # Signal transitions since the previous scans
+    render_alerts()
+    
+    # Checkpointed scans from earlier runs / app sessions
+    render_saved_scans()
+    
     # Display results
     if st.session_state.scan_results is not None:
         st.divider()
         display_results(st.session_state.scan_results)
+    
+    # Keep polling while the job runs; any widget interaction simply starts a
+    # new rerun and the scan itself carries on in the background
+    if job is not None and job.is_active and st.session_state.get('scan_auto_refresh', True):
+        time.sleep(1.0)
+        st.rerun()
+
+
+@st.cache_resource
+def get_job_manager():
+    """App-level job manager shared by every session and page"""
+    # Metrics endpoint / textfile when SCANNER_METRICS_PORT / _TEXTFILE are set
+    REGISTRY.start_from_env()
+    return ScanJobManager(alert_engine=AlertEngine())
 
 
 def run_scan(workflow):
-    """Execute the scan"""
-    scanner = ScannerEngine()
-    
-    # Progress tracking
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    def progress_callback(current, total, symbol):
-        progress = current / total
-        progress_bar.progress(progress)
-        status_text.text(f"Scanning {symbol}... ({current}/{total})")
-    
-    try:
-        with st.spinner("🔄 Scanning markets..."):
-            results_df = scanner.scan_multiple_symbols(
-                st.session_state.symbols,
-                workflow,
-                progress_callback
-            )
+    """Submit the scan as a background job"""
+    job = get_job_manager().submit(
+        st.session_state.symbols,
+        workflow,
+        st.session_state.active_workflow,
+        profile=st.session_state.get('scan_profile', False)
+    )
+    st.session_state.scan_job_id = job.id
+    st.session_state.scan_results = None
+    st.session_state.scan_results_version = None
+    st.rerun()
+
+
+def render_saved_scans():
+    """List journaled scans so they can be reloaded or resumed after a restart"""
+    manager = get_job_manager()
+    scans = manager.list_journaled_scans()
+    if not scans:
+        return
+    
+    with st.expander(f"💾 Saved Scans ({len(scans)})", expanded=False):
+        for scan in scans[:10]:
+            created = pd.Timestamp(scan['created_at'], unit='s').strftime('%Y-%m-%d %H:%M') if scan['created_at'] else '?'
+            col_info, col_load, col_resume = st.columns([3, 1, 1])
             
-            st.session_state.scan_results = results_df
-            progress_bar.empty()
-            status_text.empty()
+            with col_info:
+                st.markdown(f"**{scan['workflow_name'] or 'Scan'}** · {created} · "
+                            f"{scan['completed']}/{scan['total']} symbols · `{scan['scan_id']}`")
             
-            if len(results_df) > 0:
-                st.success(f"✅ Scan complete! Found {len(results_df)} results")
-            else:
-                st.warning("⚠️ No results found")
-    except Exception as e:
-        st.error(f"❌ Error during scan: {e}")
-        progress_bar.empty()
-        status_text.empty()
+            with col_load:
+                if st.button("📂 Load", key=f"load_scan_{scan['scan_id']}", use_container_width=True):
+                    st.session_state.scan_job_id = None
+                    st.session_state.scan_results = manager.load_scan(scan['scan_id'])
+                    st.rerun()
+            
+            with col_resume:
+                job = manager.get(scan['scan_id'])
+                incomplete = scan['completed'] < scan['total']
+                if incomplete and not (job is not None and job.is_active):
+                    if st.button("▶️ Resume", key=f"resume_scan_{scan['scan_id']}", use_container_width=True):
+                        manager.resume(scan['scan_id'])
+                        st.session_state.scan_job_id = scan['scan_id']
+                        st.session_state.scan_results_version = None
+                        st.rerun()
+
+
+def render_profile(job):
+    """Per-stage timing report of a profiled scan job"""
+    profiler = job.profiler
+    stages = profiler.stage_frame()
+    if stages.empty:
+        return
+    
+    with st.expander("⏱️ Scan Profile", expanded=not job.is_active):
+        report = profiler.report()
+        wall_s = report['symbol_wall_ms'] / 1000.0
+        cpu_s = report['symbol_cpu_ms'] / 1000.0
+        st.caption(f"{report['symbols']} symbols · {wall_s:.1f}s wall / {cpu_s:.1f}s CPU summed over symbols")
+        
+        number = st.column_config.NumberColumn(format="%.1f")
+        st.write("**Stages**")
+        st.dataframe(
+            stages,
+            use_container_width=True,
+            hide_index=True,
+            column_config={col: number for col in ['Total_ms', 'p50_ms', 'p95_ms', 'Max_ms', 'CPU_ms']}
+        )
+        
+        st.write("**Slowest Symbols**")
+        st.dataframe(
+            profiler.slowest_symbols(),
+            use_container_width=True,
+            hide_index=True,
+            column_config={col: number for col in ['Wall_ms', 'CPU_ms', 'Stage_ms']}
+        )
+        
+        st.download_button(
+            label="📥 Export Profile JSON",
+            data=profiler.to_json(),
+            file_name=f"scan_profile_{job.id}.json",
+            mime="application/json"
+        )
+
+
+def render_alerts():
+    """Recent transition alerts fired by background scans"""
+    engine = get_job_manager().alert_engine
+    if engine is None or not engine.recent:
+        return
+    
+    alerts = list(engine.recent)[::-1]
+    with st.expander(f"🔔 Alerts ({len(alerts)})", expanded=False):
+        alerts_df = pd.DataFrame([a.to_dict() for a in alerts])
+        alerts_df['Time'] = pd.to_datetime(alerts_df['Time'], unit='s').dt.strftime('%Y-%m-%d %H:%M:%S')
+        st.dataframe(
+            alerts_df[['Time', 'Symbol', 'Timeframe', 'Kind', 'Name', 'Previous', 'Current', 'Close']],
+            use_container_width=True,
+            hide_index=True
+        )
+        if engine.suppressed:
+            st.caption(f"{engine.suppressed} repeat alerts suppressed by the {engine.cooldown / 60:.0f} min cooldown")
+        
+        if st.button("🔕 Reset Alert State", key='reset_alert_state'):
+            engine.reset()
+            engine.recent.clear()
+            engine.save()
+            st.rerun()
+
+
+def render_job_status():
+    """Show progress of the current scan job and sync its partial results"""
+    job_id = st.session_state.get('scan_job_id')
+    job = get_job_manager().get(job_id) if job_id else None
+    if job is None:
+        return None
+    
+    # Refresh the results table only when new symbols have finished
+    version = (job.id, job.completed, job.status)
+    if st.session_state.get('scan_results_version') != version:
+        st.session_state.scan_results = job.partial_results()
+        st.session_state.scan_results_version = version
+    
+    st.divider()
+    col_status, col_actions = st.columns([3, 1])
+    
+    with col_status:
+        st.progress(job.progress)
+        if job.status == ScanJob.RUNNING:
+            current = f" - scanning {job.current_symbol}" if job.current_symbol else ""
+            st.caption(f"🔄 Job {job.id}: {job.completed}/{job.total} symbols ({job.elapsed:.0f}s){current}")
+        elif job.status == ScanJob.QUEUED:
+            st.caption(f"⏳ Job {job.id} queued ({job.total} symbols)")
+        elif job.status == ScanJob.COMPLETED:
+            st.success(f"✅ Scan complete! {job.completed} symbols in {job.elapsed:.1f}s")
+        elif job.status == ScanJob.CANCELLED:
+            st.warning(f"⏹️ Scan cancelled after {job.completed}/{job.total} symbols")
+        elif job.status == ScanJob.FAILED:
+            st.error(f"❌ Error during scan: {job.error}")
+    
+    with col_actions:
+        if job.is_active:
+            if st.button("⏹️ Cancel Scan", use_container_width=True):
+                get_job_manager().cancel(job.id)
+                st.rerun()
+            st.checkbox("Auto-refresh", value=True, key='scan_auto_refresh')
+        elif job.completed < job.total:
+            if st.button("▶️ Resume Scan", use_container_width=True):
+                get_job_manager().resume(job.id)
+                st.rerun()
+    
+    return job
+
+
+def mask_filter(masks, registry, selected, any_label, none_label):
+    """Boolean row filter for a bitmask column and a dropdown selection"""
+    values = as_mask_array(masks)
+    if selected == any_label:
+        return values != 0
+    if selected == none_label:
+        return values == 0
+    if selected != 'All':
+        return registry.contains(values, selected)
+    return np.ones(len(values), dtype=bool)
 
 
 def display_results(df):
     """Display scan results in a formatted table"""
     st.subheader("📊 Scan Results")
     
-    # Filter out error rows
-    error_df = df[df.get('Error').notna()] if 'Error' in df.columns else pd.DataFrame()
-    results_df = df[df.get('Error').isna()] if 'Error' in df.columns else df
+    # Filter out error rows (results are already typed, no coercion needed)
+    is_error = df['Error'].notna().to_numpy() if 'Error' in df.columns else np.zeros(len(df), dtype=bool)
+    error_df = df[is_error]
+    results_df = df[~is_error]
     
     if len(results_df) == 0:
         st.warning("No results to display")
         return
     
-    # Convert string columns to numeric for proper sorting
-    if 'Close' in results_df.columns:
-        results_df['Close'] = pd.to_numeric(results_df['Close'], errors='coerce')
-    
-    if 'RSI' in results_df.columns:
-        results_df['RSI'] = results_df['RSI'].replace('N/A', float('nan'))
-        results_df['RSI'] = pd.to_numeric(results_df['RSI'], errors='coerce')
+    # Universe-wide ranks and relative strength (benchmark row if it was scanned)
+    # Scored once per results frame / benchmark, not on every rerun
+    benchmark = st.session_state.get('rs_benchmark') or None
+    scored = st.session_state.get('scored_results')
+    if scored is None or scored[0] is not df or scored[1] != benchmark:
+        scored = (df, benchmark, CrossSection(benchmark=benchmark).score(results_df))
+        st.session_state.scored_results = scored
+    results_df = scored[2]
     
-    if 'MACD' in results_df.columns:
-        results_df['MACD'] = results_df['MACD'].replace('N/A', float('nan'))
-        results_df['MACD'] = pd.to_numeric(results_df['MACD'], errors='coerce')
+    signal_codes = results_df['Signal'].to_numpy() if 'Signal' in results_df.columns else np.zeros(len(results_df))
     
     # Display stats
     col1, col2, col3, col4 = st.columns(4)
@@ -199,17 +366,21 @@ def display_results(df):
         st.metric("Total Scanned", len(df))
     
     with col2:
-        buy_count = len(results_df[results_df['Signal'] == 'BUY']) if 'Signal' in results_df.columns else 0
+        buy_count = int((signal_codes == Signal.BUY).sum())
         st.metric("Buy Signals", buy_count, delta="Bullish" if buy_count > 0 else None)
     
     with col3:
-        sell_count = len(results_df[results_df['Signal'] == 'SELL']) if 'Signal' in results_df.columns else 0
+        sell_count = int((signal_codes == Signal.SELL).sum())
         st.metric("Sell Signals", sell_count, delta="Bearish" if sell_count > 0 else None)
     
     with col4:
-        pattern_count = len(results_df[results_df['Patterns'] != '-']) if 'Patterns' in results_df.columns else 0
+        pattern_count = int((as_mask_array(results_df['Pattern_Mask']) != 0).sum()) if 'Pattern_Mask' in results_df.columns else 0
         st.metric("Patterns Detected", pattern_count)
     
+    if 'Fresh' in results_df.columns:
+        fresh_count = int(results_df['Fresh'].sum())
+        st.caption(f"🆕 {fresh_count} recomputed · ♻️ {len(results_df) - fresh_count} reused unchanged from the previous scan")
+    
     # Add filters
     st.divider()
     st.subheader("🔍 Filter Results")
@@ -218,57 +389,58 @@ def display_results(df):
     
     with col_filter1:
         # Signal filter
-        signal_options = ['All'] + sorted(results_df['Signal'].unique().tolist()) if 'Signal' in results_df.columns else ['All']
+        signal_options = ['All'] + [s.name for s in Signal if (signal_codes == s).any()]
         selected_signal = st.selectbox("Filter by Signal", signal_options, key='signal_filter')
     
     with col_filter2:
-        # Pattern filter
-        if 'Patterns' in results_df.columns:
-            all_patterns = set()
-            for patterns_str in results_df['Patterns'].dropna():
-                if patterns_str != '-':
-                    all_patterns.update([p.strip() for p in str(patterns_str).split(',')])
-            pattern_options = ['All', 'Any Pattern', 'No Pattern'] + sorted(list(all_patterns))
+        # Pattern filter (options come from the flag registry, not string parsing)
+        if 'Pattern_Mask' in results_df.columns:
+            pattern_options = ['All', 'Any Pattern', 'No Pattern'] + PATTERN_FLAGS.present(results_df['Pattern_Mask'])
         else:
             pattern_options = ['All']
         selected_pattern = st.selectbox("Filter by Pattern", pattern_options, key='pattern_filter')
     
     with col_filter3:
         # Setup filter
-        if 'Setups' in results_df.columns:
-            all_setups = set()
-            for setups_str in results_df['Setups'].dropna():
-                if setups_str != '-':
-                    all_setups.update([s.strip() for s in str(setups_str).split(',')])
-            setup_options = ['All', 'Any Setup', 'No Setup'] + sorted(list(all_setups))
+        if 'Setup_Mask' in results_df.columns:
+            setup_options = ['All', 'Any Setup', 'No Setup'] + SETUP_FLAGS.present(results_df['Setup_Mask'])
         else:
             setup_options = ['All']
         selected_setup = st.selectbox("Filter by Setup", setup_options, key='setup_filter')
     
-    # Apply filters
-    filtered_df = results_df.copy()
+    col_rank1, col_rank2 = st.columns(2)
+    
+    with col_rank1:
+        top_n = st.number_input("Top N by composite score (0 = all)", min_value=0,
+                                max_value=len(results_df), value=0, step=5, key='top_n_filter')
+    
+    with col_rank2:
+        st.text_input("Relative strength benchmark", key='rs_benchmark',
+                      placeholder="e.g. SPY (blank = universe median)")
+    
+    # Apply filters as a single boolean mask
+    keep = np.ones(len(results_df), dtype=bool)
     
     # Signal filter
-    if selected_signal != 'All' and 'Signal' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Signal'] == selected_signal]
-    
-    # Pattern filter
-    if 'Patterns' in filtered_df.columns:
-        if selected_pattern == 'Any Pattern':
-            filtered_df = filtered_df[filtered_df['Patterns'] != '-']
-        elif selected_pattern == 'No Pattern':
-            filtered_df = filtered_df[filtered_df['Patterns'] == '-']
-        elif selected_pattern != 'All':
-            filtered_df = filtered_df[filtered_df['Patterns'].str.contains(selected_pattern, na=False)]
+    if selected_signal != 'All':
+        keep &= signal_codes == Signal[selected_signal]
+    
+    # Pattern filter (bitwise on the mask column)
+    if 'Pattern_Mask' in results_df.columns:
+        keep &= mask_filter(results_df['Pattern_Mask'], PATTERN_FLAGS, selected_pattern, 'Any Pattern', 'No Pattern')
     
     # Setup filter
-    if 'Setups' in filtered_df.columns:
-        if selected_setup == 'Any Setup':
-            filtered_df = filtered_df[filtered_df['Setups'] != '-']
-        elif selected_setup == 'No Setup':
-            filtered_df = filtered_df[filtered_df['Setups'] == '-']
-        elif selected_setup != 'All':
-            filtered_df = filtered_df[filtered_df['Setups'].str.contains(selected_setup, na=False)]
+    if 'Setup_Mask' in results_df.columns:
+        keep &= mask_filter(results_df['Setup_Mask'], SETUP_FLAGS, selected_setup, 'Any Setup', 'No Setup')
+    
+    # Only the rows that survive the filters get formatted for display
+    kept_df = results_df[keep]
+    if top_n:
+        kept_df = CrossSection().top(kept_df, int(top_n))
+    filtered_df = format_results(kept_df.drop(columns=['Error'], errors='ignore'))
+    for col in ('Return_1M', 'Return_3M', 'RS_1M', 'RS_3M'):
+        if col in filtered_df.columns:
+            filtered_df[col] = filtered_df[col] * 100.0
     
     # Display filtered count
     st.caption(f"Showing {len(filtered_df)} of {len(results_df)} results")
@@ -293,8 +465,45 @@ def display_results(df):
                 'MACD',
                 help='Moving Average Convergence Divergence',
                 format='%.3f'
-            )
+            ),
+            'MTF_Score': st.column_config.NumberColumn(
+                'MTF Score',
+                help='Multi-timeframe alignment (-1 bearish to +1 bullish)',
+                format='%+.2f',
+                min_value=-1,
+                max_value=1
+            ),
+            'Return_1M': st.column_config.NumberColumn(
+                '1M Return',
+                help='Trailing 21-bar return',
+                format='%+.1f%%'
+            ),
+            'Return_3M': st.column_config.NumberColumn(
+                '3M Return',
+                help='Trailing 63-bar return',
+                format='%+.1f%%'
+            ),
+            'RS_3M': st.column_config.NumberColumn(
+                'RS 3M',
+                help='3M return in excess of the benchmark',
+                format='%+.1f%%'
+            ),
+            'Composite': st.column_config.ProgressColumn(
+                'Composite',
+                help='Weighted percentile rank of relative strength, MTF score and RSI',
+                format='%.2f',
+                min_value=0,
+                max_value=1
+            ),
+            # Raw bitmasks are only used for filtering
+            'Pattern_Mask': None,
+            'Setup_Mask': None
         }
+        # Per-metric ranks / z-scores stay in the frame but are hidden
+        for metric in RANKED_METRICS:
+            column_config.setdefault(f'{metric}_Rank', None)
+            column_config[f'{metric}_Z'] = None
+        column_config.update({'RS_1M': None, 'Composite_Rank': None})
         
         st.dataframe(
             filtered_df,
@@ -326,4 +535,4 @@ def display_results(df):
     # Display errors if any
     if len(error_df) > 0:
         with st.expander(f"⚠️ Errors ({len(error_df)})", expanded=False):
-            st.dataframe(error_df, use_container_width=True)
+            st.dataframe(error_df[['Symbol', 'Error']], use_container_width=True)
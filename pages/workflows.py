@@ -123,7 +123,8 @@ def render_indicators_selector(workflow):
     available_indicators = {
         'Core Indicators': ['Yoda', 'RSI', 'MACD', 'BB', 'ATR'],
         'Trend Indicators': ['ADX', 'EMA_5', 'EMA_20', 'EMA_50', 'SMA_200'],
-        'Momentum & Volume': ['Stochastic', 'OBV', 'VWAP']
+        'Momentum & Volume': ['Stochastic', 'OBV', 'VWAP'],
+        'Volume & Liquidity': ['AVG_Volume', 'Median_Volume', 'RVOL', 'Dollar_Volume']
     }
     
     selected_indicators = workflow.get('indicators', [])
@@ -155,7 +156,11 @@ def render_patterns_selector(workflow):
     available_patterns = {
         'Reversal Patterns': ['Double_Bottom', 'Double_Top', 'Head_Shoulders', 'Inv_Head_Shoulders'],
         'Continuation Patterns': ['Flag', 'Triangle', 'Cup_Handle'],
-        'Breakout Patterns': ['TL_Break_Up', 'TL_Break_Down', 'Rising_Wedge', 'Falling_Wedge']
+        'Breakout Patterns': ['TL_Break_Up', 'TL_Break_Down', 'Rising_Wedge', 'Falling_Wedge'],
+        'Support / Resistance': ['Near_Support', 'Near_Resistance', 'Level_Break_Up', 'Level_Break_Down'],
+        'RSI Divergences': ['RSI_Bull_Div', 'RSI_Bear_Div', 'RSI_Hidden_Bull_Div', 'RSI_Hidden_Bear_Div'],
+        'MACD Divergences': ['MACD_Bull_Div', 'MACD_Bear_Div', 'MACD_Hidden_Bull_Div', 'MACD_Hidden_Bear_Div'],
+        'OBV Divergences': ['OBV_Bull_Div', 'OBV_Bear_Div', 'OBV_Hidden_Bull_Div', 'OBV_Hidden_Bear_Div']
     }
     
     selected_patterns = workflow.get('patterns', [])
@@ -0,0 +1,496 @@
+"""
+Advanced Market Scanner - Command Line Interface
+Headless batch scans for cron / schedulers (no Streamlit or Plotly imports)
+
+Usage:
+    python -m scanner_cli data/nasdaq100.csv --workflow workflow.json \
+        --workers 8 --output results/nasdaq100.parquet
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from modules.cross_section import CrossSection
+from modules.metrics import REGISTRY
+from modules.scan_results import Signal, add_display_labels
+
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_NO_RESULTS = 3
+
+DEFAULT_WORKFLOW = {
+    'indicators': ['Yoda', 'RSI', 'MACD'],
+    'patterns': ['Double_Bottom', 'Double_Top', 'TL_Break_Up'],
+    'setups': ['Momentum_Long'],
+    'timeframes': {'Wave': '4h', 'Tide': '1d', 'SuperTide': '1wk'}
+}
+
+OUTPUT_FORMATS = ('parquet', 'csv', 'jsonl')
+
+
+def load_universe(path):
+    """Symbols from a CSV (one per line or in any column), deduplicated in file order"""
+    df = pd.read_csv(path, header=None, dtype=str)
+    symbols = []
+    seen = set()
+    for col in df.columns:
+        for val in df[col]:
+            if pd.notna(val):
+                sym = str(val).strip().upper()
+                if sym and len(sym) <= 10 and sym not in seen:
+                    seen.add(sym)
+                    symbols.append(sym)
+    return symbols
+
+
+def load_workflow(path):
+    """Workflow dict as exported by the Workflows page"""
+    if path is None:
+        return dict(DEFAULT_WORKFLOW)
+    with open(path, 'r', encoding='utf-8') as f:
+        workflow = json.load(f)
+    if not isinstance(workflow, dict) or 'timeframes' not in workflow:
+        raise ValueError(f"{path} is not a workflow export (missing 'timeframes')")
+    return workflow
+
+
+def output_format(path, fmt=None):
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    return {'parq': 'parquet', 'json': 'jsonl', 'ndjson': 'jsonl'}.get(ext, ext)
+
+
+def check_parquet_engine():
+    """Fail before scanning, not after, when no parquet engine is installed"""
+    for module in ('pyarrow', 'fastparquet'):
+        try:
+            __import__(module)
+            return
+        except ImportError:
+            continue
+    raise ValueError("Parquet output needs pyarrow or fastparquet (pip install pyarrow)")
+
+
+def write_results(df, path, fmt):
+    """Write the typed results frame (plus Patterns/Setups labels)"""
+    df = add_display_labels(df)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    elif fmt == 'csv':
+        df.to_csv(path, index=False)
+    elif fmt == 'jsonl':
+        df.to_json(path, orient='records', lines=True)
+    else:
+        raise ValueError(f"Unsupported output format: {fmt}")
+
+
+def summarize(df, total, elapsed, output=None):
+    """One-line summary for scheduler logs"""
+    errors = int(df['Error'].notna().sum()) if len(df) else 0
+    ok = len(df) - errors
+    no_data = total - len(df)
+    buys = int((df['Signal'] == Signal.BUY).sum()) if len(df) else 0
+    sells = int((df['Signal'] == Signal.SELL).sum()) if len(df) else 0
+    rate = total / elapsed if elapsed > 0 else 0.0
+    line = (f"scanned {total} symbols in {elapsed:.1f}s ({rate:.1f}/s): "
+            f"{ok} ok, {errors} errors, {no_data} no data, {buys} BUY, {sells} SELL")
+    if output:
+        line += f" -> {output}"
+    return line
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='scanner_cli',
+        description='Run a market scan without the Streamlit UI'
+    )
+    parser.add_argument('universe', help='CSV file of symbols, e.g. data/nasdaq100.csv')
+    parser.add_argument('-w', '--workflow', help='Workflow JSON exported from the Workflows page '
+                        '(default: the built-in Default Scanner workflow)')
+    parser.add_argument('-o', '--output', help='Output file (.parquet, .csv or .jsonl)')
+    parser.add_argument('-f', '--format', choices=OUTPUT_FORMATS,
+                        help='Output format (default: from the output extension)')
+    parser.add_argument('-j', '--workers', type=int, default=4,
+                        help='Symbols scanned concurrently (default: 4)')
+    parser.add_argument('--limit', type=int, help='Only scan the first N symbols')
+    parser.add_argument('--fail-on-errors', action='store_true',
+                        help='Exit non-zero if any symbol raised during its scan')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Only print the summary line')
+    profiling = parser.add_mutually_exclusive_group()
+    profiling.add_argument('--profile', metavar='PATH',
+                           help='Write per-stage timings (p50/p95/max, slowest symbols) as JSON')
+    profiling.add_argument('--memory-profile', metavar='PATH',
+                           help='Write per-stage peak memory, frame sizes per timeframe and the '
+                                'largest columns by dtype as JSON (slow; use -j 1 for exact stages)')
+    parser.add_argument('--panel', action='store_true',
+                        help='Fetch the whole universe first and compute indicators for all symbols '
+                             'at once (much faster for large universes, uses more memory)')
+    parser.add_argument('--lean', action='store_true',
+                        help='Release each timeframe frame as soon as its last row is extracted')
+    parser.add_argument('--rank', action='store_true',
+                        help='Add relative strength, per-metric ranks / z-scores and a composite score')
+    parser.add_argument('--benchmark', metavar='SYMBOL',
+                        help='Relative strength benchmark (implies --rank; default: universe median)')
+    parser.add_argument('--top', type=int, metavar='K',
+                        help='Only keep the K best symbols by composite score (implies --rank)')
+    parser.add_argument('--cluster', action='store_true',
+                        help='Add Cluster / Cluster_Size columns grouping symbols whose daily returns '
+                             'are correlated (same trade) over the last 3 months')
+    parser.add_argument('--cluster-threshold', type=float, default=0.7,
+                        help='With --cluster, correlation that links two symbols (default: 0.7)')
+    # Modes that replace the scan; giving two of them is a usage error
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument('--backtest', action='store_true',
+                        help='Instead of scanning, backtest the workflow signals over history: print '
+                             'per-signal forward returns / hit rates and write the trade list to --output')
+    parser.add_argument('--backtest-period', default='2y',
+                        help='With --backtest / --sweep, daily history to test over (default: 2y)')
+    parser.add_argument('--horizons', default='1,5,10,20',
+                        help='With --backtest / --sweep, forward return horizons in bars (default: 1,5,10,20)')
+    modes.add_argument('--sweep', metavar='SPACE.json',
+                        help='Instead of scanning, rank parameter sets such as {"fa": [8, 12], '
+                             '"sma_length": {"min": 20, "max": 100}} by backtest metrics')
+    parser.add_argument('--sweep-signal', default='Buy_Signal',
+                        help='With --sweep, signal to test; join names with + for all of them '
+                             '(default: Buy_Signal)')
+    parser.add_argument('--sweep-metric', default='Mean_10',
+                        help='With --sweep, column to rank by (default: Mean_10)')
+    parser.add_argument('--sweep-samples', type=int,
+                        help='With --sweep, random search of N sets instead of the full grid')
+    modes.add_argument('--query', action='append', metavar='RULE|SETUP',
+                        help='Instead of scanning, list the bars where a setup (e.g. Momentum_Long) or '
+                             'rule (e.g. "Tide.Buy_Signal == 1 AND Wave.RSI > 50") was true; repeatable')
+    parser.add_argument('--since', metavar='OFFSET|DATE',
+                        help='With --query, only events in the last OFFSET (e.g. 30D) or since DATE')
+    parser.add_argument('--on', default='Tide',
+                        help='With --query, timeframe whose bars are reported (default: Tide)')
+    modes.add_argument('--similar', metavar='SYMBOL',
+                        help='Instead of scanning, list the symbols whose recent closes are shaped most '
+                             'like SYMBOL (top 10, or --top K)')
+    parser.add_argument('--shape-window', type=int, default=60,
+                        help='With --similar, number of recent bars compared (default: 60)')
+    parser.add_argument('--shape-interval', default='1d',
+                        help='With --similar, bar interval compared (default: 1d)')
+    parser.add_argument('--metrics-port', type=int,
+                        help='Serve Prometheus metrics on 127.0.0.1:PORT/metrics while running')
+    parser.add_argument('--metrics-textfile', metavar='PATH',
+                        help='Write Prometheus metrics to PATH (textfile collector) after each scan')
+    modes.add_argument('--schedule', action='store_true',
+                        help='Run as a daemon that scans on every bar close of the workflow '
+                             'timeframes (NYSE calendar); outputs get a timestamp suffix')
+    parser.add_argument('--prewarm-minutes', type=int, default=10,
+                        help='With --schedule, fetch data this long before the open (default: 10)')
+    return parser
+
+
+def timestamped_path(path, when):
+    """results/scan.csv -> results/scan_20240501_1600.csv"""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_{when:%Y%m%d_%H%M}{ext}"
+
+
+def run_schedule(args, symbols, workflow, fmt):
+    """Long-running mode: scan on bar closes until interrupted"""
+    from modules.scheduler import ScanScheduler
+    
+    def on_results(results, intervals, elapsed):
+        output = None
+        if args.output:
+            output = timestamped_path(args.output, scheduler.calendar.now())
+            write_results(results, output, fmt)
+        print(f"[{', '.join(intervals)}] {summarize(results, len(symbols), elapsed, output)}", flush=True)
+        REGISTRY.write_textfile()
+    
+    scheduler = ScanScheduler(symbols, workflow, on_results=on_results,
+                              prewarm_minutes=args.prewarm_minutes,
+                              max_workers=max(1, args.workers))
+    # Let service managers stop the daemon cleanly with SIGTERM
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+    try:
+        scheduler.run(log=lambda msg: print(msg, file=sys.stderr, flush=True))
+    except KeyboardInterrupt:
+        scheduler.stop()
+    return EXIT_OK
+
+
+def run_backtest(args, symbols, workflow, fmt):
+    """Backtest mode: summary table on stdout, trades to --output"""
+    from modules.backtest import Backtester
+    
+    def progress(current, total, symbol):
+        if not args.quiet:
+            print(f"[{current}/{total}] {symbol}", file=sys.stderr)
+    
+    try:
+        horizons = [int(h) for h in args.horizons.split(',') if h.strip()]
+    except ValueError:
+        print(f"scanner_cli: bad --horizons {args.horizons}", file=sys.stderr)
+        return EXIT_USAGE
+    
+    start = time.perf_counter()
+    try:
+        result = Backtester(horizons=horizons, period=args.backtest_period).run(
+            symbols, workflow, progress_callback=progress)
+        if args.output and len(result.trades):
+            write_results(result.trades, args.output, fmt)
+    except KeyboardInterrupt:
+        print("scanner_cli: interrupted", file=sys.stderr)
+        return EXIT_FAILED
+    except Exception as e:
+        print(f"scanner_cli: backtest failed: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    elapsed = time.perf_counter() - start
+    
+    if len(result.summary) == 0:
+        print(f"backtested {len(symbols)} symbols in {elapsed:.1f}s: no data")
+        return EXIT_NO_RESULTS
+    print(f"backtested {len(symbols)} symbols in {elapsed:.1f}s: {len(result.trades)} trades"
+          + (f" -> {args.output}" if args.output else ""))
+    print(result.summary.to_string(index=False, float_format='%.4f'))
+    return EXIT_OK
+
+
+def run_sweep(args, symbols, fmt):
+    """Sweep mode: ranked parameter sets on stdout and to --output"""
+    from modules.param_sweep import ParameterSweep, grid, parse_space, random_search
+    
+    try:
+        with open(args.sweep, 'r', encoding='utf-8') as f:
+            space = parse_space(json.load(f))
+        param_sets = random_search(space, args.sweep_samples) if args.sweep_samples else grid(space)
+        horizons = [int(h) for h in args.horizons.split(',') if h.strip()]
+    except (OSError, ValueError, AttributeError, KeyError) as e:
+        print(f"scanner_cli: bad sweep space {args.sweep}: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    
+    signal_names = args.sweep_signal.split('+')
+    start = time.perf_counter()
+    try:
+        sweep = ParameterSweep(signal=signal_names[0] if len(signal_names) == 1 else tuple(signal_names),
+                               metric=args.sweep_metric, horizons=horizons,
+                               period=args.backtest_period, max_workers=max(1, args.workers))
+        table = sweep.run(param_sets, symbols=symbols)
+        if args.output and len(table):
+            write_results(table, args.output, fmt)
+    except KeyboardInterrupt:
+        print("scanner_cli: interrupted", file=sys.stderr)
+        return EXIT_FAILED
+    except Exception as e:
+        print(f"scanner_cli: sweep failed: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    elapsed = time.perf_counter() - start
+    
+    if len(table) == 0:
+        print(f"swept {len(param_sets)} parameter sets in {elapsed:.1f}s: no data")
+        return EXIT_NO_RESULTS
+    print(f"swept {len(param_sets)} parameter sets over {len(symbols)} symbols in {elapsed:.1f}s"
+          + (f" -> {args.output}" if args.output else ""))
+    print(table.head(20).to_string(index=False, float_format='%.4f'))
+    return EXIT_OK
+
+
+def run_query(args, symbols, workflow, fmt):
+    """Query mode: event table on stdout or to --output"""
+    from modules.signal_query import SignalQuery
+    
+    def progress(current, total, symbol):
+        if not args.quiet:
+            print(f"[{current}/{total}] {symbol}", file=sys.stderr)
+    
+    timeframes = workflow.get('timeframes')
+    if args.on not in timeframes:
+        print(f"scanner_cli: --on {args.on} is not a workflow timeframe ({', '.join(timeframes)})",
+              file=sys.stderr)
+        return EXIT_USAGE
+    start = time.perf_counter()
+    try:
+        query = SignalQuery(timeframes=timeframes)
+        events = query.run(symbols, {q: q for q in args.query}, since=args.since, on=args.on,
+                           progress_callback=progress)
+        if args.output:
+            write_results(events, args.output, fmt)
+    except ValueError as e:
+        print(f"scanner_cli: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    except KeyboardInterrupt:
+        print("scanner_cli: interrupted", file=sys.stderr)
+        return EXIT_FAILED
+    except Exception as e:
+        print(f"scanner_cli: query failed: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    elapsed = time.perf_counter() - start
+    
+    print(f"queried {len(symbols)} symbols in {elapsed:.1f}s: {len(events)} events, "
+          f"{events['Symbol'].nunique() if len(events) else 0} symbols"
+          + (f" -> {args.output}" if args.output else ""))
+    if args.output is None and not args.quiet and len(events):
+        print(events.to_string(index=False))
+    return EXIT_OK if len(events) else EXIT_NO_RESULTS
+
+
+def run_similar(args, symbols, fmt):
+    """Similarity mode: the universe's closest shapes to one symbol"""
+    from modules.data_cache import MarketDataCache
+    from modules.scanner_engine import ScannerEngine
+    from modules.similarity import ShapeIndex
+    
+    def progress(current, total, symbol):
+        if not args.quiet:
+            print(f"[{current}/{total}] {symbol}", file=sys.stderr)
+    
+    if args.shape_window < 2:
+        print("scanner_cli: --shape-window must be at least 2", file=sys.stderr)
+        return EXIT_USAGE
+    start = time.perf_counter()
+    try:
+        engine = ScannerEngine(data_cache=MarketDataCache())
+        universe = symbols if args.similar in symbols else symbols + [args.similar]
+        index = ShapeIndex.build(engine, universe, interval=args.shape_interval, window=args.shape_window,
+                                 max_workers=args.workers, progress_callback=progress)
+        matches = index.query_symbol(args.similar, k=args.top or 10)
+        if args.output:
+            write_results(matches, args.output, fmt)
+    except KeyError:
+        print(f"scanner_cli: no {args.shape_window} bars of {args.similar} data to compare", file=sys.stderr)
+        return EXIT_FAILED
+    except KeyboardInterrupt:
+        print("scanner_cli: interrupted", file=sys.stderr)
+        return EXIT_FAILED
+    except Exception as e:
+        print(f"scanner_cli: similarity search failed: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    elapsed = time.perf_counter() - start
+    
+    print(f"indexed {len(index)} of {len(universe)} symbols in {elapsed:.1f}s: "
+          f"{len(matches)} shaped like {args.similar}"
+          + (f" -> {args.output}" if args.output else ""))
+    if args.output is None and not args.quiet and len(matches):
+        print(matches.to_string(index=False))
+    return EXIT_OK if len(matches) else EXIT_NO_RESULTS
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    
+    try:
+        symbols = load_universe(args.universe)
+        workflow = load_workflow(args.workflow)
+        fmt = output_format(args.output, args.format) if args.output else None
+        if fmt is not None and fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Cannot infer output format from {args.output}; use --format")
+        if fmt == 'parquet':
+            check_parquet_engine()
+    except (OSError, ValueError) as e:
+        print(f"scanner_cli: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    
+    if args.limit:
+        symbols = symbols[:args.limit]
+    if not symbols:
+        print(f"scanner_cli: no symbols in {args.universe}", file=sys.stderr)
+        return EXIT_USAGE
+    
+    REGISTRY.textfile_path = args.metrics_textfile
+    if args.metrics_port:
+        try:
+            REGISTRY.serve(args.metrics_port)
+        except OSError as e:
+            print(f"scanner_cli: cannot serve metrics on port {args.metrics_port}: {e}", file=sys.stderr)
+            return EXIT_USAGE
+    
+    if args.schedule:
+        return run_schedule(args, symbols, workflow, fmt)
+    if args.backtest:
+        return run_backtest(args, symbols, workflow, fmt)
+    if args.sweep:
+        return run_sweep(args, symbols, fmt)
+    if args.query:
+        return run_query(args, symbols, workflow, fmt)
+    if args.similar:
+        return run_similar(args, symbols, fmt)
+    
+    # Imported late so `--help` and input errors stay fast
+    from modules.scanner_engine import ScannerEngine
+    
+    def progress(current, total, symbol):
+        if not args.quiet:
+            print(f"[{current}/{total}] {symbol}", file=sys.stderr)
+    
+    profiler = None
+    if args.profile:
+        from modules.profiling import ScanProfiler
+        profiler = ScanProfiler()
+    elif args.memory_profile:
+        from modules.profiling import MemoryProfiler
+        profiler = MemoryProfiler().start()
+    
+    # Clustering reads the daily bars again, so keep the scan's frames around
+    data_cache = None
+    if args.cluster:
+        from modules.data_cache import MarketDataCache
+        data_cache = MarketDataCache()
+    
+    start = time.perf_counter()
+    try:
+        engine = ScannerEngine(data_cache=data_cache, profiler=profiler, lean=args.lean)
+        results = engine.scan_multiple_symbols(
+            symbols, workflow, progress_callback=progress, max_workers=max(1, args.workers),
+            panel=args.panel
+        )
+        if args.cluster:
+            from modules.correlation import CorrelationClusters
+            results = CorrelationClusters(threshold=args.cluster_threshold).annotate(results, engine)
+        selected = results
+        if args.rank or args.benchmark or args.top:
+            ranking = CrossSection(benchmark=args.benchmark)
+            selected = ranking.score(results)
+            if args.top:
+                selected = ranking.top(selected, args.top)
+        if args.output:
+            write_results(selected, args.output, fmt)
+    except KeyboardInterrupt:
+        print("scanner_cli: interrupted", file=sys.stderr)
+        return EXIT_FAILED
+    except Exception as e:
+        print(f"scanner_cli: scan failed: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    finally:
+        if args.memory_profile:
+            profiler.stop()
+    elapsed = time.perf_counter() - start
+    
+    print(summarize(results, len(symbols), elapsed, args.output))
+    REGISTRY.write_textfile()
+    if profiler is not None:
+        profiler.to_json(args.profile or args.memory_profile)
+        if not args.quiet:
+            print(profiler.stage_frame().head(10).to_string(index=False, float_format='%.1f'), file=sys.stderr)
+            if args.memory_profile:
+                print(profiler.column_frame(10).to_string(index=False, float_format='%.3f'), file=sys.stderr)
+    if args.output is None and not args.quiet:
+        print(add_display_labels(selected).drop(columns=['Pattern_Mask', 'Setup_Mask']).to_string(index=False))
+    
+    errors = int(results['Error'].notna().sum()) if len(results) else 0
+    if len(results) == errors:
+        return EXIT_NO_RESULTS
+    if args.fail_on_errors and errors:
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
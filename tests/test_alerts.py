@@ -0,0 +1,51 @@
+"""
+Alert Tests
+Alert state is kept per workflow and shared by batch and streaming scans
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.alerts import AlertEngine
+from modules.scan_results import ScanResult, Signal
+from modules.stream_scanner import SignalEvent
+
+
+SWING = {'timeframes': {'Wave': '4h', 'Tide': '1d'}, 'indicators': ['Yoda']}
+TREND = {'timeframes': {'Tide': '1d', 'SuperTide': '1wk'}, 'indicators': ['Yoda', 'RSI']}
+
+
+def make_engine(tmp_path):
+    return AlertEngine(sinks=[], cooldown=0.0, alert_on_clear=True,
+                       state_path=str(tmp_path / 'alert_state.json'))
+
+
+def test_workflows_keep_separate_state(tmp_path):
+    engine = make_engine(tmp_path)
+    buy = ScanResult('SYN0000', Close=10.0, Signal=int(Signal.BUY))
+    neutral = ScanResult('SYN0000', Close=10.0)
+    
+    assert len(engine.observe(buy, SWING)) == 1
+    assert engine.observe(neutral, TREND) == []
+    # The second workflow must not look like the first one's signal ended
+    assert engine.observe(buy, SWING) == []
+
+
+def test_stream_and_batch_share_state(tmp_path):
+    engine = make_engine(tmp_path)
+    buy = ScanResult('SYN0000', Close=10.0, Signal=int(Signal.BUY))
+    event = SignalEvent('SYN0000', 'Wave,Tide', None, 'Signal', 0, int(Signal.BUY), buy, 0.0)
+    
+    alerts = engine.observe(buy, SWING)
+    assert [a.Timeframe for a in alerts] == ['1d']
+    assert engine.observe_event(event, SWING) == []
+
+
+def test_state_survives_restart(tmp_path):
+    engine = make_engine(tmp_path)
+    engine.observe(ScanResult('SYN0000', Close=10.0, Signal=int(Signal.BUY)), SWING)
+    engine.flush()
+    
+    restarted = make_engine(tmp_path)
+    assert restarted.observe(ScanResult('SYN0000', Close=11.0, Signal=int(Signal.BUY)), SWING) == []
@@ -0,0 +1,61 @@
+"""
+Bar Feed Tests
+The socket feed reads from several publishers at once
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.bar_feeds import SocketFeed
+
+
+def connect(path):
+    """Connect to the feed once it is listening"""
+    for _ in range(100):
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.connect(path)
+            return client
+        except OSError:
+            client.close()
+            time.sleep(0.02)
+    raise RuntimeError('feed did not start listening')
+
+
+def bar_line(symbol):
+    return (json.dumps({'symbol': symbol, 'timestamp': '2026-10-19', 'close': 10.0}) + '\n').encode()
+
+
+def test_second_publisher_is_not_blocked_by_the_first(tmp_path):
+    path = str(tmp_path / 'bars.sock')
+    feed = SocketFeed(path, timeout=0.05)
+    received = []
+    reader = threading.Thread(target=lambda: received.extend(bar['Symbol'] for bar in feed))
+    reader.start()
+    
+    first = connect(path)
+    second = connect(path)
+    try:
+        # The first publisher stays connected and sends half a line
+        first.sendall(bar_line('AAA')[:10])
+        second.sendall(bar_line('BBB'))
+        deadline = time.time() + 5
+        while 'BBB' not in received and time.time() < deadline:
+            time.sleep(0.02)
+        assert received == ['BBB']
+        
+        first.sendall(bar_line('AAA')[10:])
+        while 'AAA' not in received and time.time() < deadline:
+            time.sleep(0.02)
+        assert received == ['BBB', 'AAA']
+    finally:
+        first.close()
+        second.close()
+        feed.close()
+        reader.join(timeout=5)
+    assert not reader.is_alive()
@@ -0,0 +1,27 @@
+"""
+Cross Section Tests
+Scoring and top-K selection on empty and populated results
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.cross_section import CrossSection
+
+
+def test_top_of_empty_results_is_empty():
+    df = pd.DataFrame({'Symbol': pd.Series(dtype=object), 'RSI': pd.Series(dtype=float)})
+    top = CrossSection().top(df, 5)
+    assert len(top) == 0
+    assert 'Composite' in top.columns
+
+
+def test_top_orders_by_composite():
+    df = pd.DataFrame({'Symbol': ['A', 'B', 'C'], 'RSI': [40.0, 70.0, 55.0], 'Error': [None, None, None]})
+    top = CrossSection(weights={'RSI': 1.0}).top(df, 2)
+    assert top['Symbol'].tolist() == ['B', 'C']
+    assert np.all(np.diff(top['Composite'].to_numpy()) <= 0)
@@ -0,0 +1,68 @@
+"""
+Pattern Tests
+Support / resistance levels only use bars up to the one they describe,
+windowed detectors need only their LAST_BAR_WINDOWS tail and the
+full-window ones only PATTERN_HISTORY bars
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.patterns import (LAST_BAR_WINDOWS, LEVEL_COLUMNS, LEVEL_PATTERNS, PATTERN_HISTORY,
+                             ChartPatterns, divergence_patterns)
+from modules.scanner_engine import ScannerEngine
+from modules.synthetic_data import SyntheticMarket
+
+
+@pytest.mark.parametrize('symbol', SyntheticMarket(bars=124, pattern_rate=0.3).universe(10))
+def test_levels_match_prefix_recomputation(symbol):
+    df = SyntheticMarket(bars=124, pattern_rate=0.3).generate(symbol, '1d')
+    full = ChartPatterns.detect_levels(df)
+    
+    for t in range(len(df)):
+        prefix = ChartPatterns.detect_levels(df.iloc[:t + 1])
+        for column in LEVEL_COLUMNS:
+            expected = prefix[column].iloc[t]
+            actual = full[column].iloc[t]
+            assert actual == expected or (np.isnan(actual) and np.isnan(expected)), (column, t)
+
+
+def test_last_bar_levels_match_level_table():
+    df = SyntheticMarket(bars=300, pattern_rate=0.3).generate('SYN0001', '1d')
+    columns = ChartPatterns.detect_levels(df)
+    levels = ChartPatterns.support_resistance_levels(df)
+    
+    resistance = levels.loc[levels['Side'] == 'Resistance', 'Level'].min()
+    support = levels.loc[levels['Side'] == 'Support', 'Level'].max()
+    assert np.isclose(resistance, columns['Resistance'].iloc[-1], equal_nan=True)
+    assert np.isclose(support, columns['Support'].iloc[-1], equal_nan=True)
+
+
+@pytest.mark.parametrize('symbol', SyntheticMarket(bars=300, pattern_rate=0.5).universe(2))
+def test_last_bar_windows_match_full_frame(symbol):
+    engine = ScannerEngine()
+    df = SyntheticMarket(bars=300, pattern_rate=0.5).generate(symbol, '1d')
+    
+    for t in range(0, len(df), 4):
+        frame = df.iloc[max(0, t - 149):t + 1]
+        full = engine.detect_patterns(frame, list(LAST_BAR_WINDOWS))
+        for pattern, window in LAST_BAR_WINDOWS.items():
+            tail = engine.detect_patterns(frame.iloc[-window:], [pattern])
+            assert bool(tail[pattern].iloc[-1]) == bool(full[pattern].iloc[-1]), (pattern, t)
+
+
+@pytest.mark.parametrize('symbol', SyntheticMarket(bars=400, pattern_rate=0.5).universe(2))
+def test_pattern_history_matches_full_history(symbol):
+    engine = ScannerEngine()
+    patterns = list(LEVEL_PATTERNS) + divergence_patterns()
+    df = SyntheticMarket(bars=400, pattern_rate=0.5).generate(symbol, '1d')
+    
+    for t in range(PATTERN_HISTORY, len(df), 3):
+        full = engine.detect_patterns(df.iloc[:t + 1], patterns)
+        tail = engine.detect_patterns(df.iloc[t + 1 - PATTERN_HISTORY:t + 1], patterns)
+        for pattern in patterns:
+            assert bool(tail[pattern].iloc[-1]) == bool(full[pattern].iloc[-1]), (pattern, t)
@@ -0,0 +1,29 @@
+"""
+Scan Job Tests
+Resuming a job queues it exactly once
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.scan_jobs import ScanJob, ScanJobManager
+
+
+def test_concurrent_resume_queues_once(tmp_path):
+    manager = ScanJobManager(journal_dir=str(tmp_path))
+    job = ScanJob(['SYN0000', 'SYN0001'], {})
+    job.status = ScanJob.CANCELLED
+    manager.jobs[job.id] = job
+    
+    queued = []
+    manager.executor.submit = lambda fn, queued_job: queued.append(queued_job)
+    threads = [threading.Thread(target=manager.resume, args=(job.id,)) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert queued == [job]
+    assert job.status == ScanJob.QUEUED
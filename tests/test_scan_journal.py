@@ -0,0 +1,60 @@
+"""
+Scan Journal Tests
+Cached listing summaries follow appends, and retention prunes old journals
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.scan_journal import ScanJournal
+from modules.scan_results import ScanResult
+
+
+def test_summary_follows_appends(tmp_path):
+    symbols = [f'SYN{i:04d}' for i in range(20)]
+    journal = ScanJournal('scan', str(tmp_path)).start(symbols, {'indicators': ['Yoda']}, 'Swing')
+    assert journal.summary()['completed'] == 0
+    
+    for symbol in symbols[:5]:
+        journal.append(symbol, ScanResult(symbol))
+    # A line still being written is not counted until it is complete
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "result", "symbol": "SYN0005"')
+    assert journal.summary()['completed'] == 5
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write(', "result": null}\n')
+    journal.append(symbols[0], ScanResult(symbols[0]))
+    
+    summary = journal.summary()
+    assert summary['completed'] == len(journal.completed_symbols()) == 6
+    assert (summary['total'], summary['workflow_name']) == (20, 'Swing')
+
+
+def test_resume_after_torn_tail_keeps_every_record(tmp_path):
+    symbols = ['SYN0000', 'SYN0001', 'SYN0002']
+    journal = ScanJournal('scan', str(tmp_path)).start(symbols, {})
+    journal.append('SYN0000', ScanResult('SYN0000'))
+    # Crash in the middle of writing the next record
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "result", "symbol": "SYN00')
+    
+    resumed = ScanJournal('scan', str(tmp_path))
+    resumed.append('SYN0001', ScanResult('SYN0001'))
+    resumed.append('SYN0002', ScanResult('SYN0002'))
+    
+    assert resumed.completed_symbols() == set(symbols)
+    assert resumed.load_results()['Symbol'].tolist() == symbols
+    assert resumed.summary()['completed'] == 3
+
+
+def test_prune_keeps_newest_and_spared(tmp_path):
+    for k in range(6):
+        ScanJournal(f'scan{k}', str(tmp_path)).start(['SYN0000'], {})
+        time.sleep(0.01)
+    
+    deleted = ScanJournal.prune(str(tmp_path), max_scans=3, keep={'scan0'})
+    assert sorted(deleted) == ['scan1', 'scan2']
+    remaining = [s['scan_id'] for s in ScanJournal.list_scans(str(tmp_path))]
+    assert remaining == ['scan5', 'scan4', 'scan3', 'scan0']
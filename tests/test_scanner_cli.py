@@ -0,0 +1,29 @@
+"""
+Scanner CLI Tests
+Modes that replace the scan cannot be combined
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scanner_cli import EXIT_USAGE, build_parser
+
+
+@pytest.mark.parametrize('argv', [
+    ['--backtest', '--sweep', 'space.json'],
+    ['--schedule', '--query', 'Momentum_Long'],
+    ['--similar', 'AAPL', '--backtest'],
+])
+def test_conflicting_modes_are_a_usage_error(argv, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        build_parser().parse_args(['symbols.csv'] + argv)
+    assert exit_info.value.code == EXIT_USAGE
+    assert 'not allowed with' in capsys.readouterr().err
+
+
+def test_repeated_query_is_one_mode():
+    args = build_parser().parse_args(['symbols.csv', '--query', 'Momentum_Long', '--query', 'Tide.RSI > 50'])
+    assert args.query == ['Momentum_Long', 'Tide.RSI > 50']
@@ -0,0 +1,83 @@
+"""
+Scanner Engine Tests
+Rescans reuse cached frames and results, and refetch bars that are still forming
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.data_cache import MarketDataCache
+from modules.market_calendar import MarketCalendar
+from modules.result_cache import ScanResultCache
+from modules.scanner_engine import ScannerEngine
+from modules.synthetic_data import SyntheticMarket
+
+
+WORKFLOW = {'indicators': ['Yoda', 'RSI'], 'patterns': ['Double_Bottom'], 'setups': [],
+            'timeframes': {'Tide': '1d', 'SuperTide': '1wk'}}
+
+
+class ClockCalendar(MarketCalendar):
+    """Market calendar whose current time is set by the test"""
+    
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = pd.Timestamp(clock, tz=self.tz)
+    
+    def now(self):
+        return self.clock
+
+
+def counting_engine(market, calendar, frames=None):
+    """Engine with both caches whose provider records every fetch"""
+    provider = market.provider(cache=True)
+    fetches = []
+    
+    def fetch(symbol, interval, period):
+        fetches.append((symbol, interval))
+        if frames is not None and (symbol, interval) in frames:
+            return frames[(symbol, interval)].copy()
+        return provider(symbol, interval, period)
+    
+    engine = ScannerEngine(result_cache=ScanResultCache(), data_cache=MarketDataCache(calendar),
+                           data_provider=fetch)
+    return engine, fetches
+
+
+def test_rescan_of_unchanged_symbols_does_not_fetch():
+    market = SyntheticMarket(bars=200)
+    # Saturday: the market is closed, so frames stay fresh until Monday's close
+    engine, fetches = counting_engine(market, ClockCalendar('2026-10-17 12:00'))
+    symbols = market.universe(5)
+    first = engine.scan_multiple_symbols(symbols, WORKFLOW, max_workers=1)
+    assert len(fetches) == 10 and first['Fresh'].all()
+    
+    second = engine.scan_multiple_symbols(symbols, WORKFLOW, max_workers=1)
+    assert len(fetches) == 10
+    assert not second['Fresh'].any()
+    assert second['Signal'].tolist() == first['Signal'].tolist()
+
+
+def test_forming_bar_is_refetched_during_the_session():
+    market = SyntheticMarket(bars=200)
+    calendar = ClockCalendar('2026-10-19 10:00')
+    frames = {('SYN0000', interval): market.generate('SYN0000', interval)
+              for interval in WORKFLOW['timeframes'].values()}
+    engine, fetches = counting_engine(market, calendar, frames)
+    
+    first = engine.scan_multiple_symbols(['SYN0000'], WORKFLOW, max_workers=1)
+    calendar.clock += pd.Timedelta(seconds=30)
+    engine.scan_multiple_symbols(['SYN0000'], WORKFLOW, max_workers=1)
+    assert len(fetches) == 2
+    
+    # Fifteen minutes later today's daily bar has ticked
+    calendar.clock += pd.Timedelta(minutes=15)
+    daily = frames[('SYN0000', '1d')]
+    daily.iloc[-1, daily.columns.get_loc('Close')] *= 1.05
+    rescan = engine.scan_multiple_symbols(['SYN0000'], WORKFLOW, max_workers=1)
+    assert len(fetches) == 4
+    assert rescan['Fresh'].all()
+    assert rescan['Close'].iloc[0] != first['Close'].iloc[0]